@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Сервис импортирует свои модули относительно src (как при запуске src/cloudberry_storage.py).
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
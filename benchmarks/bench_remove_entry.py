@@ -0,0 +1,108 @@
+"""Задержка RemoveEntry в зависимости от размера коллекции, с индексом по ticket_id и без него.
+
+Коллекция заполняется точками с раскладкой как у PutEntry (title, description
+и по картинке на тикет) со случайными векторами, затем удаляются случайные
+тикеты через CloudberryStorage.RemoveEntry, а столько же других — одним
+вызовом RemoveEntries. Локальный Qdrant (":memory:") индексы по payload
+игнорирует, поэтому разница видна только на сервере:
+
+    python -m benchmarks.bench_remove_entry --qdrant-url http://localhost:6333 --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import logging
+import random
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+from benchmarks.report import latency_summary
+from benchmarks.stand_ins import DeterministicTextEmbedder, RecordingContext
+from cloudberry_storage import CloudberryStorage, VECTORS_CONFIG, ONE_PEACE_VECTOR_SIZE, SBERT_VECTOR_SIZE
+from model_registry import ModelRegistry
+from ticket_updates import ticket_hashes
+
+UPSERT_CHUNK = 256  # тикетов за один upsert при заполнении
+
+
+def fill_collection(storage: CloudberryStorage, bucket_uuid: str, tickets: int) -> None:
+    rng = np.random.default_rng(0)
+    for start in range(0, tickets, UPSERT_CHUNK):
+        points = []
+        for i in range(start, min(start + UPSERT_CHUNK, tickets)):
+            request = pb2.PutEntryRequest(
+                external_ticket_id=f"ticket-{i}",
+                bucket_uuid=bucket_uuid,
+                ticket=pb2.TicketEntry(attachments=[pb2.ImageEntry(content=str(i).encode())]),
+            )
+            points.extend(storage._ticket_points(
+                request,
+                ticket_hashes(request),
+                title_vec=rng.standard_normal(SBERT_VECTOR_SIZE, dtype=np.float32),
+                desc_vec=rng.standard_normal(SBERT_VECTOR_SIZE, dtype=np.float32),
+                images=[(0, rng.standard_normal(ONE_PEACE_VECTOR_SIZE, dtype=np.float32), "", None)],
+            ))
+        storage.models_registry.qdrant_client.upsert(collection_name=bucket_uuid, points=points, wait=True)
+
+
+def measure(storage: CloudberryStorage, tickets: int, removes: int, indexed: bool) -> dict:
+    qdrant_client = storage.models_registry.qdrant_client
+    bucket_uuid = str(uuid.uuid4())
+    if indexed:
+        storage.create_collection_if_not_exists(bucket_uuid)
+    else:
+        qdrant_client.create_collection(collection_name=bucket_uuid, vectors_config=VECTORS_CONFIG)
+
+    fill_collection(storage, bucket_uuid, tickets)
+    context = RecordingContext()
+    sample = random.Random(0).sample(range(tickets), min(2 * removes, tickets))
+    single, bulk = sample[:len(sample) // 2], sample[len(sample) // 2:]
+    latencies: list[float] = []
+    for i in single:
+        started = time.perf_counter()
+        storage.RemoveEntry(pb2.RemoveEntryRequest(external_ticket_id=f"ticket-{i}", bucket_uuid=bucket_uuid), context)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    storage.RemoveEntries(pb2.RemoveEntriesRequest(bucket_uuid=bucket_uuid, wait=True,
+                                                   external_ticket_ids=[f"ticket-{i}" for i in bulk]), context)
+    bulk_seconds = time.perf_counter() - started
+    qdrant_client.delete_collection(bucket_uuid)
+
+    return {
+        "tickets": tickets,
+        "points": tickets * 3,
+        "payload_index": indexed,
+        "latency": latency_summary(latencies),
+        "remove_entries": {"tickets": len(bulk), "total_ms": round(bulk_seconds * 1000, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qdrant-url", default=":memory:")
+    parser.add_argument("--sizes", default="1000,5000,20000", help="размеры коллекции в тикетах через запятую")
+    parser.add_argument("--removes", type=int, default=100)
+    args = parser.parse_args()
+
+    # Поточечные логи PutEntry и RemoveEntry здесь только мешают замерам.
+    logging.getLogger("CloudberryStorage").setLevel(logging.WARNING)
+    registry = ModelRegistry(
+        text_embedder=DeterministicTextEmbedder(),
+        one_peace_client=None,
+        qdrant_client=QdrantClient(args.qdrant_url),
+    )
+    storage = CloudberryStorage(registry)
+    results = [
+        measure(storage, int(size), args.removes, indexed)
+        for size in args.sizes.split(",")
+        for indexed in (False, True)
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Сравнение синхронного и asyncio-режимов сервера CloudberryStorage.
+
+Оба сервера запускаются в процессе с локальными заменами: Qdrant в режиме
+":memory:", фейковый ONE-PEACE с заданной задержкой и детерминированный
+текстовый эмбеддер. Нагрузка — параллельные Find с текстом и картинкой.
+
+    python -m benchmarks.bench_server_modes --mode both --concurrency 200 --one-peace-latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent import futures
+
+import grpc
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+import cloudberry_storage_pb2_grpc as pb2_grpc
+from async_cloudberry_storage import AsyncCloudberryStorage
+from benchmarks.report import latency_summary
+from benchmarks.stand_ins import BatchOnePeaceServicer, DeterministicTextEmbedder, start_fake_server, synthetic_png, \
+    synthetic_text, synthetic_ticket
+from cloudberry_storage import CloudberryStorage
+from embedders.async_one_peace_client import AsyncOnePeaceClient
+from embedders.one_peace_client import OnePeaceClient
+from model_registry import ModelRegistry
+
+BUCKET_UUID = "550e8400-e29b-41d4-a716-446655440000"
+SYNC_WORKERS = 10  # как в serve()
+
+
+def start_sync_server(one_peace_port: int) -> tuple[int, callable]:
+    registry = ModelRegistry(
+        text_embedder=DeterministicTextEmbedder(),
+        one_peace_client=OnePeaceClient(port=one_peace_port),
+        qdrant_client=QdrantClient(":memory:"),
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=SYNC_WORKERS))
+    pb2_grpc.add_CloudberryStorageServicer_to_server(CloudberryStorage(registry), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    return port, lambda: server.stop(None)
+
+
+def start_async_server(one_peace_port: int) -> tuple[int, callable]:
+    # Сервер живёт в собственном event loop в отдельном потоке, как в отдельном процессе.
+    started = threading.Event()
+    state = {}
+
+    async def run():
+        registry = ModelRegistry(
+            text_embedder=DeterministicTextEmbedder(),
+            one_peace_client=AsyncOnePeaceClient(port=one_peace_port),
+            qdrant_client=AsyncQdrantClient(":memory:"),
+        )
+        server = grpc.aio.server()
+        pb2_grpc.add_CloudberryStorageServicer_to_server(AsyncCloudberryStorage(registry), server)
+        state["port"] = server.add_insecure_port("localhost:0")
+        state["stop"] = asyncio.Event()
+        state["loop"] = asyncio.get_running_loop()
+        await server.start()
+        started.set()
+        await state["stop"].wait()
+        await server.stop(None)
+
+    thread = threading.Thread(target=asyncio.run, args=(run(),), daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop():
+        state["loop"].call_soon_threadsafe(state["stop"].set)
+        thread.join()
+
+    return state["port"], stop
+
+
+async def drive(port: int, tickets: int, requests: int, concurrency: int) -> dict:
+    async with grpc.aio.insecure_channel(f"localhost:{port}") as channel:
+        stub = pb2_grpc.CloudberryStorageStub(channel)
+        await stub.InitBucket(pb2.InitBucketRequest(bucket_uuid=BUCKET_UUID))
+
+        await stub.BatchPutEntries(synthetic_ticket(i, BUCKET_UUID) for i in range(tickets))
+
+        latencies: list[float] = []
+        remaining = iter(range(requests))
+
+        async def worker():
+            for i in remaining:
+                request = pb2.FindRequest(
+                    query=pb2.TextEntry(content=synthetic_text(i % tickets + 1_000_000, 8)),
+                    images=[pb2.ImageEntry(content=synthetic_png(i), content_type=pb2.PNG)],
+                    bucket_uuid=BUCKET_UUID,
+                    top_k=5,
+                )
+                started = time.perf_counter()
+                await stub.Find(request)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--tickets", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--one-peace-latency", type=float, default=0.05, help="секунды на вызов ONE-PEACE")
+    args = parser.parse_args()
+
+    one_peace_server, one_peace_port = start_fake_server(
+        BatchOnePeaceServicer(latency=args.one_peace_latency), max_workers=2 * args.concurrency
+    )
+    starters = {"sync": start_sync_server, "async": start_async_server}
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    results = []
+    for mode in modes:
+        port, stop = starters[mode](one_peace_port)
+        try:
+            result = asyncio.run(drive(port, args.tickets, args.requests, args.concurrency))
+        finally:
+            stop()
+        results.append({"mode": mode, "one_peace_latency_s": args.one_peace_latency, **result})
+    one_peace_server.stop(None)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
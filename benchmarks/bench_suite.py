@@ -0,0 +1,183 @@
+"""Офлайн-бенчмарк PutEntry, Find и RemoveEntry на синтетическом корпусе тикетов.
+
+CloudberryStorage работает в процессе, без gRPC-сервера, с тремя заменами:
+Qdrant в режиме ":memory:" (или локальный каталог, или URL сервера), фейковый
+ONE-PEACE по gRPC с заданной задержкой и детерминированный текстовый эмбеддер.
+Фазы put, find и remove идут по очереди с заданной параллельностью. Результат —
+JSON с пропускной способностью, p50/p95/p99 и временем по стадиям (вызовы
+Qdrant, ONE-PEACE и SBERT), а также время старта: импорт модуля сервиса в
+отдельном процессе и прогрев до готовности. Так можно сравнивать коммиты между собой:
+
+    python -m benchmarks.bench_suite --tickets 500 --concurrency 16 --output before.json
+"""
+import argparse
+import functools
+import json
+import logging
+import random
+import os
+import subprocess
+import sys
+import time
+import uuid
+from concurrent import futures
+
+from qdrant_client import QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+from benchmarks.report import StageTimer, latency_summary
+from benchmarks.stand_ins import BatchOnePeaceServicer, DeterministicTextEmbedder, RecordingContext, \
+    SerializedClient, start_fake_server, synthetic_png, synthetic_text, synthetic_ticket
+from cloudberry_storage import CloudberryStorage, FIND_CACHE_TTL, QUERY_CACHE_SIZE
+from embedders.one_peace_client import OnePeaceClient
+from find_cache import FindResultCache, TtlLruCache
+from health import wait_until_ready, warm_up
+from model_registry import ModelRegistry
+from worker_pool import EmbeddingWorkerPool, PooledTextEmbedder
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def make_qdrant_client(location: str, timer: StageTimer):
+    if location.startswith(("http://", "https://")):
+        return timer.wrap(QdrantClient(location), "qdrant")
+    client = QdrantClient(location) if location == ":memory:" else QdrantClient(path=location)
+    # Стадия qdrant считается без ожидания блокировки, чтобы не смешивать её с очередью потоков.
+    return SerializedClient(timer.wrap(client, "qdrant"))
+
+
+def run_phase(name: str, timer: StageTimer, call, requests: list, concurrency: int) -> dict:
+    timer.phase = name
+    latencies: list[float] = []
+    errors = 0
+
+    def run(request):
+        context = RecordingContext()
+        started = time.perf_counter()
+        call(request, context)
+        return time.perf_counter() - started, context.code
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for seconds, code in pool.map(run, requests):
+            latencies.append(seconds)
+            errors += code is not None
+    elapsed = time.perf_counter() - started
+    return {
+        "phase": name,
+        "requests": len(requests),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 1) if elapsed else None,
+        "latency": latency_summary(latencies),
+        "stages": timer.summary(name),
+    }
+
+
+def measure_import() -> float:
+    # В свежем процессе, иначе модули уже лежат в sys.modules и импорт ничего не стоит.
+    code = "import time; t = time.perf_counter(); import cloudberry_storage; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--qdrant", default=":memory:", help='":memory:", каталог локального Qdrant или URL сервера')
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--attachments", type=int, default=1, help="вложений на тикет")
+    parser.add_argument("--finds", type=int, default=300)
+    parser.add_argument("--find-images", type=int, default=1, help="картинок в каждом запросе Find")
+    parser.add_argument("--distinct-finds", type=int, default=0,
+                        help="различных запросов Find, остальные — повторы; 0 — все различны")
+    parser.add_argument("--find-cache-size", type=int, default=0, help="записей в кэше ответов Find; 0 — без кэша")
+    parser.add_argument("--removes", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--one-peace-latency", type=float, default=0.02, help="секунды на вызов ONE-PEACE")
+    parser.add_argument("--sbert-latency", type=float, default=0.0, help="секунды на батч SBERT")
+    parser.add_argument("--embedding-workers", type=int, default=0,
+                        help="процессов для эмбеддера и подготовки картинок; 0 — в процессе бенчмарка")
+    parser.add_argument("--output", help="файл для JSON; по умолчанию stdout")
+    args = parser.parse_args()
+
+    # Поточечные логи сервиса искажают замеры и засоряют вывод.
+    logging.getLogger("CloudberryStorage").setLevel(logging.WARNING)
+
+    one_peace_server, one_peace_port = start_fake_server(
+        BatchOnePeaceServicer(latency=args.one_peace_latency), max_workers=2 * args.concurrency
+    )
+    timer = StageTimer()
+    text_embedder = DeterministicTextEmbedder(latency=args.sbert_latency)
+    pool = None
+    if args.embedding_workers:
+        pool = EmbeddingWorkerPool(args.embedding_workers,
+                                   functools.partial(DeterministicTextEmbedder, latency=args.sbert_latency))
+        text_embedder = PooledTextEmbedder(pool)
+    registry = ModelRegistry(
+        text_embedder=timer.wrap(text_embedder, "sbert"),
+        one_peace_client=timer.wrap(OnePeaceClient(port=one_peace_port), "one_peace"),
+        qdrant_client=make_qdrant_client(args.qdrant, timer),
+        image_preprocessor=pool.prepare_images if pool else None,
+    )
+    startup = {
+        "import_s": round(measure_import(), 3),
+        "warm_up_s": round(wait_until_ready(lambda: warm_up(registry), retry_interval=0.1), 3),
+    }
+    find_caches = {}
+    if args.find_cache_size:
+        find_caches = {"find_cache": FindResultCache(args.find_cache_size, ttl=FIND_CACHE_TTL),
+                       "query_cache": TtlLruCache(QUERY_CACHE_SIZE)}
+    storage = CloudberryStorage(registry, **find_caches)
+    bucket_uuid = str(uuid.uuid4())
+    storage.InitBucket(pb2.InitBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+
+    rng = random.Random(0)
+    tickets = [synthetic_ticket(i, bucket_uuid, attachments=args.attachments) for i in range(args.tickets)]
+    finds = [
+        pb2.FindRequest(
+            query=pb2.TextEntry(content=synthetic_text(rng.randrange(args.tickets) + 1_000_000, 8)),
+            images=[pb2.ImageEntry(content=synthetic_png(rng.randrange(10_000)), content_type=pb2.PNG)
+                    for _ in range(args.find_images)],
+            bucket_uuid=bucket_uuid,
+            top_k=10,
+        )
+        for _ in range(args.distinct_finds or args.finds)
+    ]
+    finds = [finds[i % len(finds)] for i in range(args.finds)]
+    removes = [
+        pb2.RemoveEntryRequest(external_ticket_id=f"ticket-{i}", bucket_uuid=bucket_uuid)
+        for i in rng.sample(range(args.tickets), min(args.removes, args.tickets))
+    ]
+
+    try:
+        phases = [
+            run_phase("put", timer, storage.PutEntry, tickets, args.concurrency),
+            run_phase("find", timer, storage.Find, finds, args.concurrency),
+            run_phase("remove", timer, storage.RemoveEntry, removes, args.concurrency),
+        ]
+    finally:
+        storage.DestroyBucket(pb2.DestroyBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+        one_peace_server.stop(None)
+        if pool is not None:
+            pool.close()
+
+    report = {"revision": git_revision(), "params": vars(args), "startup": startup, "phases": phases}
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
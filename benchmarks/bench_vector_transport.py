@@ -0,0 +1,82 @@
+"""Стоимость одного вектора ONE-PEACE на пути от ответа сервиса до транспорта Qdrant.
+
+Сравниваются два представления VectorResponse: repeated float (прежнее, list(response.vector))
+и bytes vector_f32 (np.frombuffer), каждое с сериализацией точки в JSON для HTTP и в protobuf
+для gRPC-интерфейса Qdrant (prefer_grpc). Для каждого шага — время на точку и пик памяти,
+выделенной на одну точку:
+
+    python -m benchmarks.bench_vector_transport --points 2000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+from qdrant_client import models
+from qdrant_client.conversions.conversion import RestToGrpc
+
+import one_peace_service_pb2 as pb2
+from benchmarks.stand_ins import ONE_PEACE_VECTOR_SIZE
+from embedders.one_peace_client import response_vector
+
+
+def decode_repeated(raw: bytes):
+    return list(pb2.VectorResponse.FromString(raw).vector)
+
+
+def decode_f32(raw: bytes):
+    return response_vector(pb2.VectorResponse.FromString(raw))
+
+
+def make_point(vector) -> models.PointStruct:
+    if isinstance(vector, np.ndarray):
+        vector = vector.tolist()
+    return models.PointStruct(id=1, vector={"one_peace_embedding": vector}, payload={"ticket_id": "ticket-1"})
+
+
+def to_http(point: models.PointStruct) -> str:
+    return point.model_dump_json(exclude_unset=True)
+
+
+def to_grpc(point: models.PointStruct) -> bytes:
+    return RestToGrpc.convert_point_struct(point).SerializeToString()
+
+
+def measure(fn, arg, points: int) -> dict:
+    fn(arg)
+    started = time.perf_counter()
+    for _ in range(points):
+        fn(arg)
+    seconds = (time.perf_counter() - started) / points
+
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"us_per_point": round(seconds * 1e6, 1), "peak_alloc_bytes": peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+
+    vector = np.random.default_rng(0).standard_normal(ONE_PEACE_VECTOR_SIZE).astype(np.float32)
+    encodings = {
+        "repeated_float": (pb2.VectorResponse(vector=vector.tolist()).SerializeToString(), decode_repeated),
+        "vector_f32": (pb2.VectorResponse(vector_f32=vector.astype("<f4").tobytes()).SerializeToString(), decode_f32),
+    }
+    results = {}
+    for name, (raw, decode) in encodings.items():
+        results[name] = {
+            "wire_bytes": len(raw),
+            "decode": measure(decode, raw, args.points),
+            "decode+point+http": measure(lambda r: to_http(make_point(decode(r))), raw, args.points),
+            "decode+point+grpc": measure(lambda r: to_grpc(make_point(decode(r))), raw, args.points),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
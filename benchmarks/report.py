@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    if not seconds:
+        return {"count": 0}
+    latencies_ms = np.array(seconds) * 1000
+    return {
+        "count": len(seconds),
+        "total_ms": round(float(latencies_ms.sum()), 2),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+    }
+
+
+class StageTimer:
+    """Время вызовов зависимостей сервиса (Qdrant, ONE-PEACE, SBERT) по фазам бенчмарка.
+
+    Фазы идут последовательно, поэтому вызов из любого потока, в том числе из
+    внутренних пулов CloudberryStorage, относится к текущей фазе.
+    """
+
+    def __init__(self):
+        self.phase = ""
+        self._samples: dict[tuple[str, str], list[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[(self.phase, stage)].append(seconds)
+
+    def wrap(self, target, name: str):
+        return _TimedProxy(target, name, self)
+
+    def summary(self, phase: str) -> dict[str, dict]:
+        with self._lock:
+            return {stage: latency_summary(samples)
+                    for (sample_phase, stage), samples in sorted(self._samples.items()) if sample_phase == phase}
+
+
+class _TimedProxy:
+    def __init__(self, target, name: str, timer: StageTimer):
+        self._target = target
+        self._name = name
+        self._timer = timer
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                self._timer.record(f"{self._name}.{attr}", time.perf_counter() - started)
+
+        return timed
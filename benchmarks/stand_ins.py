@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+from concurrent import futures
+from io import BytesIO
+
+import grpc
+import numpy as np
+from PIL import Image
+
+import cloudberry_storage_pb2 as storage_pb2
+import one_peace_service_pb2 as pb2
+import one_peace_service_pb2_grpc as pb2_grpc
+from embedders.interfaces import TextEmbedder
+
+ONE_PEACE_VECTOR_SIZE = 1536
+SBERT_VECTOR_SIZE = 384
+
+
+def _seeded_vector(content: bytes, size: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(content).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(size).astype(np.float32)
+
+
+def fake_vector(content: bytes) -> np.ndarray:
+    return _seeded_vector(content, ONE_PEACE_VECTOR_SIZE)
+
+
+class DeterministicTextEmbedder(TextEmbedder):
+    """Замена SBERT: вектор зависит только от текста, модель не загружается."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.encode_texts([text])[0]
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        if self.latency:
+            time.sleep(self.latency)
+        return np.stack([_seeded_vector(text.encode("utf-8"), SBERT_VECTOR_SIZE) for text in texts])
+
+
+class UnaryOnePeaceServicer(pb2_grpc.OnePeaceEmbedderServicer):
+    """Локальная замена ONE-PEACE без пакетных RPC — как у старых версий сервиса."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+
+    def _record(self, method: str) -> None:
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _response(content: bytes) -> pb2.VectorResponse:
+        # Старые версии сервиса отдают вектор только как repeated float.
+        return pb2.VectorResponse(vector=fake_vector(content).tolist())
+
+    def EncodeText(self, request, context):
+        self._record("EncodeText")
+        return self._response(request.text.encode("utf-8"))
+
+    def EncodeImage(self, request, context):
+        self._record("EncodeImage")
+        return self._response(request.content)
+
+
+class BatchOnePeaceServicer(UnaryOnePeaceServicer):
+    @staticmethod
+    def _response(content: bytes) -> pb2.VectorResponse:
+        return pb2.VectorResponse(vector_f32=fake_vector(content).astype("<f4").tobytes())
+
+    def EncodeTexts(self, request, context):
+        self._record("EncodeTexts")
+        return pb2.VectorBatchResponse(vectors=[self._response(text.encode("utf-8")) for text in request.texts])
+
+    def EncodeImages(self, request, context):
+        self._record("EncodeImages")
+        return pb2.VectorBatchResponse(vectors=[self._response(content) for content in request.contents])
+
+
+def start_fake_server(servicer: pb2_grpc.OnePeaceEmbedderServicer, max_workers: int = 4) -> tuple[grpc.Server, int]:
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    pb2_grpc.add_OnePeaceEmbedderServicer_to_server(servicer, server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    return server, port
+
+
+class SerializedClient:
+    """Обёртка, выполняющая вызовы по одному: локальный QdrantClient не рассчитан на запись из нескольких потоков."""
+
+    def __init__(self, target):
+        self._target = target
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+
+        def serialized(*args, **kwargs):
+            with self._lock:
+                return value(*args, **kwargs)
+
+        return serialized
+
+
+class RecordingContext:
+    """Замена grpc.ServicerContext для вызова методов сервиса напрямую, без сервера."""
+
+    def __init__(self):
+        self.code = None
+        self.details = ""
+
+    def set_code(self, code) -> None:
+        self.code = code
+
+    def set_details(self, details: str) -> None:
+        self.details = details
+
+
+VOCABULARY = (
+    "ошибка сервер запрос таймаут база данных авторизация пароль отчёт экспорт загрузка файл страница "
+    "error server request timeout database login password report export upload file page crash slow"
+).split()
+
+
+def synthetic_png(seed: int, size: int = 64) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (size, size), (seed % 256, (seed * 7) % 256, (seed * 13) % 256)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def synthetic_text(seed: int, words: int) -> str:
+    rng = np.random.default_rng(seed)
+    return " ".join(rng.choice(VOCABULARY, size=words))
+
+
+def synthetic_ticket(i: int, bucket_uuid: str, attachments: int = 1,
+                     description_words: int = 40) -> storage_pb2.PutEntryRequest:
+    return storage_pb2.PutEntryRequest(
+        external_ticket_id=f"ticket-{i}",
+        bucket_uuid=bucket_uuid,
+        ticket=storage_pb2.TicketEntry(
+            title=storage_pb2.TextEntry(content=f"Ticket {i}: {synthetic_text(i, 6)}"),
+            description=storage_pb2.TextEntry(content=synthetic_text(i + 1_000_000, description_words)),
+            attachments=[
+                storage_pb2.ImageEntry(content=synthetic_png(i * 31 + n), content_type=storage_pb2.PNG)
+                for n in range(attachments)
+            ],
+        ),
+    )
@@ -0,0 +1,498 @@
+import asyncio
+import functools
+import logging
+import signal
+import time
+from concurrent import futures
+from typing import AsyncIterator
+
+import grpc
+import numpy as np
+from grpc import aio
+from qdrant_client import AsyncQdrantClient, models
+
+import cloudberry_storage_pb2 as pb2
+import cloudberry_storage_pb2_grpc as pb2_grpc
+from cloudberry_storage import CloudberryStorage, VECTORS_CONFIG, PAYLOAD_INDEXES, PUT_BATCH_SIZE, DEFAULT_TOP_K, QDRANT_URL, \
+    QDRANT_PREFER_GRPC, SERVER_PORT, TRANSLATOR_BACKEND, OCR_WORKERS, OCR_TIMEOUT, INGEST_QUEUE_PATH, INGEST_QUEUE_MAX_DEPTH, \
+    INGEST_WORKERS, METRICS_PORT, ONE_PEACE_ENDPOINTS, ONE_PEACE_MODEL_ID, build_text_embedder, build_one_peace_cache, \
+    build_worker_pool, one_peace_policy, build_find_caches, build_layout, text_model_id, flush_embedding_caches, \
+    SHUTDOWN_GRACE
+from cloudberry_storage_pb2 import InitBucketRequest, DestroyBucketRequest, Empty, FindRequest, \
+    RemoveEntryRequest, PutEntryRequest, FindResponse, BatchPutEntriesResponse, GetEntryStatusRequest, \
+    GetEntryStatusResponse, StorageProfile, RemoveEntriesRequest, RemoveEntriesResponse
+from bucket_layout import CollectionPerBucket
+from embedders.async_one_peace_client import AsyncOnePeaceClient
+from embedders.embedding_cache import AsyncCachedOnePeaceClient
+from embedders.resilience import OnePeaceError
+from find_cache import FindResultCache, TtlLruCache
+from health import add_async_health_servicer, mark_serving_async, wait_until_ready_async, warm_up_async
+from ingest_queue import IngestQueue
+from metrics import STAGE_SECONDS, AsyncMetricsInterceptor, start_metrics_server
+from model_registry import ModelRegistry
+from ocr import OcrPipeline
+from storage_profiles import search_params
+from ticket_updates import TicketUpdate, SCROLL_PAGE_SIZE, stored_hashes_filter, group_stored_hashes, \
+    write_operations, remove_operations
+from translation import QueryTranslator, make_translator_backend, normalize_query
+
+CPU_WORKERS = 4  # потоков для Pillow и SBERT в текущем процессе; ожидание OCR и батчера сюда не попадает
+IO_WORKERS = 8  # потоков для блокирующего ввода-вывода без asyncio-клиента: SQLite очереди и HTTP переводчика
+
+logger = logging.getLogger("AsyncCloudberryStorage")
+
+
+class AsyncCloudberryStorage(CloudberryStorage):
+    """CloudberryStorage для grpc.aio.
+
+    Ожидает в реестре AsyncQdrantClient и асинхронный клиент ONE-PEACE; в пуле
+    потоков выполняется только CPU-работа, поэтому тысячи запросов могут ждать
+    ввода-вывода, не занимая по потоку каждый. Результаты OCR и батчера текстов
+    ожидаются через asyncio.wrap_future, а SQLite и перевод идут в отдельный пул.
+    """
+
+    def __init__(self, registry: ModelRegistry, cpu_workers: int = CPU_WORKERS,
+                 ingest_queue: IngestQueue | None = None, find_cache: FindResultCache | None = None,
+                 query_cache: TtlLruCache | None = None, layout: CollectionPerBucket | None = None,
+                 io_workers: int = IO_WORKERS):
+        # Ветки Find идут через event loop, поэтому пул потоков для них не создаём.
+        super().__init__(registry, ingest_queue=ingest_queue, find_cache=find_cache, query_cache=query_cache,
+                         layout=layout, find_workers=0)
+        self._cpu_pool = futures.ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="cpu")
+        self._io_pool = futures.ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io")
+
+    async def _run_cpu(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._cpu_pool, functools.partial(fn, *args))
+
+    async def _run_io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._io_pool, functools.partial(fn, *args))
+
+    async def _encode_texts(self, texts: list[str]) -> np.ndarray:
+        text_embedder = self.models_registry.text_embedder
+        submitted = text_embedder.submit_texts(texts)
+        if submitted is None:
+            # Эмбеддер считает в вызывающем потоке: это CPU-работа.
+            return await self._run_cpu(text_embedder.encode_texts, texts)
+        return np.stack(await asyncio.gather(*(asyncio.wrap_future(future) for future in submitted)))
+
+    async def _collect_ocr(self, ocr_batch: list[futures.Future] | None, count: int) -> list[str | None]:
+        if ocr_batch is None:
+            return [""] * count
+        await asyncio.wait([asyncio.wrap_future(future) for future in ocr_batch])
+        return self.models_registry.ocr_pipeline.texts(ocr_batch)
+
+    async def _encode_text_query(self, text_query: str):
+        cached = self._query_vector("sbert", text_query)
+        if cached is not None:
+            return cached
+        with STAGE_SECONDS.time(operation="find", stage="sbert"):
+            (vector,) = await self._encode_texts([text_query])
+        self._remember_query_vector("sbert", text_query, vector)
+        return vector
+
+    @staticmethod
+    async def _timed_async(timings: dict[str, float], name: str, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    async def create_collection_if_not_exists(self, collection_name: str,
+                                           profile: StorageProfile | None = None) -> None:
+        if collection_name in self._known_buckets:
+            return
+        qdrant_client = self.models_registry.qdrant_client
+        if await qdrant_client.collection_exists(collection_name):
+            logger.info(f"Коллекция {collection_name} уже существует.")
+        else:
+            await qdrant_client.create_collection(
+                collection_name=collection_name,
+                **self.layout.collection_params(profile or StorageProfile(), VECTORS_CONFIG)
+            )
+            logger.info(f"Создана новая коллекция {collection_name} с несколькими векторами, профиль: {profile}.")
+        for field_name, field_schema in {**PAYLOAD_INDEXES, **self.layout.payload_indexes()}.items():
+            await qdrant_client.create_payload_index(collection_name, field_name=field_name,
+                                                     field_schema=field_schema)
+        self._known_buckets.add(collection_name)
+
+    async def InitBucket(self, request: InitBucketRequest, context: aio.ServicerContext) -> Empty:
+        bucket_uuid: str = request.bucket_uuid
+        try:
+            await self.create_collection_if_not_exists(self.layout.collection(bucket_uuid), request.storage_profile)
+        except Exception as e:
+            logger.error(f"Ошибка при регистрации bucket'а {bucket_uuid}: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Error creating Qdrant collection: {e}")
+        return Empty()
+
+    async def DestroyBucket(self, request: DestroyBucketRequest, context: aio.ServicerContext) -> Empty:
+        bucket_uuid: str = request.bucket_uuid
+        if self.layout.shared:
+            return await self._destroy_shared_bucket(bucket_uuid, context)
+        self._known_buckets.discard(bucket_uuid)
+        if not await self.models_registry.qdrant_client.collection_exists(bucket_uuid):
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details(f"Bucket collection {bucket_uuid} not found.")
+            logger.error(f"Коллекция не найдена.")
+            return pb2.Empty()
+
+        try:
+            await self.models_registry.qdrant_client.delete_collection(bucket_uuid)
+            logger.info(f"Коллекция {bucket_uuid} успешно удалена.")
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Error deleting Qdrant collection: {e}")
+            logger.error(f"Коллекция не уничтожена из-за ошибки: {e}.")
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
+        return pb2.Empty()
+
+    async def _destroy_shared_bucket(self, bucket_uuid: str, context: aio.ServicerContext) -> Empty:
+        try:
+            await self.models_registry.qdrant_client.delete(
+                collection_name=self.layout.collection(bucket_uuid),
+                points_selector=models.FilterSelector(filter=self.layout.bucket_filter(bucket_uuid))
+            )
+            logger.info(f"Точки бакета {bucket_uuid} удалены из {self.layout.collection(bucket_uuid)}.")
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Error deleting bucket points: {e}")
+            logger.error(f"Бакет {bucket_uuid} не уничтожен из-за ошибки: {e}.")
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
+        return pb2.Empty()
+
+    async def _scroll_stored_hashes(self, bucket_uuid: str, ticket_ids: list[str]):
+        records = []
+        offset = None
+        while True:
+            page, offset = await self.models_registry.qdrant_client.scroll(
+                collection_name=self.layout.collection(bucket_uuid),
+                scroll_filter=stored_hashes_filter(ticket_ids, self.layout.conditions(bucket_uuid)),
+                limit=SCROLL_PAGE_SIZE, offset=offset, with_payload=["ticket_id", "content_hash"], with_vectors=False
+            )
+            records.extend(page)
+            if offset is None:
+                return group_stored_hashes(records)
+
+    async def _plan_updates(self, requests: list[PutEntryRequest], errors: dict[int, Exception]):
+        updates: dict[int, TicketUpdate] = {}
+        for bucket_uuid, ticket_indices in self._tickets_by_bucket(range(len(requests)), requests).items():
+            try:
+                stored = await self._scroll_stored_hashes(bucket_uuid,
+                                                          [requests[i].external_ticket_id for i in ticket_indices])
+            except Exception as e:
+                logger.error(f"Ошибка при чтении сохранённых точек из {bucket_uuid}: {e}", exc_info=True)
+                for ticket_idx in ticket_indices:
+                    errors[ticket_idx] = e
+                continue
+            for ticket_idx in ticket_indices:
+                request = requests[ticket_idx]
+                updates[ticket_idx] = TicketUpdate(request, stored.get(request.external_ticket_id, {}),
+                                                   self.layout.namespace(bucket_uuid),
+                                                   self.models_registry.text_pipeline,
+                                                   self.models_registry.image_pipeline)
+        return updates
+
+    async def _embed_tickets(self, requests: list[PutEntryRequest]):
+        errors: dict[int, Exception] = {}
+        with STAGE_SECONDS.time(operation="put", stage="qdrant_read"):
+            updates = await self._plan_updates(requests, errors)
+        with STAGE_SECONDS.time(operation="put", stage="image_decode"):
+            decoded, contents = await self._run_cpu(self._prepare_attachments, requests, updates, errors)
+        ocr_batch = self._submit_ocr(contents)
+
+        all_images = [image for _, images in decoded for image in images]
+        with STAGE_SECONDS.time(operation="put", stage="one_peace"):
+            try:
+                all_image_vecs = (await self.models_registry.one_peace_client.encode_images(all_images)
+                                  if all_images else [])
+            except OnePeaceError as e:
+                all_image_vecs = self._failed_images(decoded, len(all_images), e, errors)
+        with STAGE_SECONDS.time(operation="put", stage="ocr"):
+            ocr_texts = await self._collect_ocr(ocr_batch, len(contents))
+        texts, pending = self._collect_texts(requests, updates, decoded, all_image_vecs, ocr_texts, errors)
+
+        with STAGE_SECONDS.time(operation="put", stage="sbert"):
+            text_vecs = await self._encode_texts(texts) if texts else []
+        return self._assemble_points(requests, updates, pending, text_vecs), errors
+
+    async def PutEntry(self, request: PutEntryRequest, context: aio.ServicerContext) -> Empty:
+        bucket_uuid: str = request.bucket_uuid
+        external_id: str = request.external_ticket_id
+        if self.ingest_queue is not None:
+            # SQLite блокирует поток на время коммита, поэтому запись идёт в пуле ввода-вывода.
+            return await self._run_io(self._enqueue, request, context)
+        try:
+            writes_by_ticket, errors = await self._embed_tickets([request])
+            if errors:
+                raise errors[0]
+            points, orphans = writes_by_ticket[0]
+            operations = write_operations(points, orphans)
+            if operations:
+                with STAGE_SECONDS.time(operation="put", stage="qdrant_write"):
+                    await self.models_registry.qdrant_client.batch_update_points(
+                        collection_name=self.layout.collection(bucket_uuid), update_operations=operations
+                    )
+            logger.info(f"Тикет {external_id} записан в {bucket_uuid}: обновлено точек {len(points)}, "
+                        f"удалено {len(orphans)}.")
+        except Exception as e:
+            logger.error(f"Ошибка при добавлении тикета {external_id}: {e}", exc_info=True)
+            context.set_code(self._error_code(e))
+            context.set_details(f"Ошибка добавления тикета: {e}")
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
+        return pb2.Empty()
+
+    async def _put_batch(self, requests: list[PutEntryRequest]) -> list[pb2.PutEntryStatus]:
+        last = self._last_copies(requests)
+        kept = sorted(set(last))
+        statuses = await self._put_latest([requests[ticket_idx] for ticket_idx in kept])
+        return self._copy_statuses(last, dict(zip(kept, statuses)))
+
+    async def _put_latest(self, requests: list[PutEntryRequest]) -> list[pb2.PutEntryStatus]:
+        try:
+            writes_by_ticket, errors = await self._embed_tickets(requests)
+        except Exception as e:
+            logger.error(f"Ошибка при построении эмбеддингов пачки из {len(requests)} тикетов: {e}", exc_info=True)
+            writes_by_ticket = {}
+            errors = {ticket_idx: e for ticket_idx in range(len(requests))}
+
+        for bucket_uuid, chunk_tickets, chunk_points, chunk_orphans in self._write_chunks(requests, writes_by_ticket):
+            operations = write_operations(chunk_points, chunk_orphans)
+            if not operations:
+                continue
+            try:
+                with STAGE_SECONDS.time(operation="put", stage="qdrant_write"):
+                    await self.models_registry.qdrant_client.batch_update_points(
+                        collection_name=self.layout.collection(bucket_uuid), update_operations=operations
+                    )
+                logger.info(f"В {bucket_uuid} записано {len(chunk_tickets)} тикетов: обновлено точек "
+                            f"{len(chunk_points)}, удалено {len(chunk_orphans)}.")
+            except Exception as e:
+                logger.error(f"Ошибка при вставке пачки точек в {bucket_uuid}: {e}", exc_info=True)
+                for failed_idx in chunk_tickets:
+                    errors[failed_idx] = e
+            finally:
+                self._invalidate_find_cache(bucket_uuid)
+        return self._put_statuses(requests, errors)
+
+    async def run_ingest_worker(self, batch_size: int = PUT_BATCH_SIZE, poll_interval: float = 0.2) -> None:
+        # Аналог IngestWorkerPool для event loop: пачка обрабатывается тем же _put_batch, что и BatchPutEntries.
+        while True:
+            try:
+                claimed = await self._run_io(self.ingest_queue.claim_batch, batch_size)
+                if claimed:
+                    await self._process_claimed(claimed)
+                    continue
+            except Exception as e:
+                logger.error(f"Ошибка при чтении очереди: {e}", exc_info=True)
+            await asyncio.sleep(poll_interval)
+
+    async def _process_claimed(self, claimed: list[tuple[int, PutEntryRequest]]) -> None:
+        try:
+            statuses = await self._put_batch([request for _, request in claimed])
+            await self._run_io(self.ingest_queue.complete,
+                               [(row_id, status) for (row_id, _), status in zip(claimed, statuses)])
+        except Exception as e:
+            # Как в IngestWorkerPool.run_once: строки в processing блокировали бы следующие версии тикетов.
+            logger.error(f"Ошибка при обработке пачки из очереди: {e}", exc_info=True)
+            await self._run_io(self.ingest_queue.complete,
+                               [(row_id, pb2.PutEntryStatus(ok=False, error=str(e))) for row_id, _ in claimed])
+
+    async def BatchPutEntries(self, request_iterator: AsyncIterator[PutEntryRequest],
+                              context: aio.ServicerContext) -> BatchPutEntriesResponse:
+        response = BatchPutEntriesResponse()
+        batch: list[PutEntryRequest] = []
+        try:
+            async for request in request_iterator:
+                batch.append(request)
+                if len(batch) >= PUT_BATCH_SIZE:
+                    response.statuses.extend(await self._put_batch(batch))
+                    batch = []
+            if batch:
+                response.statuses.extend(await self._put_batch(batch))
+        except Exception as e:
+            logger.error(f"Ошибка в BatchPutEntries: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка пакетного добавления тикетов: {e}")
+        return response
+
+    async def RemoveEntry(self, request: RemoveEntryRequest, context: aio.ServicerContext) -> Empty:
+        bucket_uuid: str = request.bucket_uuid
+        external_ticket_id: str = request.external_ticket_id
+        try:
+            await self.models_registry.qdrant_client.delete(
+                collection_name=self.layout.collection(bucket_uuid),
+                points_selector=self._ticket_selector(bucket_uuid, external_ticket_id)
+            )
+            logger.info(f"Удалены все точки для ticket_id={external_ticket_id} из {bucket_uuid}")
+        except Exception as e:
+            logger.error(f"Ошибка при удалении ticket_id={external_ticket_id}: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка при удалении: {e}")
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
+        return pb2.Empty()
+
+    async def RemoveEntries(self, request: RemoveEntriesRequest,
+                            context: aio.ServicerContext) -> RemoveEntriesResponse:
+        bucket_uuid: str = request.bucket_uuid
+        try:
+            operations = remove_operations(list(request.external_ticket_ids), request.payload_matches,
+                                           self.layout.conditions(bucket_uuid))
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return RemoveEntriesResponse()
+
+        try:
+            with STAGE_SECONDS.time(operation="remove", stage="qdrant_write"):
+                await self.models_registry.qdrant_client.batch_update_points(
+                    collection_name=self.layout.collection(bucket_uuid), update_operations=operations,
+                    wait=request.wait
+                )
+            logger.info(f"Удаление из {bucket_uuid}: тикетов в запросе {len(request.external_ticket_ids)}, "
+                        f"условий на payload {len(request.payload_matches)}, операций {len(operations)}, "
+                        f"wait={request.wait}.")
+        except Exception as e:
+            logger.error(f"Ошибка при массовом удалении из {bucket_uuid}: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка при удалении: {e}")
+            return RemoveEntriesResponse()
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
+        return RemoveEntriesResponse(completed=request.wait)
+
+    async def GetEntryStatus(self, request: GetEntryStatusRequest,
+                             context: aio.ServicerContext) -> GetEntryStatusResponse:
+        try:
+            response = await self._run_io(self._queued_status, request)
+            if response is not None:
+                return response
+            result = await self.models_registry.qdrant_client.count(
+                collection_name=self.layout.collection(request.bucket_uuid),
+                count_filter=self._ticket_selector(request.bucket_uuid, request.external_ticket_id).filter,
+                # Приблизительный подсчёт с фильтром ошибается в обе стороны; точный по индексу ticket_id дёшев.
+                exact=True
+            )
+            return GetEntryStatusResponse(state=pb2.ENTRY_SEARCHABLE if result.count else pb2.ENTRY_UNKNOWN)
+        except Exception as e:
+            logger.error(f"Ошибка в GetEntryStatus для {request.external_ticket_id}: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка получения статуса тикета: {e}")
+            return GetEntryStatusResponse()
+
+    async def _encode_one_peace_query(self, text_query: str):
+        cached = self._query_vector("one_peace_text", text_query)
+        if cached is not None:
+            return cached
+        with STAGE_SECONDS.time(operation="find", stage="translation"):
+            translated_query = await self._run_io(self.models_registry.query_translator.translate, text_query)
+        with STAGE_SECONDS.time(operation="find", stage="one_peace_text"):
+            vector = await self.models_registry.one_peace_client.encode_text(translated_query)
+        self._remember_query_vector("one_peace_text", text_query, vector)
+        return vector
+
+    async def _encode_query_images(self, images):
+        digests, vectors, missing = self._lookup_query_images(images)
+        if not missing:
+            return vectors
+        with STAGE_SECONDS.time(operation="find", stage="image_decode"):
+            contents = await self._run_cpu(self._prepare_query_images, missing)
+        with STAGE_SECONDS.time(operation="find", stage="one_peace_images"):
+            encoded = await self.models_registry.one_peace_client.encode_images(contents)
+        return self._store_query_images(digests, vectors, encoded)
+
+    async def _search_branch(self, **search_args):
+        with STAGE_SECONDS.time(operation="find", stage="qdrant_search"):
+            return await self.models_registry.qdrant_client.query_points_groups(**search_args)
+
+    async def Find(self, request: FindRequest, context: aio.ServicerContext) -> FindResponse:
+        bucket_uuid: str = request.bucket_uuid
+        top_k: int = request.top_k or DEFAULT_TOP_K
+        search = search_params(request.search_params)
+        text_query: str = normalize_query(request.query.content)
+        try:
+            cache_key = self.find_cache.request_key(request, top_k) if self.find_cache is not None else None
+            if cache_key is not None:
+                cached = self.find_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            timings: dict[str, float] = {}
+            started = time.perf_counter()
+
+            text_vec, one_peace_text_vec, image_vectors = await asyncio.gather(
+                self._timed_async(timings, "sbert", self._encode_text_query(text_query)),
+                self._timed_async(timings, "one_peace_text", self._encode_one_peace_query(text_query)),
+                self._timed_async(timings, "one_peace_images", self._encode_query_images(request.images)),
+            )
+
+            branch_results = await asyncio.gather(*(
+                self._timed_async(
+                    timings, f"qdrant_{name}",
+                    self._search_branch(**self._grouped_search_args(bucket_uuid, using, query, top_k, search))
+                )
+                for name, using, query in self._search_branches(text_vec, one_peace_text_vec, image_vectors)
+            ))
+            response = self._aggregate_results([result.groups for result in branch_results], top_k)
+            if cache_key is not None:
+                self.find_cache.put(cache_key, response)
+
+            timings["total"] = time.perf_counter() - started
+            self._log_timings(bucket_uuid, timings)
+            return response
+        except Exception as e:
+            logger.error(f"Ошибка в Find: {e}", exc_info=True)
+            context.set_code(self._error_code(e))
+            context.set_details(f"Ошибка при выполнении поиска: {e}")
+            return FindResponse()
+
+
+async def serve_async():
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    server = aio.server(interceptors=[AsyncMetricsInterceptor()])
+    pool = build_worker_pool()
+    registry = ModelRegistry(
+        text_embedder=build_text_embedder(pool),
+        one_peace_client=AsyncCachedOnePeaceClient(
+            AsyncOnePeaceClient(endpoints=ONE_PEACE_ENDPOINTS, policy=one_peace_policy()), build_one_peace_cache()
+        ),
+        qdrant_client=AsyncQdrantClient(QDRANT_URL, prefer_grpc=QDRANT_PREFER_GRPC),
+        query_translator=QueryTranslator(make_translator_backend(TRANSLATOR_BACKEND)),
+        ocr_pipeline=OcrPipeline(max_workers=OCR_WORKERS, timeout=OCR_TIMEOUT),
+        image_preprocessor=pool.prepare_images if pool else None,
+        text_model_id=text_model_id(),
+        image_model_id=ONE_PEACE_MODEL_ID,
+    )
+    queue = IngestQueue(INGEST_QUEUE_PATH, max_depth=INGEST_QUEUE_MAX_DEPTH) if INGEST_QUEUE_PATH else None
+    storage = AsyncCloudberryStorage(registry, ingest_queue=queue, layout=build_layout(), **build_find_caches())
+    # Ссылки на задачи держим до конца работы сервера, иначе их может собрать сборщик мусора.
+    ingest_tasks = [asyncio.create_task(storage.run_ingest_worker()) for _ in range(INGEST_WORKERS if queue else 0)]
+    pb2_grpc.add_CloudberryStorageServicer_to_server(storage, server)
+    health_servicer = await add_async_health_servicer(server)
+    server.add_insecure_port(f"[::]:{SERVER_PORT}")
+    await server.start()
+    logger.info(f"Asyncio-сервер CloudberryStorage запущен на порту {SERVER_PORT}, идёт прогрев моделей.")
+
+    async def become_ready():
+        await wait_until_ready_async(lambda: warm_up_async(registry, storage._encode_texts))
+        await mark_serving_async(health_servicer)
+
+    ready_task = asyncio.create_task(become_ready())
+    stopping = set()
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, lambda: stopping.add(asyncio.create_task(server.stop(SHUTDOWN_GRACE)))
+    )
+    try:
+        await server.wait_for_termination()
+    finally:
+        # Прогрев и воркеры очереди не переживают сервер: отменяем их и дожидаемся завершения.
+        background = [ready_task, *ingest_tasks]
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        flush_embedding_caches(registry)
@@ -0,0 +1,89 @@
+import zlib
+
+from qdrant_client import models
+
+from cloudberry_storage_pb2 import StorageProfile
+from storage_profiles import collection_params
+
+TENANT_FIELD = "bucket_uuid"
+SHARED_COLLECTION_PREFIX = "cloudberry_shared"
+# Граф HNSW строится по каждому бакету отдельно (payload_m), общий граф коллекции не нужен:
+# любой запрос в общей коллекции отфильтрован по бакету.
+SHARED_HNSW_CONFIG = models.HnswConfigDiff(m=0, payload_m=16)
+
+
+class CollectionPerBucket:
+    """Отдельная коллекция Qdrant на каждый бакет; имя коллекции — UUID бакета."""
+
+    shared = False
+
+    def collection(self, bucket_uuid: str) -> str:
+        return bucket_uuid
+
+    def conditions(self, bucket_uuid: str) -> list[models.FieldCondition]:
+        return []
+
+    def namespace(self, bucket_uuid: str) -> str:
+        # Префикс для id точек; пустой сохраняет id, записанные до появления общих коллекций.
+        return ""
+
+    def payload(self, bucket_uuid: str) -> dict:
+        return {}
+
+    def collection_params(self, profile: StorageProfile, vectors_config: dict[str, models.VectorParams]) -> dict:
+        return collection_params(profile, vectors_config)
+
+    def payload_indexes(self) -> dict:
+        return {}
+
+    def bucket_filter(self, bucket_uuid: str, *conditions) -> models.Filter:
+        return models.Filter(must=[*self.conditions(bucket_uuid), *conditions])
+
+
+class SharedCollections(CollectionPerBucket):
+    """Бакеты в нескольких общих коллекциях, разделённых по полю bucket_uuid с tenant-индексом.
+
+    Бакет попадает в коллекцию по хэшу UUID, поэтому число коллекций после
+    запуска менять нельзя: бакеты окажутся не там, где лежат их точки.
+    """
+
+    shared = True
+
+    def __init__(self, collections: int = 1, prefix: str = SHARED_COLLECTION_PREFIX):
+        if collections < 1:
+            raise ValueError(f"Число общих коллекций должно быть положительным: {collections}")
+        self.collections = collections
+        self.prefix = prefix
+
+    def collection(self, bucket_uuid: str) -> str:
+        return f"{self.prefix}_{zlib.crc32(bucket_uuid.encode('utf-8')) % self.collections}"
+
+    def conditions(self, bucket_uuid: str) -> list[models.FieldCondition]:
+        return [models.FieldCondition(key=TENANT_FIELD, match=models.MatchValue(value=bucket_uuid))]
+
+    def namespace(self, bucket_uuid: str) -> str:
+        # Одинаковые external_ticket_id в разных бакетах одной коллекции не должны делить точки.
+        return f"{bucket_uuid}/"
+
+    def payload(self, bucket_uuid: str) -> dict:
+        return {TENANT_FIELD: bucket_uuid}
+
+    def collection_params(self, profile: StorageProfile, vectors_config: dict[str, models.VectorParams]) -> dict:
+        # Профиль бакета к общей коллекции не применяется: её настройки общие для всех бакетов.
+        return {**collection_params(StorageProfile(), vectors_config), "hnsw_config": SHARED_HNSW_CONFIG}
+
+    def payload_indexes(self) -> dict:
+        # is_tenant: Qdrant хранит точки одного бакета рядом, и поиск внутри бакета читает меньше сегментов.
+        return {TENANT_FIELD: models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True)}
+
+
+BUCKET_LAYOUTS = {
+    "collection": CollectionPerBucket,
+    "shared": SharedCollections,
+}
+
+
+def make_bucket_layout(name: str, shared_collections: int = 1) -> CollectionPerBucket:
+    if name not in BUCKET_LAYOUTS:
+        raise ValueError(f"Неизвестная раскладка бакетов: {name}. Доступны: {', '.join(BUCKET_LAYOUTS)}")
+    return SharedCollections(shared_collections) if name == "shared" else CollectionPerBucket()
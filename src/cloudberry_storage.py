@@ -1,40 +1,122 @@
+import asyncio
+import functools
 import logging
+import os
+import signal
+import threading
+import time
 import uuid
 from concurrent import futures
-from io import BytesIO
+from typing import Iterator
 
 import grpc
-import pytesseract
-from PIL import Image
-from deep_translator import GoogleTranslator
+import numpy as np
 from google.protobuf.internal.containers import RepeatedCompositeFieldContainer
 from grpc import ServicerContext
-from torchvision import transforms
 from qdrant_client import models, QdrantClient
-from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import Distance, VectorParams
 
-from embedders.sbert_embedder import SBERTEmbedder
+from bucket_layout import CollectionPerBucket, make_bucket_layout
+from embedders.batching_embedder import BatchingTextEmbedder
+from embedders.embedding_cache import EmbeddingCache, CachedTextEmbedder, CachedOnePeaceClient
+from embedders.interfaces import TextEmbedder
+from embedders.sbert_embedder import SBERTEmbedder, SBERT_MODEL_NAME
+from find_cache import FindResultCache, TtlLruCache, content_digest
+from health import add_health_servicer, mark_serving, wait_until_ready, warm_up
+from ingest_queue import IngestQueue, IngestWorkerPool, QueueFullError, PENDING, PROCESSING, DONE, FAILED
+from metrics import STAGE_SECONDS, MetricsInterceptor, start_metrics_server
 from model_registry import ModelRegistry
+from ocr import OcrPipeline
+from storage_profiles import search_params
+from ticket_updates import TicketUpdate, SCROLL_PAGE_SIZE, point_id, stored_hashes_filter, group_stored_hashes, \
+    write_operations, remove_operations
+from translation import QueryTranslator, make_translator_backend, normalize_query
+from worker_pool import EmbeddingWorkerPool, PooledTextEmbedder
 import cloudberry_storage_pb2 as pb2
 import cloudberry_storage_pb2_grpc as pb2_grpc
 from cloudberry_storage_pb2 import InitBucketRequest, DestroyBucketRequest, Empty, FindRequest, \
-    RemoveEntryRequest, PutEntryRequest, ImageEntry, FindResponse, FindResponseEntry
-
-from sentence_transformers import SentenceTransformer
-from torchvision import transforms
-
+    RemoveEntryRequest, PutEntryRequest, ImageEntry, FindResponse, FindResponseEntry, BatchPutEntriesResponse, \
+    GetEntryStatusRequest, GetEntryStatusResponse, StorageProfile, RemoveEntriesRequest, RemoveEntriesResponse
 from embedders.one_peace_client import OnePeaceClient
+from embedders.resilience import OnePeaceError, RetryPolicy
 
 # Constants
+SERVER_PORT = 8002
+# Экземпляры ONE-PEACE через запятую: запросы распределяются между ними по кругу.
+ONE_PEACE_ENDPOINTS = os.environ.get("CLOUDBERRY_ONE_PEACE_ENDPOINTS", "localhost:60061").split(",")
+ONE_PEACE_TIMEOUT = float(os.environ.get("CLOUDBERRY_ONE_PEACE_TIMEOUT", "10"))  # секунд на одну попытку
+# Через сколько секунд без ответа продублировать запрос на другой экземпляр; 0 — не дублировать.
+ONE_PEACE_HEDGE_AFTER = float(os.environ.get("CLOUDBERRY_ONE_PEACE_HEDGE_AFTER", "0"))
+QDRANT_URL = "http://localhost:6333"
+# Точки в Qdrant по gRPC (порт 6334) вместо JSON по HTTP: сериализация векторов заметно дешевле.
+QDRANT_PREFER_GRPC = os.environ.get("CLOUDBERRY_QDRANT_PREFER_GRPC", "0") == "1"
+# Режим сервера: "sync" (grpc.server на пуле потоков) или "async" (grpc.aio с асинхронными клиентами).
+SERVER_MODE = os.environ.get("CLOUDBERRY_SERVER_MODE", "sync")
+# Порт HTTP-эндпоинта /metrics в формате Prometheus; 0 отключает его.
+METRICS_PORT = int(os.environ.get("CLOUDBERRY_METRICS_PORT", "9108"))
 ONE_PEACE_VECTOR_SIZE = 1536
+ONE_PEACE_MODEL_ID = "one-peace"
 SBERT_VECTOR_SIZE = 384
+PUT_BATCH_SIZE = 64  # тикетов на один батч эмбеддинга в BatchPutEntries
+UPSERT_BATCH_SIZE = 512  # точек на один upsert в Qdrant
+DEFAULT_TOP_K = 10  # если клиент не передал top_k
+OCR_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # процессов tesseract
+OCR_TIMEOUT = 10.0  # секунд на одно вложение
+SHUTDOWN_GRACE = 5.0  # секунд на завершение начатых запросов при остановке
+FIND_FANOUT_WORKERS = 16  # потоков для параллельного кодирования запросов в Find
+# Векторов в памяти на модель: у SBERT вектор занимает 1,5 КБ, у ONE-PEACE — 6 КБ.
+SBERT_CACHE_SIZE = int(os.environ.get("CLOUDBERRY_SBERT_CACHE_SIZE", "100000"))
+ONE_PEACE_CACHE_SIZE = int(os.environ.get("CLOUDBERRY_ONE_PEACE_CACHE_SIZE", "20000"))
+# Каталог для дискового уровня кэша эмбеддингов; если не задан, кэш живёт только в памяти.
+EMBEDDING_CACHE_DIR = os.environ.get("CLOUDBERRY_EMBEDDING_CACHE_DIR")
+# Файл SQLite-очереди для режима "принять и поставить в очередь"; если не задан, PutEntry работает синхронно.
+INGEST_QUEUE_PATH = os.environ.get("CLOUDBERRY_INGEST_QUEUE")
+INGEST_QUEUE_MAX_DEPTH = 10_000  # тикетов в очереди, после которых PutEntry отвечает RESOURCE_EXHAUSTED
+INGEST_WORKERS = 2
+# Перевод запроса для ONE-PEACE: "none" (по умолчанию, работает офлайн) или "google".
+TRANSLATOR_BACKEND = os.environ.get("CLOUDBERRY_TRANSLATOR", "none")
+# Инференс SBERT на CPU: "torch" (fp32, эталон), "torch-int8" (динамическая квантизация) или "onnx" (ONNX Runtime).
+SBERT_BACKEND = os.environ.get("CLOUDBERRY_SBERT_BACKEND", "torch")
+# Потоков на один forward-проход SBERT; 0 — по числу ядер. При нескольких процессах на узле делим ядра между ними.
+SBERT_THREADS = int(os.environ.get("CLOUDBERRY_SBERT_THREADS", "0"))
+# Процессов для SBERT и подготовки картинок; 0 — всё в процессе сервера. На N ядрах обычно N воркеров по 1 потоку.
+EMBEDDING_WORKERS = int(os.environ.get("CLOUDBERRY_EMBEDDING_WORKERS", "0"))
+# Кэш ответов Find: записей на процесс (0 отключает) и время жизни в секундах. Запись в бакет сбрасывает его
+# кэш только в этом процессе, поэтому при нескольких репликах TTL ограничивает, насколько устаревшим может быть ответ.
+FIND_CACHE_SIZE = int(os.environ.get("CLOUDBERRY_FIND_CACHE_SIZE", "10000"))
+FIND_CACHE_TTL = float(os.environ.get("CLOUDBERRY_FIND_CACHE_TTL", "30"))
+QUERY_CACHE_SIZE = 10_000  # векторов запросов Find по исходному тексту и байтам картинок
+# Раскладка бакетов в Qdrant: "collection" — коллекция на бакет, "shared" — несколько общих коллекций
+# с фильтром по bucket_uuid. Существующие бакеты переносятся в общие коллекции скриптом migrate_buckets.py.
+BUCKET_LAYOUT = os.environ.get("CLOUDBERRY_BUCKET_LAYOUT", "collection")
+SHARED_COLLECTIONS = int(os.environ.get("CLOUDBERRY_SHARED_COLLECTIONS", "1"))  # менять после запуска нельзя
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("CloudberryStorage")
 
 
+VECTORS_CONFIG = {
+    "one_peace_embedding": VectorParams(size=ONE_PEACE_VECTOR_SIZE, distance=Distance.COSINE),
+    "ocr_text_sbert_embedding": VectorParams(size=SBERT_VECTOR_SIZE, distance=Distance.COSINE),
+    "description_sbert_embedding": VectorParams(size=SBERT_VECTOR_SIZE, distance=Distance.COSINE),
+    "title_sbert_embedding": VectorParams(size=SBERT_VECTOR_SIZE, distance=Distance.COSINE),
+}
+
+# Индексы по полям, которыми фильтруют RemoveEntry и GetEntryStatus; без них удаление сканирует всю коллекцию.
+PAYLOAD_INDEXES = {
+    "ticket_id": models.PayloadSchemaType.KEYWORD,
+    "type": models.PayloadSchemaType.KEYWORD,
+}
+
+QUEUE_STATES = {
+    PENDING: pb2.ENTRY_QUEUED,
+    PROCESSING: pb2.ENTRY_PROCESSING,
+    DONE: pb2.ENTRY_SEARCHABLE,
+    FAILED: pb2.ENTRY_FAILED,
+}
+
+
 def is_valid_uuid(value):
     try:
         uuid.UUID(value)
@@ -44,30 +126,49 @@ def is_valid_uuid(value):
 
 
 class CloudberryStorage(pb2_grpc.CloudberryStorageServicer):
-    def __init__(self, registry: ModelRegistry):
+    def __init__(self, registry: ModelRegistry, ingest_queue: IngestQueue | None = None,
+                 find_cache: FindResultCache | None = None, query_cache: TtlLruCache | None = None,
+                 layout: CollectionPerBucket | None = None, find_workers: int = FIND_FANOUT_WORKERS):
         self.models_registry: ModelRegistry = registry
-
-    def create_collection_if_not_exists(self, collection_name: str) -> None:
-        try:
-            self.models_registry.qdrant_client.get_collection(collection_name)
+        # Как бакет отображается на коллекцию Qdrant, id точек и фильтры запросов.
+        self.layout: CollectionPerBucket = layout or CollectionPerBucket()
+        # Если очередь задана, PutEntry только сохраняет запрос, а обработкой занимается IngestWorkerPool.
+        self.ingest_queue = ingest_queue
+        # Коллекции, для которых коллекция и индексы уже созданы этим процессом; сбрасывается в DestroyBucket.
+        self._known_buckets: set[str] = set()
+        # Отдельный пул для параллельного кодирования запроса в Find, чтобы не занимать потоки gRPC-сервера;
+        # asyncio-серверу он не нужен (find_workers=0).
+        self._find_pool = (futures.ThreadPoolExecutor(max_workers=find_workers, thread_name_prefix="find")
+                           if find_workers else None)
+        # Готовые ответы Find; сбрасываются по бакету при любой записи в него.
+        self.find_cache = find_cache
+        # Векторы запросов отдельно от кэша эмбеддингов: их не вытесняет индексация, и при попадании
+        # не нужны ни перевод, ни декодирование картинок.
+        self.query_cache = query_cache
+
+    def create_collection_if_not_exists(self, collection_name: str,
+                                     profile: StorageProfile | None = None) -> None:
+        if collection_name in self._known_buckets:
+            return
+        qdrant_client = self.models_registry.qdrant_client
+        if qdrant_client.collection_exists(collection_name):
             logger.info(f"Коллекция {collection_name} уже существует.")
-        except:
-            self.models_registry.qdrant_client.create_collection(
+        else:
+            qdrant_client.create_collection(
                 collection_name=collection_name,
-                vectors_config={
-                    "one_peace_embedding": VectorParams(size=ONE_PEACE_VECTOR_SIZE, distance=Distance.COSINE),
-                    "ocr_text_sbert_embedding": VectorParams(size=SBERT_VECTOR_SIZE, distance=Distance.COSINE),
-                    "description_sbert_embedding": VectorParams(size=SBERT_VECTOR_SIZE, distance=Distance.COSINE),
-                    "title_sbert_embedding": VectorParams(size=SBERT_VECTOR_SIZE, distance=Distance.COSINE),
-                }
+                **self.layout.collection_params(profile or StorageProfile(), VECTORS_CONFIG)
             )
-            logger.info(f"Создана новая коллекция {collection_name} с несколькими векторами.")
+            logger.info(f"Создана новая коллекция {collection_name} с несколькими векторами, профиль: {profile}.")
+        # Создание индекса идемпотентно, так что бакеты, созданные до появления индексов, тоже их получат.
+        for field_name, field_schema in {**PAYLOAD_INDEXES, **self.layout.payload_indexes()}.items():
+            qdrant_client.create_payload_index(collection_name, field_name=field_name, field_schema=field_schema)
+        self._known_buckets.add(collection_name)
 
     def InitBucket(self, request: InitBucketRequest, context: ServicerContext) -> Empty:
         logger.info(f"Пришёл запрос на инициализацию bucket с UUID: {request.bucket_uuid}.")
         bucket_uuid: str = request.bucket_uuid
         try:
-            self.create_collection_if_not_exists(bucket_uuid)
+            self.create_collection_if_not_exists(self.layout.collection(bucket_uuid), request.storage_profile)
             logger.info(f"Коллекция успешно проинициализирована.")
         except Exception as e:
             logger.error(f"Ошибка при регистрации bucket'а {bucket_uuid}: {e}", exc_info=True)
@@ -79,215 +180,780 @@ class CloudberryStorage(pb2_grpc.CloudberryStorageServicer):
     def DestroyBucket(self, request: DestroyBucketRequest, context: ServicerContext) -> Empty:
         logger.info(f"Запрос на уничтожение коллекции с bucket_uuid: {request.bucket_uuid}.")
         bucket_uuid: str = request.bucket_uuid
-        try:
-            self.models_registry.qdrant_client.get_collection(bucket_uuid)
-            logger.info(f"Коллекция успешно найдена.")
-        except UnexpectedResponse:
+        if self.layout.shared:
+            return self._destroy_shared_bucket(bucket_uuid, context)
+        self._known_buckets.discard(bucket_uuid)
+        if not self.models_registry.qdrant_client.collection_exists(bucket_uuid):
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details(f"Bucket collection {bucket_uuid} not found.")
             logger.error(f"Коллекция не найдена.")
             return pb2.Empty()
+        logger.info(f"Коллекция успешно найдена.")
 
         try:
             self.models_registry.qdrant_client.delete_collection(bucket_uuid)
-            print(f"Deleted collection for bucket: {bucket_uuid}")
             logger.info(f"Коллекция успешно удалена.")
         except Exception as e:
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Error deleting Qdrant collection: {e}")
             logger.error(f"Коллекция не уничтожена из-за ошибки: {e}.")
             return pb2.Empty()
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
         return pb2.Empty()
 
-    def PutEntry(self, request: PutEntryRequest, context: ServicerContext) -> Empty:
-        bucket_uuid: str = request.bucket_uuid
-        external_id: str = request.external_ticket_id
-        title: str = request.ticket.title.content
-        description: str = request.ticket.description.content
-        attachments: RepeatedCompositeFieldContainer[ImageEntry] = request.ticket.attachments
-        logger.info(f"Получен тикет {external_id}")
-
+    def _destroy_shared_bucket(self, bucket_uuid: str, context: ServicerContext) -> Empty:
+        # Общая коллекция остаётся, удаляются только точки бакета. Неизвестный бакет — не ошибка:
+        # без отдельной коллекции пустой и несуществующий бакет не различить.
         try:
-            points = []
-            payload_base = {
-                "ticket_id": external_id,
-                "title": title,
-                "description": description,
-            }
-
-            title_vec = self.models_registry.text_embedder.encode_text(title).tolist()
-            # title_vec = np.ones(SBERT_VECTOR_SIZE).tolist()
-            # desc_vec = models_registry.sbert.encode(description).tolist()
-            # desc_vec = np.ones(SBERT_VECTOR_SIZE).tolist()
-            desc_vec = self.models_registry.text_embedder.encode_text(description).tolist()
-
-            # --- Точка: title ---
+            self.models_registry.qdrant_client.delete(
+                collection_name=self.layout.collection(bucket_uuid),
+                points_selector=models.FilterSelector(filter=self.layout.bucket_filter(bucket_uuid))
+            )
+            logger.info(f"Точки бакета {bucket_uuid} удалены из {self.layout.collection(bucket_uuid)}.")
+        except Exception as e:
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Error deleting bucket points: {e}")
+            logger.error(f"Бакет {bucket_uuid} не уничтожен из-за ошибки: {e}.")
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
+        return pb2.Empty()
+
+    def _invalidate_find_cache(self, bucket_uuid: str) -> None:
+        # Вызывается после записи, в том числе неудачной: часть точек могла успеть измениться.
+        if self.find_cache is not None:
+            self.find_cache.invalidate(bucket_uuid)
+
+    def _embed_tickets(self, requests: list[PutEntryRequest]) \
+            -> tuple[dict[int, tuple[list[models.PointStruct], list[str]]], dict[int, Exception]]:
+        errors: dict[int, Exception] = {}
+        # Пересчитываем только то, чьё содержимое изменилось с прошлой записи тикета.
+        with STAGE_SECONDS.time(operation="put", stage="qdrant_read"):
+            updates = self._plan_updates(requests, errors)
+        with STAGE_SECONDS.time(operation="put", stage="image_decode"):
+            decoded, contents = self._prepare_attachments(requests, updates, errors)
+        # OCR идёт на пуле процессов параллельно с вызовом ONE-PEACE.
+        ocr_batch = self._submit_ocr(contents)
+
+        # --- Изображения всех тикетов: один пакетный вызов ONE-PEACE ---
+        all_images = [image for _, images in decoded for image in images]
+        with STAGE_SECONDS.time(operation="put", stage="one_peace"):
+            try:
+                all_image_vecs = self.models_registry.one_peace_client.encode_images(all_images) if all_images else []
+            except OnePeaceError as e:
+                all_image_vecs = self._failed_images(decoded, len(all_images), e, errors)
+        # Время ожидания OCR сверх вызова ONE-PEACE: именно оно добавляется к задержке PutEntry.
+        with STAGE_SECONDS.time(operation="put", stage="ocr"):
+            ocr_texts = self._collect_ocr(ocr_batch, len(contents))
+        texts, pending = self._collect_texts(requests, updates, decoded, all_image_vecs, ocr_texts, errors)
+
+        # --- Тексты всех тикетов, включая OCR: один батч SBERT ---
+        with STAGE_SECONDS.time(operation="put", stage="sbert"):
+            text_vecs = self.models_registry.text_embedder.encode_texts(texts) if texts else []
+        return self._assemble_points(requests, updates, pending, text_vecs), errors
+
+    @staticmethod
+    def _failed_images(decoded: list, count: int, error: OnePeaceError, errors: dict[int, Exception]) -> list:
+        # ONE-PEACE недоступен: тикеты с новыми картинками получают его ошибку, остальные записываются как обычно.
+        logger.error(f"Эмбеддинги {count} изображений не получены: {error}")
+        for ticket_idx, images in decoded:
+            if images:
+                errors[ticket_idx] = error
+        return [np.empty(0, dtype=np.float32)] * count
+
+    @staticmethod
+    def _error_code(error: Exception) -> grpc.StatusCode:
+        # Недоступность и таймаут ONE-PEACE отдаём своими кодами: клиент может повторить запрос позже.
+        return error.status_code if isinstance(error, OnePeaceError) else grpc.StatusCode.INTERNAL
+
+    @staticmethod
+    def _tickets_by_bucket(ticket_indices, requests: list[PutEntryRequest]) -> dict[str, list[int]]:
+        by_bucket: dict[str, list[int]] = {}
+        for ticket_idx in ticket_indices:
+            by_bucket.setdefault(requests[ticket_idx].bucket_uuid, []).append(ticket_idx)
+        return by_bucket
+
+    def _scroll_stored_hashes(self, bucket_uuid: str, ticket_ids: list[str]) -> dict[str, dict[str, str | None]]:
+        records = []
+        offset = None
+        while True:
+            page, offset = self.models_registry.qdrant_client.scroll(
+                collection_name=self.layout.collection(bucket_uuid),
+                scroll_filter=stored_hashes_filter(ticket_ids, self.layout.conditions(bucket_uuid)),
+                limit=SCROLL_PAGE_SIZE, offset=offset, with_payload=["ticket_id", "content_hash"], with_vectors=False
+            )
+            records.extend(page)
+            if offset is None:
+                return group_stored_hashes(records)
+
+    def _plan_updates(self, requests: list[PutEntryRequest], errors: dict[int, Exception]) -> dict[int, TicketUpdate]:
+        updates: dict[int, TicketUpdate] = {}
+        for bucket_uuid, ticket_indices in self._tickets_by_bucket(range(len(requests)), requests).items():
+            try:
+                stored = self._scroll_stored_hashes(bucket_uuid,
+                                                    [requests[i].external_ticket_id for i in ticket_indices])
+            except Exception as e:
+                logger.error(f"Ошибка при чтении сохранённых точек из {bucket_uuid}: {e}", exc_info=True)
+                for ticket_idx in ticket_indices:
+                    errors[ticket_idx] = e
+                continue
+            for ticket_idx in ticket_indices:
+                request = requests[ticket_idx]
+                updates[ticket_idx] = TicketUpdate(request, stored.get(request.external_ticket_id, {}),
+                                                   self.layout.namespace(bucket_uuid),
+                                                   self.models_registry.text_pipeline,
+                                                   self.models_registry.image_pipeline)
+        return updates
+
+    def _prepare_attachments(self, requests: list[PutEntryRequest], updates: dict[int, TicketUpdate],
+                             errors: dict[int, Exception]) -> tuple[list, list[bytes]]:
+        # --- Подготовка изображений: все изменившиеся вложения одной пачкой, ошибки — по тикетам ---
+        attachments_by_ticket = {
+            ticket_idx: [requests[ticket_idx].ticket.attachments[idx] for idx in update.images]
+            for ticket_idx, update in updates.items()
+        }
+        prepared = iter(self.models_registry.image_preprocessor(
+            [img.content for attachments in attachments_by_ticket.values() for img in attachments]
+        ))
+        decoded = []
+        contents: list[bytes] = []
+        for ticket_idx, attachments in attachments_by_ticket.items():
+            images = [next(prepared) for _ in attachments]
+            failed = [image for image in images if isinstance(image, Exception)]
+            if failed:
+                logger.error(f"Ошибка при обработке вложений тикета {requests[ticket_idx].external_ticket_id}: "
+                             f"{failed[0]}")
+                errors[ticket_idx] = failed[0]
+                continue
+            decoded.append((ticket_idx, images))
+            contents.extend(img.content for img in attachments)
+        return decoded, contents
+
+    def _prepare_query_images(self, images: list[ImageEntry]) -> list[bytes]:
+        prepared = self.models_registry.image_preprocessor([img.content for img in images])
+        for image in prepared:
+            if isinstance(image, Exception):
+                raise image
+        return prepared
+
+    def _submit_ocr(self, contents: list[bytes]) -> list[futures.Future] | None:
+        if self.models_registry.ocr_pipeline is None or not contents:
+            return None
+        return self.models_registry.ocr_pipeline.submit_many(contents)
+
+    def _collect_ocr(self, ocr_batch: list[futures.Future] | None, count: int) -> list[str | None]:
+        if ocr_batch is None:
+            return [""] * count
+        return self.models_registry.ocr_pipeline.collect(ocr_batch)
+
+    @staticmethod
+    def _collect_texts(requests: list[PutEntryRequest], updates: dict[int, TicketUpdate], decoded: list,
+                       all_image_vecs: list, all_ocr_texts: list[str | None],
+                       errors: dict[int, Exception]) -> tuple[list[str], list]:
+        texts: list[str] = []
+        pending = []
+        image_offset = 0
+        for ticket_idx, images in decoded:
+            request = requests[ticket_idx]
+            update = updates[ticket_idx]
+            image_vecs = all_image_vecs[image_offset:image_offset + len(images)]
+            ocr_texts = all_ocr_texts[image_offset:image_offset + len(images)]
+            image_offset += len(images)
+            if any(len(image_vec) == 0 for image_vec in image_vecs):
+                errors.setdefault(ticket_idx, RuntimeError("ONE-PEACE не вернул эмбеддинг изображения"))
+                continue
+            pending.append((ticket_idx, len(texts), image_vecs, ocr_texts))
+            if update.title:
+                texts.append(request.ticket.title.content)
+            if update.description:
+                texts.append(request.ticket.description.content)
+            # Пустой или неудавшийся (None) OCR не кодируем: у точки не будет вектора ocr_text_sbert_embedding.
+            texts.extend(ocr_text for ocr_text in ocr_texts if ocr_text)
+        return texts, pending
+
+    def _assemble_points(self, requests: list[PutEntryRequest], updates: dict[int, TicketUpdate], pending: list,
+                         text_vecs) -> dict[int, tuple[list[models.PointStruct], list[str]]]:
+        writes_by_ticket: dict[int, tuple[list[models.PointStruct], list[str]]] = {}
+        for ticket_idx, offset, image_vecs, ocr_texts in pending:
+            request = requests[ticket_idx]
+            update = updates[ticket_idx]
+            next_vec = offset
+            title_vec = desc_vec = None
+            if update.title:
+                title_vec = text_vecs[next_vec]
+                next_vec += 1
+            if update.description:
+                desc_vec = text_vecs[next_vec]
+                next_vec += 1
+            images = []
+            for idx, image_vec, ocr_text in zip(update.images, image_vecs, ocr_texts):
+                ocr_vec = None
+                if ocr_text:
+                    ocr_vec = text_vecs[next_vec]
+                    next_vec += 1
+                images.append((idx, image_vec, ocr_text, ocr_vec))
+            points = self._ticket_points(request, update.hashes, title_vec, desc_vec, images)
+            writes_by_ticket[ticket_idx] = (points, update.orphans)
+        return writes_by_ticket
+
+    def _ticket_points(self, request: PutEntryRequest, hashes: dict[str, str], title_vec, desc_vec, images: list) \
+            -> list[models.PointStruct]:
+        external_id: str = request.external_ticket_id
+        namespace: str = self.layout.namespace(request.bucket_uuid)
+        points = []
+        # Текст хранится один раз на тикет: заголовок в точке title, описание в точке description.
+        # Картинки несут только ticket_id и собственный OCR, а не копию описания на каждое вложение.
+        payload_base = {"ticket_id": external_id, **self.layout.payload(request.bucket_uuid)}
+        # Векторы до этого места — numpy; в список переводим только здесь, на входе в клиент Qdrant:
+        # ndarray в PointStruct pydantic разбирает поэлементно, это в десятки раз медленнее tolist().
+
+        # --- Точка: title ---
+        if title_vec is not None:
+            title_id = point_id(external_id, "title", namespace)
             points.append(models.PointStruct(
-                id=str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{external_id}_title")),
-                vector={"title_sbert_embedding": title_vec},
-                payload={**payload_base, "type": "title"}
+                id=title_id,
+                vector={"title_sbert_embedding": title_vec.tolist()},
+                payload={**payload_base, "type": "title", "title": request.ticket.title.content,
+                         "content_hash": hashes[title_id]}
             ))
-            logger.info(f"Точка с ID {external_id}_title добавлена в коллекцию {bucket_uuid}.")
+            logger.debug("Точка с ID %s_title добавлена в коллекцию %s.", external_id, request.bucket_uuid)
 
-            # --- Точка: description ---
+        # --- Точка: description ---
+        if desc_vec is not None:
+            desc_id = point_id(external_id, "desc", namespace)
             points.append(models.PointStruct(
-                id=str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{external_id}_desc")),
-                vector={"description_sbert_embedding": desc_vec},
-                payload={**payload_base, "type": "description"}
+                id=desc_id,
+                vector={"description_sbert_embedding": desc_vec.tolist()},
+                payload={**payload_base, "type": "description", "description": request.ticket.description.content,
+                         "content_hash": hashes[desc_id]}
             ))
-            logger.info(f"Точка с ID {external_id}_desc добавлена в коллекцию {bucket_uuid}.")
-
-            # --- Точки: изображения ---
-            for idx, img in enumerate(attachments):
-                image: Image = Image.open(BytesIO(img.content)).convert("RGB")
-                image_vec = self.models_registry.one_peace_client.encode_image(image, img.content_type)
-                # image_vec = np.ones(ONE_PEACE_VECTOR_SIZE).tolist()
-
-                # ocr_text = pytesseract.image_to_string(image, lang='eng+rus').strip()
-                ocr_text = "HELLO! Это распознанный текст"
-                ocr_vec = self.models_registry.text_embedder.encode_text(ocr_text).tolist()
-                # ocr_vec = (
-                #     # models_registry.sbert.encode(ocr_text).tolist()
-                #     np.ones(SBERT_VECTOR_SIZE).tolist()
-                #     if ocr_text else np.zeros(SBERT_VECTOR_SIZE).tolist()
-                # )
-
-                point = models.PointStruct(
-                    id=str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{external_id}_img_{idx}")),
-                    vector={
-                        "one_peace_embedding": image_vec,
-                        "ocr_text_sbert_embedding": ocr_vec
-                    },
-                    payload={
-                        **payload_base,
-                        "ocr_text": ocr_text,
-                        "img_idx": idx,
-                        "type": "image"
-                    }
-                )
-                points.append(point)
-                logger.info(f"Точка с ID {external_id}_img_{idx} добавлена в коллекцию {bucket_uuid}.")
+            logger.debug("Точка с ID %s_desc добавлена в коллекцию %s.", external_id, request.bucket_uuid)
+
+        # --- Точки: изображения ---
+        for idx, image_vec, ocr_text, ocr_vec in images:
+            image_id = point_id(external_id, f"img_{idx}", namespace)
+            vector = {"one_peace_embedding": image_vec.tolist()}
+            if ocr_vec is not None:
+                vector["ocr_text_sbert_embedding"] = ocr_vec.tolist()
+            payload = {**payload_base, "img_idx": idx, "type": "image"}
+            # Без хэша картинка с неудавшимся OCR считается изменившейся и распознаётся при следующей записи.
+            if ocr_text is not None:
+                payload["content_hash"] = hashes[image_id]
+            if ocr_text:
+                payload["ocr_text"] = ocr_text
+            points.append(models.PointStruct(
+                id=image_id,
+                vector=vector,
+                payload=payload
+            ))
+            logger.debug("Точка с ID %s_img_%d добавлена в коллекцию %s.", external_id, idx, request.bucket_uuid)
+        return points
 
-            # --- Вставка в Qdrant ---
-            self.models_registry.qdrant_client.upsert(collection_name=bucket_uuid, points=points)
-            logger.info(f"Тикет {external_id} добавлен в {bucket_uuid}: {len(points)} точек.")
+    def PutEntry(self, request: PutEntryRequest, context: ServicerContext) -> Empty:
+        bucket_uuid: str = request.bucket_uuid
+        external_id: str = request.external_ticket_id
+        logger.debug("Получен тикет %s", external_id)
+
+        if self.ingest_queue is not None:
+            return self._enqueue(request, context)
+
+        try:
+            writes_by_ticket, errors = self._embed_tickets([request])
+            if errors:
+                raise errors[0]
+            points, orphans = writes_by_ticket[0]
+
+            # --- Вставка изменившихся точек и удаление лишних в Qdrant ---
+            operations = write_operations(points, orphans)
+            if operations:
+                with STAGE_SECONDS.time(operation="put", stage="qdrant_write"):
+                    self.models_registry.qdrant_client.batch_update_points(
+                        collection_name=self.layout.collection(bucket_uuid), update_operations=operations
+                    )
+            logger.info(f"Тикет {external_id} записан в {bucket_uuid}: обновлено точек {len(points)}, "
+                        f"удалено {len(orphans)}.")
 
         except Exception as e:
             logger.error(f"Ошибка при добавлении тикета {external_id}: {e}", exc_info=True)
-            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_code(self._error_code(e))
             context.set_details(f"Ошибка добавления тикета: {e}")
             return pb2.Empty()
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
 
         return pb2.Empty()
 
+    @classmethod
+    def _write_chunks(cls, requests: list[PutEntryRequest],
+                      writes_by_ticket: dict[int, tuple[list[models.PointStruct], list[str]]]):
+        # --- Группировка по коллекциям и запись крупными порциями ---
+        for bucket_uuid, ticket_indices in cls._tickets_by_bucket(writes_by_ticket, requests).items():
+            chunk_tickets: list[int] = []
+            chunk_points: list[models.PointStruct] = []
+            chunk_orphans: list[str] = []
+            for n, ticket_idx in enumerate(ticket_indices):
+                points, orphans = writes_by_ticket[ticket_idx]
+                chunk_tickets.append(ticket_idx)
+                chunk_points.extend(points)
+                chunk_orphans.extend(orphans)
+                if len(chunk_points) + len(chunk_orphans) < UPSERT_BATCH_SIZE and n + 1 < len(ticket_indices):
+                    continue
+                yield bucket_uuid, chunk_tickets, chunk_points, chunk_orphans
+                chunk_tickets = []
+                chunk_points = []
+                chunk_orphans = []
+
+    @staticmethod
+    def _put_statuses(requests: list[PutEntryRequest], errors: dict[int, Exception]) -> list[pb2.PutEntryStatus]:
+        statuses = []
+        for ticket_idx, request in enumerate(requests):
+            error = errors.get(ticket_idx)
+            statuses.append(pb2.PutEntryStatus(
+                external_ticket_id=request.external_ticket_id,
+                bucket_uuid=request.bucket_uuid,
+                ok=error is None,
+                error=str(error) if error is not None else "",
+            ))
+        return statuses
+
+    def _enqueue(self, request: PutEntryRequest, context: ServicerContext) -> Empty:
+        try:
+            self.ingest_queue.enqueue(request)
+        except QueueFullError as e:
+            # Клиент должен повторить позже: так очередь не растёт бесконечно во время всплесков.
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details(str(e))
+        except Exception as e:
+            logger.error(f"Ошибка при постановке тикета {request.external_ticket_id} в очередь: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка постановки тикета в очередь: {e}")
+        return pb2.Empty()
+
+    @staticmethod
+    def _last_copies(requests: list[PutEntryRequest]) -> list[int]:
+        # Копии одного тикета в пачке сравнивались бы с одними и теми же сохранёнными хэшами и писали бы
+        # в одни точки вперемешку, поэтому записывается только последняя копия.
+        last: dict[tuple[str, str], int] = {}
+        for ticket_idx, request in enumerate(requests):
+            last[(request.bucket_uuid, request.external_ticket_id)] = ticket_idx
+        return [last[(request.bucket_uuid, request.external_ticket_id)] for request in requests]
+
+    @staticmethod
+    def _copy_statuses(last: list[int], statuses: dict[int, pb2.PutEntryStatus]) -> list[pb2.PutEntryStatus]:
+        copied = []
+        for ticket_idx, last_idx in enumerate(last):
+            status = pb2.PutEntryStatus()
+            status.CopyFrom(statuses[last_idx])
+            status.superseded = ticket_idx != last_idx
+            copied.append(status)
+        return copied
+
+    def _put_batch(self, requests: list[PutEntryRequest]) -> list[pb2.PutEntryStatus]:
+        last = self._last_copies(requests)
+        kept = sorted(set(last))
+        statuses = self._put_latest([requests[ticket_idx] for ticket_idx in kept])
+        return self._copy_statuses(last, dict(zip(kept, statuses)))
+
+    def _put_latest(self, requests: list[PutEntryRequest]) -> list[pb2.PutEntryStatus]:
+        errors: dict[int, Exception] = {}
+        try:
+            writes_by_ticket, errors = self._embed_tickets(requests)
+        except Exception as e:
+            logger.error(f"Ошибка при построении эмбеддингов пачки из {len(requests)} тикетов: {e}", exc_info=True)
+            writes_by_ticket = {}
+            errors = {ticket_idx: e for ticket_idx in range(len(requests))}
+
+        for bucket_uuid, chunk_tickets, chunk_points, chunk_orphans in self._write_chunks(requests, writes_by_ticket):
+            operations = write_operations(chunk_points, chunk_orphans)
+            if not operations:
+                continue
+            try:
+                with STAGE_SECONDS.time(operation="put", stage="qdrant_write"):
+                    self.models_registry.qdrant_client.batch_update_points(
+                        collection_name=self.layout.collection(bucket_uuid), update_operations=operations
+                    )
+                logger.info(f"В {bucket_uuid} записано {len(chunk_tickets)} тикетов: обновлено точек "
+                            f"{len(chunk_points)}, удалено {len(chunk_orphans)}.")
+            except Exception as e:
+                logger.error(f"Ошибка при вставке пачки точек в {bucket_uuid}: {e}", exc_info=True)
+                for failed_idx in chunk_tickets:
+                    errors[failed_idx] = e
+            finally:
+                self._invalidate_find_cache(bucket_uuid)
+        return self._put_statuses(requests, errors)
+
+    def BatchPutEntries(self, request_iterator: Iterator[PutEntryRequest],
+                        context: ServicerContext) -> BatchPutEntriesResponse:
+        response = BatchPutEntriesResponse()
+        batch: list[PutEntryRequest] = []
+        try:
+            for request in request_iterator:
+                batch.append(request)
+                if len(batch) >= PUT_BATCH_SIZE:
+                    response.statuses.extend(self._put_batch(batch))
+                    batch = []
+            if batch:
+                response.statuses.extend(self._put_batch(batch))
+        except Exception as e:
+            logger.error(f"Ошибка в BatchPutEntries: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка пакетного добавления тикетов: {e}")
+            return response
+
+        failed = sum(1 for status in response.statuses if not status.ok)
+        logger.info(f"BatchPutEntries: обработано {len(response.statuses)} тикетов, ошибок: {failed}.")
+        return response
+
+    def _ticket_selector(self, bucket_uuid: str, external_ticket_id: str) -> models.FilterSelector:
+        return models.FilterSelector(
+            filter=self.layout.bucket_filter(
+                bucket_uuid,
+                models.FieldCondition(
+                    key="ticket_id",
+                    match=models.MatchValue(value=external_ticket_id)
+                )
+            )
+        )
+
     def RemoveEntry(self, request: RemoveEntryRequest, context: ServicerContext) -> Empty:
         bucket_uuid: str = request.bucket_uuid
         external_ticket_id: str = request.external_ticket_id
         try:
             self.models_registry.qdrant_client.delete(
-                collection_name=bucket_uuid,
-                points_selector=models.FilterSelector(
-                    filter=models.Filter(
-                        must=[
-                            models.FieldCondition(
-                                key="ticket_id",
-                                match=models.MatchValue(value=external_ticket_id)
-                            )
-                        ]
-                    )
-                )
+                collection_name=self.layout.collection(bucket_uuid),
+                points_selector=self._ticket_selector(bucket_uuid, external_ticket_id)
             )
             logger.info(f"Удалены все точки для ticket_id={external_ticket_id} из {bucket_uuid}")
         except Exception as e:
             logger.error(f"Ошибка при удалении ticket_id={external_ticket_id}: {e}", exc_info=True)
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(f"Ошибка при удалении: {e}")
+        finally:
+            self._invalidate_find_cache(bucket_uuid)
         return pb2.Empty()
 
+    def RemoveEntries(self, request: RemoveEntriesRequest, context: ServicerContext) -> RemoveEntriesResponse:
+        bucket_uuid: str = request.bucket_uuid
+        try:
+            operations = remove_operations(list(request.external_ticket_ids), request.payload_matches,
+                                           self.layout.conditions(bucket_uuid))
+        except ValueError as e:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(str(e))
+            return RemoveEntriesResponse()
+
+        try:
+            with STAGE_SECONDS.time(operation="remove", stage="qdrant_write"):
+                self.models_registry.qdrant_client.batch_update_points(
+                    collection_name=self.layout.collection(bucket_uuid), update_operations=operations,
+                    wait=request.wait
+                )
+            logger.info(f"Удаление из {bucket_uuid}: тикетов в запросе {len(request.external_ticket_ids)}, "
+                        f"условий на payload {len(request.payload_matches)}, операций {len(operations)}, "
+                        f"wait={request.wait}.")
+        except Exception as e:
+            logger.error(f"Ошибка при массовом удалении из {bucket_uuid}: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка при удалении: {e}")
+            return RemoveEntriesResponse()
+        finally:
+            # При wait=false Qdrant применит удаление чуть позже сброса, и до истечения TTL кэш может
+            # вернуть удалённые тикеты — как и сам поиск до применения удаления.
+            self._invalidate_find_cache(bucket_uuid)
+        return RemoveEntriesResponse(completed=request.wait)
+
+    def _queued_status(self, request: GetEntryStatusRequest) -> GetEntryStatusResponse | None:
+        if self.ingest_queue is None:
+            return None
+        queued = self.ingest_queue.status(request.bucket_uuid, request.external_ticket_id)
+        if queued is None:
+            return None
+        state, error = queued
+        return GetEntryStatusResponse(state=QUEUE_STATES[state], error=error)
+
+    def GetEntryStatus(self, request: GetEntryStatusRequest, context: ServicerContext) -> GetEntryStatusResponse:
+        try:
+            response = self._queued_status(request)
+            if response is not None:
+                return response
+            count = self.models_registry.qdrant_client.count(
+                collection_name=self.layout.collection(request.bucket_uuid),
+                count_filter=self._ticket_selector(request.bucket_uuid, request.external_ticket_id).filter,
+                # Приблизительный подсчёт с фильтром ошибается в обе стороны; точный по индексу ticket_id дёшев.
+                exact=True
+            ).count
+            return GetEntryStatusResponse(state=pb2.ENTRY_SEARCHABLE if count else pb2.ENTRY_UNKNOWN)
+        except Exception as e:
+            logger.error(f"Ошибка в GetEntryStatus для {request.external_ticket_id}: {e}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(f"Ошибка получения статуса тикета: {e}")
+            return GetEntryStatusResponse()
+
+    @staticmethod
+    def _timed(timings: dict[str, float], name: str, fn, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[name] = time.perf_counter() - started
+
+    @staticmethod
+    def _log_timings(bucket_uuid: str, timings: dict[str, float]) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Find в %s: %s", bucket_uuid,
+                         ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.items()))
+
+    def _query_vector(self, kind: str, key):
+        return self.query_cache.get((kind, key)) if self.query_cache is not None else None
+
+    def _remember_query_vector(self, kind: str, key, vector) -> None:
+        if self.query_cache is not None:
+            self.query_cache.put((kind, key), vector)
+
+    def _lookup_query_images(self, images: RepeatedCompositeFieldContainer[ImageEntry]) \
+            -> tuple[list[bytes], list, list[ImageEntry]]:
+        digests = [content_digest(image.content) for image in images]
+        vectors = [self._query_vector("image", digest) for digest in digests]
+        missing = [image for image, vector in zip(images, vectors) if vector is None]
+        return digests, vectors, missing
+
+    def _store_query_images(self, digests: list[bytes], vectors: list, encoded: list) -> list:
+        encoded = iter(encoded)
+        for idx, vector in enumerate(vectors):
+            if vector is None:
+                vectors[idx] = next(encoded)
+                self._remember_query_vector("image", digests[idx], vectors[idx])
+        return vectors
+
+    def _encode_one_peace_query(self, text_query: str):
+        cached = self._query_vector("one_peace_text", text_query)
+        if cached is not None:
+            return cached
+        # SBERT мультиязычный, поэтому перевод нужен только для текстового вектора ONE-PEACE.
+        with STAGE_SECONDS.time(operation="find", stage="translation"):
+            translated_query = self.models_registry.query_translator.translate(text_query)
+        with STAGE_SECONDS.time(operation="find", stage="one_peace_text"):
+            vector = self.models_registry.one_peace_client.encode_text(translated_query)
+        self._remember_query_vector("one_peace_text", text_query, vector)
+        return vector
+
+    def _encode_query_images(self, images: RepeatedCompositeFieldContainer[ImageEntry]):
+        digests, vectors, missing = self._lookup_query_images(images)
+        if not missing:
+            return vectors
+        with STAGE_SECONDS.time(operation="find", stage="image_decode"):
+            contents = self._prepare_query_images(missing)
+        with STAGE_SECONDS.time(operation="find", stage="one_peace_images"):
+            encoded = self.models_registry.one_peace_client.encode_images(contents)
+        return self._store_query_images(digests, vectors, encoded)
+
+    def _encode_text_query(self, text_query: str):
+        cached = self._query_vector("sbert", text_query)
+        if cached is not None:
+            return cached
+        with STAGE_SECONDS.time(operation="find", stage="sbert"):
+            vector = self.models_registry.text_embedder.encode_text(text_query)
+        self._remember_query_vector("sbert", text_query, vector)
+        return vector
+
+    def _search_branch(self, **search_args):
+        with STAGE_SECONDS.time(operation="find", stage="qdrant_search"):
+            return self.models_registry.qdrant_client.query_points_groups(**search_args)
+
+    @staticmethod
+    def _search_branches(text_vec, one_peace_text_vec, image_vectors) -> list[tuple[str, str, list]]:
+        # Текстовый вектор ONE-PEACE ищет по векторам картинок: запрос «ошибка 500» находит скриншоты с ней.
+        branches = [("text", "description_sbert_embedding", text_vec.tolist()),
+                    ("text_one_peace", "one_peace_embedding", one_peace_text_vec.tolist())]
+        for idx, vec in enumerate(image_vectors):
+            branches.append((f"image_{idx}", "one_peace_embedding", vec.tolist()))
+        return branches
+
+    def _grouped_search_args(self, bucket_uuid: str, using: str, query, top_k: int,
+                             search: models.SearchParams | None = None) -> dict:
+        # Группировка по ticket_id на стороне Qdrant: по одной лучшей точке на тикет.
+        # ticket_id приходит как id группы, поэтому payload точек не запрашиваем вовсе.
+        conditions = self.layout.conditions(bucket_uuid)
+        return dict(collection_name=self.layout.collection(bucket_uuid), query=query, using=using,
+                    query_filter=models.Filter(must=conditions) if conditions else None, group_by="ticket_id",
+                    group_size=1, limit=top_k, with_payload=False, with_vectors=False, search_params=search)
+
+    @staticmethod
+    def _aggregate_results(branch_groups, top_k: int) -> FindResponse:
+        aggregated_scores = {}
+        for groups in branch_groups:
+            for group in groups:
+                ticket_id = str(group.id)
+                if ticket_id not in aggregated_scores:
+                    aggregated_scores[ticket_id] = 0.0
+                aggregated_scores[ticket_id] += group.hits[0].score
+
+        sorted_tickets = sorted(aggregated_scores.items(), key=lambda x: x[1], reverse=True)
+        response = FindResponse()
+        for ticket_id, score in sorted_tickets[:top_k]:
+            response.entries.append(FindResponseEntry(external_id=ticket_id, score=score))
+        return response
+
     def Find(self, request: FindRequest, context):
-        text_query: str = request.query.content
+        # Нормализуем до кодирования, чтобы запросы, совпадающие в кэше, давали и одинаковые векторы.
+        text_query: str = normalize_query(request.query.content)
         images: RepeatedCompositeFieldContainer[ImageEntry] = request.images
         bucket_uuid: str = request.bucket_uuid
-        top_k: int = request.top_k
+        top_k: int = request.top_k or DEFAULT_TOP_K
+        search: models.SearchParams | None = search_params(request.search_params)
 
         try:
-            # === 1. Генерация векторов запроса ===
-            translated_query = GoogleTranslator(source='auto', target='en').translate(text_query)
-
-            # Текстовые вектора
-            text_vec = self.models_registry.text_embedder.encode_text(translated_query)
-            one_peace_text_vec = self.models_registry.one_peace_client.encode_text(translated_query)
-
-            # Вектора изображений (по каждому отдельно)
-            image_vectors = []
-            for img in images:
-                pil = Image.open(BytesIO(img.content)).convert("RGB")
-                image_vectors.append(self.models_registry.one_peace_client.encode_image(pil, img.content_type))
-
-            # === 2. Поиск по каждому модальному вектору ===
-            aggregated_scores = {}
-
-            def add_scores(results, modality):
-                for pt in results:
-                    ticket_id = pt.payload.get("ticket_id")
-                    if not ticket_id:
-                        continue
-                    score = pt.score
-                    if ticket_id not in aggregated_scores:
-                        aggregated_scores[ticket_id] = 0.0
-                    aggregated_scores[ticket_id] += score
-
-            # Поиск по тексту (sbert)
-            res = self.models_registry.qdrant_client.query_points(
-                collection_name=bucket_uuid,
-                query=text_vec.tolist(),
-                limit=top_k,
-                with_payload=True,
-                with_vectors=False,
-                using="description_sbert_embedding"
-            ).points
-            add_scores(res, "text")
-
-            # Поиск по каждому изображению
-            for idx, vec in enumerate(image_vectors):
-                res = self.models_registry.qdrant_client.query_points(
-                    collection_name=bucket_uuid,
-                    query=vec.tolist(),
-                    limit=top_k,
-                    with_payload=True,
-                    with_vectors=False,
-                    using="one_peace_embedding"
-                ).points
-                add_scores(res, f"image_{idx}")
-
-            # === 3. Агрегация результатов ===
-            sorted_tickets = sorted(aggregated_scores.items(), key=lambda x: x[1], reverse=True)
-
-            # === 4. Формирование ответа ===
-            response = FindResponse()
-            for ticket_id, _ in sorted_tickets[:10]:
-                response.entries.append(FindResponseEntry(external_id=ticket_id))
+            cache_key = self.find_cache.request_key(request, top_k) if self.find_cache is not None else None
+            if cache_key is not None:
+                cached = self.find_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+            timings: dict[str, float] = {}
+            started = time.perf_counter()
+
+            # === 1. Генерация векторов запроса: все ветки параллельно ===
+            text_future = self._find_pool.submit(
+                self._timed, timings, "sbert", self._encode_text_query, text_query
+            )
+            one_peace_text_future = self._find_pool.submit(
+                self._timed, timings, "one_peace_text", self._encode_one_peace_query, text_query
+            )
+            images_future = self._find_pool.submit(
+                self._timed, timings, "one_peace_images", self._encode_query_images, images
+            )
+            text_vec = text_future.result()
+            one_peace_text_vec = one_peace_text_future.result()
+            image_vectors = images_future.result()
+
+            # === 2. Поиск с группировкой по тикетам: ветки модальностей параллельно ===
+            search_futures = [
+                self._find_pool.submit(
+                    self._timed, timings, f"qdrant_{name}", self._search_branch,
+                    **self._grouped_search_args(bucket_uuid, using, query, top_k, search)
+                )
+                for name, using, query in self._search_branches(text_vec, one_peace_text_vec, image_vectors)
+            ]
+            branch_groups = [future.result().groups for future in search_futures]
 
+            # === 3. Агрегация результатов и формирование ответа ===
+            response = self._aggregate_results(branch_groups, top_k)
+            if cache_key is not None:
+                self.find_cache.put(cache_key, response)
+
+            timings["total"] = time.perf_counter() - started
+            self._log_timings(bucket_uuid, timings)
             return response
 
         except Exception as e:
             logger.error(f"Ошибка в Find: {e}", exc_info=True)
-            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_code(self._error_code(e))
             context.set_details(f"Ошибка при выполнении поиска: {e}")
             return FindResponse()
 
 
+def _cache_path(name: str) -> str | None:
+    return os.path.join(EMBEDDING_CACHE_DIR, name) if EMBEDDING_CACHE_DIR else None
+
+
+def build_worker_pool(workers: int = EMBEDDING_WORKERS, backend: str = SBERT_BACKEND,
+                      threads: int = SBERT_THREADS) -> EmbeddingWorkerPool | None:
+    if not workers:
+        return None
+    # Без явного числа потоков каждый воркер взял бы все ядра, и они мешали бы друг другу.
+    factory = functools.partial(SBERTEmbedder, backend=backend, threads=threads or 1)
+    return EmbeddingWorkerPool(workers, factory)
+
+
+def text_model_id(backend: str = SBERT_BACKEND) -> str:
+    # Векторы разных бэкендов чуть различаются, поэтому у каждого свой id; у эталонного — прежний.
+    return f"sbert:{SBERT_MODEL_NAME}" if backend == "torch" else f"sbert:{SBERT_MODEL_NAME}:{backend}"
+
+
+def build_text_embedder(pool: EmbeddingWorkerPool | None = None, backend: str = SBERT_BACKEND,
+                        threads: int = SBERT_THREADS) -> TextEmbedder:
+    if pool is not None:
+        embedder = BatchingTextEmbedder(PooledTextEmbedder(pool), concurrency=pool.workers)
+    else:
+        embedder = BatchingTextEmbedder(SBERTEmbedder(backend=backend, threads=threads))
+    text_cache = EmbeddingCache(text_model_id(backend), SBERT_VECTOR_SIZE,
+                                max_entries=SBERT_CACHE_SIZE, disk_path=_cache_path("sbert.f32"))
+    return CachedTextEmbedder(embedder, text_cache)
+
+
+def one_peace_policy() -> RetryPolicy:
+    return RetryPolicy(timeout=ONE_PEACE_TIMEOUT, hedge_after=ONE_PEACE_HEDGE_AFTER or None)
+
+
+def build_one_peace_cache() -> EmbeddingCache:
+    return EmbeddingCache(ONE_PEACE_MODEL_ID, ONE_PEACE_VECTOR_SIZE,
+                          max_entries=ONE_PEACE_CACHE_SIZE, disk_path=_cache_path("one_peace.f32"))
+
+
+def flush_embedding_caches(registry: ModelRegistry) -> None:
+    # Дисковый уровень кэша — memmap: при остановке сбрасываем его на диск явно.
+    for component in (registry.text_embedder, registry.one_peace_client):
+        cache = getattr(component, "cache", None)
+        if cache is not None:
+            cache.flush()
+
+
+def build_layout() -> CollectionPerBucket:
+    return make_bucket_layout(BUCKET_LAYOUT, SHARED_COLLECTIONS)
+
+
+def build_find_caches() -> dict:
+    return {
+        "find_cache": FindResultCache(FIND_CACHE_SIZE, ttl=FIND_CACHE_TTL) if FIND_CACHE_SIZE else None,
+        "query_cache": TtlLruCache(QUERY_CACHE_SIZE),
+    }
+
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    if SERVER_MODE == "async":
+        # Импорт здесь: asyncio-сервер наследует CloudberryStorage из этого модуля.
+        from async_cloudberry_storage import serve_async
+        asyncio.run(serve_async())
+        return
+
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), interceptors=[MetricsInterceptor()])
+    pool = build_worker_pool()
     registry: ModelRegistry = ModelRegistry(
-        text_embedder=SBERTEmbedder(),
-        one_peace_client=OnePeaceClient(),
-        qdrant_client=QdrantClient("http://localhost:6333")
+        text_embedder=build_text_embedder(pool),
+        one_peace_client=CachedOnePeaceClient(
+            OnePeaceClient(endpoints=ONE_PEACE_ENDPOINTS, policy=one_peace_policy()), build_one_peace_cache()
+        ),
+        qdrant_client=QdrantClient(QDRANT_URL, prefer_grpc=QDRANT_PREFER_GRPC),
+        query_translator=QueryTranslator(make_translator_backend(TRANSLATOR_BACKEND)),
+        ocr_pipeline=OcrPipeline(max_workers=OCR_WORKERS, timeout=OCR_TIMEOUT),
+        image_preprocessor=pool.prepare_images if pool else None,
+        text_model_id=text_model_id(),
+        image_model_id=ONE_PEACE_MODEL_ID,
     )
-    pb2_grpc.add_CloudberryStorageServicer_to_server(CloudberryStorage(registry), server)
-    server.add_insecure_port("[::]:8002")
+    queue = IngestQueue(INGEST_QUEUE_PATH, max_depth=INGEST_QUEUE_MAX_DEPTH) if INGEST_QUEUE_PATH else None
+    storage = CloudberryStorage(registry, ingest_queue=queue, layout=build_layout(), **build_find_caches())
+    if queue is not None:
+        IngestWorkerPool(queue, storage._put_batch, workers=INGEST_WORKERS, batch_size=PUT_BATCH_SIZE).start()
+    pb2_grpc.add_CloudberryStorageServicer_to_server(storage, server)
+    health_servicer = add_health_servicer(server)
+    server.add_insecure_port(f"[::]:{SERVER_PORT}")
     server.start()
-    server.wait_for_termination()
+    logger.info(f"Сервер CloudberryStorage запущен на порту {SERVER_PORT}, идёт прогрев моделей.")
+
+    def become_ready():
+        wait_until_ready(lambda: warm_up(registry))
+        mark_serving(health_servicer)
+
+    # Порт открыт сразу: пока модели грузятся, health-check отвечает NOT_SERVING.
+    threading.Thread(target=become_ready, name="warm-up", daemon=True).start()
+    # По SIGTERM (остановка контейнера) сервер завершается штатно, и кэши успевают сброситься на диск.
+    signal.signal(signal.SIGTERM, lambda *_: server.stop(SHUTDOWN_GRACE))
+    try:
+        server.wait_for_termination()
+    finally:
+        flush_embedding_caches(registry)
 
 
 if __name__ == '__main__':
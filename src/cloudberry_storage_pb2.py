@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: cloudberry_storage.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'cloudberry_storage.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x18\x63loudberry_storage.proto\x12\tgenerated\"j\n\x0fPutEntryRequest\x12\x1a\n\x12\x65xternal_ticket_id\x18\x01 \x01(\t\x12\x13\n\x0b\x62ucket_uuid\x18\x02 \x01(\t\x12&\n\x06ticket\x18\x03 \x01(\x0b\x32\x16.generated.TicketEntry\"\x89\x01\n\x0bTicketEntry\x12#\n\x05title\x18\x03 \x01(\x0b\x32\x14.generated.TextEntry\x12)\n\x0b\x64\x65scription\x18\x04 \x01(\x0b\x32\x14.generated.TextEntry\x12*\n\x0b\x61ttachments\x18\x05 \x03(\x0b\x32\x15.generated.ImageEntry\"\x1c\n\tTextEntry\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\t\"P\n\nImageEntry\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\x0c\x12\x31\n\x0c\x63ontent_type\x18\x02 \x01(\x0e\x32\x1b.generated.ImageContentType\"F\n\x17\x42\x61tchPutEntriesResponse\x12+\n\x08statuses\x18\x01 \x03(\x0b\x32\x19.generated.PutEntryStatus\"p\n\x0ePutEntryStatus\x12\x1a\n\x12\x65xternal_ticket_id\x18\x01 \x01(\t\x12\x13\n\x0b\x62ucket_uuid\x18\x02 \x01(\t\x12\n\n\x02ok\x18\x03 \x01(\x08\x12\r\n\x05\x65rror\x18\x04 \x01(\t\x12\x12\n\nsuperseded\x18\x05 \x01(\x08\"\xad\x01\n\x0b\x46indRequest\x12#\n\x05query\x18\x02 \x01(\x0b\x32\x14.generated.TextEntry\x12%\n\x06images\x18\x03 \x03(\x0b\x32\x15.generated.ImageEntry\x12\x13\n\x0b\x62ucket_uuid\x18\x04 \x01(\t\x12\r\n\x05top_k\x18\x05 \x01(\x05\x12.\n\rsearch_params\x18\x06 \x01(\x0b\x32\x17.generated.SearchParams\"5\n\x0cSearchParams\x12\x0f\n\x07hnsw_ef\x18\x01 \x01(\r\x12\x14\n\x0coversampling\x18\x02 \x01(\x02\"=\n\x0c\x46indResponse\x12-\n\x07\x65ntries\x18\x01 \x03(\x0b\x32\x1c.generated.FindResponseEntry\"7\n\x11\x46indResponseEntry\x12\x13\n\x0b\x65xternal_id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x02\"\\\n\x11InitBucketRequest\x12\x13\n\x0b\x62ucket_uuid\x18\x01 \x01(\t\x12\x32\n\x0fstorage_profile\x18\x02 \x01(\x0b\x32\x19.generated.StorageProfile\"\x9c\x01\n\x0eStorageProfile\x12-\n\x0cquantization\x18\x01 \x01(\x0e\x32\x17.generated.Quantization\x12\x17\n\x0fon_disk_vectors\x18\x02 \x01(\x08\x12\x17\n\x0fon_disk_payload\x18\x03 \x01(\x08\x12\x0e\n\x06hnsw_m\x18\x04 \x01(\r\x12\x19\n\x11hnsw_ef_construct\x18\x05 \x01(\r\"+\n\x14\x44\x65stroyBucketRequest\x12\x13\n\x0b\x62ucket_uuid\x18\x01 \x01(\t\"E\n\x12RemoveEntryRequest\x12\x1a\n\x12\x65xternal_ticket_id\x18\x01 \x01(\t\x12\x13\n\x0b\x62ucket_uuid\x18\x02 \x01(\t\"\x88\x01\n\x14RemoveEntriesRequest\x12\x13\n\x0b\x62ucket_uuid\x18\x01 \x01(\t\x12\x1b\n\x13\x65xternal_ticket_ids\x18\x02 \x03(\t\x12\x30\n\x0fpayload_matches\x18\x03 \x03(\x0b\x32\x17.generated.PayloadMatch\x12\x0c\n\x04wait\x18\x04 \x01(\x08\"+\n\x0cPayloadMatch\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x0e\n\x06values\x18\x02 \x03(\t\"*\n\x15RemoveEntriesResponse\x12\x11\n\tcompleted\x18\x01 \x01(\x08\"H\n\x15GetEntryStatusRequest\x12\x1a\n\x12\x65xternal_ticket_id\x18\x01 \x01(\t\x12\x13\n\x0b\x62ucket_uuid\x18\x02 \x01(\t\"M\n\x16GetEntryStatusResponse\x12$\n\x05state\x18\x01 \x01(\x0e\x32\x15.generated.EntryState\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"\x07\n\x05\x45mpty*%\n\x10ImageContentType\x12\x08\n\x04JPEG\x10\x00\x12\x07\n\x03PNG\x10\x01*\\\n\x0cQuantization\x12\x15\n\x11QUANTIZATION_NONE\x10\x00\x12\x1c\n\x18QUANTIZATION_SCALAR_INT8\x10\x01\x12\x17\n\x13QUANTIZATION_BINARY\x10\x02*o\n\nEntryState\x12\x11\n\rENTRY_UNKNOWN\x10\x00\x12\x10\n\x0c\x45NTRY_QUEUED\x10\x01\x12\x14\n\x10\x45NTRY_PROCESSING\x10\x02\x12\x14\n\x10\x45NTRY_SEARCHABLE\x10\x03\x12\x10\n\x0c\x45NTRY_FAILED\x10\x04\x32\xc8\x04\n\x11\x43loudberryStorage\x12\x38\n\x08PutEntry\x12\x1a.generated.PutEntryRequest\x1a\x10.generated.Empty\x12S\n\x0f\x42\x61tchPutEntries\x12\x1a.generated.PutEntryRequest\x1a\".generated.BatchPutEntriesResponse(\x01\x12>\n\x0bRemoveEntry\x12\x1d.generated.RemoveEntryRequest\x1a\x10.generated.Empty\x12R\n\rRemoveEntries\x12\x1f.generated.RemoveEntriesRequest\x1a .generated.RemoveEntriesResponse\x12\x37\n\x04\x46ind\x12\x16.generated.FindRequest\x1a\x17.generated.FindResponse\x12<\n\nInitBucket\x12\x1c.generated.InitBucketRequest\x1a\x10.generated.Empty\x12\x42\n\rDestroyBucket\x12\x1f.generated.DestroyBucketRequest\x1a\x10.generated.Empty\x12U\n\x0eGetEntryStatus\x12 .generated.GetEntryStatusRequest\x1a!.generated.GetEntryStatusResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'cloudberry_storage_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_IMAGECONTENTTYPE']._serialized_start=1695
+  _globals['_IMAGECONTENTTYPE']._serialized_end=1732
+  _globals['_QUANTIZATION']._serialized_start=1734
+  _globals['_QUANTIZATION']._serialized_end=1826
+  _globals['_ENTRYSTATE']._serialized_start=1828
+  _globals['_ENTRYSTATE']._serialized_end=1939
+  _globals['_PUTENTRYREQUEST']._serialized_start=39
+  _globals['_PUTENTRYREQUEST']._serialized_end=145
+  _globals['_TICKETENTRY']._serialized_start=148
+  _globals['_TICKETENTRY']._serialized_end=285
+  _globals['_TEXTENTRY']._serialized_start=287
+  _globals['_TEXTENTRY']._serialized_end=315
+  _globals['_IMAGEENTRY']._serialized_start=317
+  _globals['_IMAGEENTRY']._serialized_end=397
+  _globals['_BATCHPUTENTRIESRESPONSE']._serialized_start=399
+  _globals['_BATCHPUTENTRIESRESPONSE']._serialized_end=469
+  _globals['_PUTENTRYSTATUS']._serialized_start=471
+  _globals['_PUTENTRYSTATUS']._serialized_end=583
+  _globals['_FINDREQUEST']._serialized_start=586
+  _globals['_FINDREQUEST']._serialized_end=759
+  _globals['_SEARCHPARAMS']._serialized_start=761
+  _globals['_SEARCHPARAMS']._serialized_end=814
+  _globals['_FINDRESPONSE']._serialized_start=816
+  _globals['_FINDRESPONSE']._serialized_end=877
+  _globals['_FINDRESPONSEENTRY']._serialized_start=879
+  _globals['_FINDRESPONSEENTRY']._serialized_end=934
+  _globals['_INITBUCKETREQUEST']._serialized_start=936
+  _globals['_INITBUCKETREQUEST']._serialized_end=1028
+  _globals['_STORAGEPROFILE']._serialized_start=1031
+  _globals['_STORAGEPROFILE']._serialized_end=1187
+  _globals['_DESTROYBUCKETREQUEST']._serialized_start=1189
+  _globals['_DESTROYBUCKETREQUEST']._serialized_end=1232
+  _globals['_REMOVEENTRYREQUEST']._serialized_start=1234
+  _globals['_REMOVEENTRYREQUEST']._serialized_end=1303
+  _globals['_REMOVEENTRIESREQUEST']._serialized_start=1306
+  _globals['_REMOVEENTRIESREQUEST']._serialized_end=1442
+  _globals['_PAYLOADMATCH']._serialized_start=1444
+  _globals['_PAYLOADMATCH']._serialized_end=1487
+  _globals['_REMOVEENTRIESRESPONSE']._serialized_start=1489
+  _globals['_REMOVEENTRIESRESPONSE']._serialized_end=1531
+  _globals['_GETENTRYSTATUSREQUEST']._serialized_start=1533
+  _globals['_GETENTRYSTATUSREQUEST']._serialized_end=1605
+  _globals['_GETENTRYSTATUSRESPONSE']._serialized_start=1607
+  _globals['_GETENTRYSTATUSRESPONSE']._serialized_end=1684
+  _globals['_EMPTY']._serialized_start=1686
+  _globals['_EMPTY']._serialized_end=1693
+  _globals['_CLOUDBERRYSTORAGE']._serialized_start=1942
+  _globals['_CLOUDBERRYSTORAGE']._serialized_end=2526
+# @@protoc_insertion_point(module_scope)
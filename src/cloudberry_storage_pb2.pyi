@@ -0,0 +1,209 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from collections.abc import Iterable as _Iterable, Mapping as _Mapping
+from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
+
+DESCRIPTOR: _descriptor.FileDescriptor
+
+class ImageContentType(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    JPEG: _ClassVar[ImageContentType]
+    PNG: _ClassVar[ImageContentType]
+
+class Quantization(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    QUANTIZATION_NONE: _ClassVar[Quantization]
+    QUANTIZATION_SCALAR_INT8: _ClassVar[Quantization]
+    QUANTIZATION_BINARY: _ClassVar[Quantization]
+
+class EntryState(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+    __slots__ = ()
+    ENTRY_UNKNOWN: _ClassVar[EntryState]
+    ENTRY_QUEUED: _ClassVar[EntryState]
+    ENTRY_PROCESSING: _ClassVar[EntryState]
+    ENTRY_SEARCHABLE: _ClassVar[EntryState]
+    ENTRY_FAILED: _ClassVar[EntryState]
+JPEG: ImageContentType
+PNG: ImageContentType
+QUANTIZATION_NONE: Quantization
+QUANTIZATION_SCALAR_INT8: Quantization
+QUANTIZATION_BINARY: Quantization
+ENTRY_UNKNOWN: EntryState
+ENTRY_QUEUED: EntryState
+ENTRY_PROCESSING: EntryState
+ENTRY_SEARCHABLE: EntryState
+ENTRY_FAILED: EntryState
+
+class PutEntryRequest(_message.Message):
+    __slots__ = ("external_ticket_id", "bucket_uuid", "ticket")
+    EXTERNAL_TICKET_ID_FIELD_NUMBER: _ClassVar[int]
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    TICKET_FIELD_NUMBER: _ClassVar[int]
+    external_ticket_id: str
+    bucket_uuid: str
+    ticket: TicketEntry
+    def __init__(self, external_ticket_id: _Optional[str] = ..., bucket_uuid: _Optional[str] = ..., ticket: _Optional[_Union[TicketEntry, _Mapping]] = ...) -> None: ...
+
+class TicketEntry(_message.Message):
+    __slots__ = ("title", "description", "attachments")
+    TITLE_FIELD_NUMBER: _ClassVar[int]
+    DESCRIPTION_FIELD_NUMBER: _ClassVar[int]
+    ATTACHMENTS_FIELD_NUMBER: _ClassVar[int]
+    title: TextEntry
+    description: TextEntry
+    attachments: _containers.RepeatedCompositeFieldContainer[ImageEntry]
+    def __init__(self, title: _Optional[_Union[TextEntry, _Mapping]] = ..., description: _Optional[_Union[TextEntry, _Mapping]] = ..., attachments: _Optional[_Iterable[_Union[ImageEntry, _Mapping]]] = ...) -> None: ...
+
+class TextEntry(_message.Message):
+    __slots__ = ("content",)
+    CONTENT_FIELD_NUMBER: _ClassVar[int]
+    content: str
+    def __init__(self, content: _Optional[str] = ...) -> None: ...
+
+class ImageEntry(_message.Message):
+    __slots__ = ("content", "content_type")
+    CONTENT_FIELD_NUMBER: _ClassVar[int]
+    CONTENT_TYPE_FIELD_NUMBER: _ClassVar[int]
+    content: bytes
+    content_type: ImageContentType
+    def __init__(self, content: _Optional[bytes] = ..., content_type: _Optional[_Union[ImageContentType, str]] = ...) -> None: ...
+
+class BatchPutEntriesResponse(_message.Message):
+    __slots__ = ("statuses",)
+    STATUSES_FIELD_NUMBER: _ClassVar[int]
+    statuses: _containers.RepeatedCompositeFieldContainer[PutEntryStatus]
+    def __init__(self, statuses: _Optional[_Iterable[_Union[PutEntryStatus, _Mapping]]] = ...) -> None: ...
+
+class PutEntryStatus(_message.Message):
+    __slots__ = ("external_ticket_id", "bucket_uuid", "ok", "error", "superseded")
+    EXTERNAL_TICKET_ID_FIELD_NUMBER: _ClassVar[int]
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    OK_FIELD_NUMBER: _ClassVar[int]
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    SUPERSEDED_FIELD_NUMBER: _ClassVar[int]
+    external_ticket_id: str
+    bucket_uuid: str
+    ok: bool
+    error: str
+    superseded: bool
+    def __init__(self, external_ticket_id: _Optional[str] = ..., bucket_uuid: _Optional[str] = ..., ok: _Optional[bool] = ..., error: _Optional[str] = ..., superseded: _Optional[bool] = ...) -> None: ...
+
+class FindRequest(_message.Message):
+    __slots__ = ("query", "images", "bucket_uuid", "top_k", "search_params")
+    QUERY_FIELD_NUMBER: _ClassVar[int]
+    IMAGES_FIELD_NUMBER: _ClassVar[int]
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    TOP_K_FIELD_NUMBER: _ClassVar[int]
+    SEARCH_PARAMS_FIELD_NUMBER: _ClassVar[int]
+    query: TextEntry
+    images: _containers.RepeatedCompositeFieldContainer[ImageEntry]
+    bucket_uuid: str
+    top_k: int
+    search_params: SearchParams
+    def __init__(self, query: _Optional[_Union[TextEntry, _Mapping]] = ..., images: _Optional[_Iterable[_Union[ImageEntry, _Mapping]]] = ..., bucket_uuid: _Optional[str] = ..., top_k: _Optional[int] = ..., search_params: _Optional[_Union[SearchParams, _Mapping]] = ...) -> None: ...
+
+class SearchParams(_message.Message):
+    __slots__ = ("hnsw_ef", "oversampling")
+    HNSW_EF_FIELD_NUMBER: _ClassVar[int]
+    OVERSAMPLING_FIELD_NUMBER: _ClassVar[int]
+    hnsw_ef: int
+    oversampling: float
+    def __init__(self, hnsw_ef: _Optional[int] = ..., oversampling: _Optional[float] = ...) -> None: ...
+
+class FindResponse(_message.Message):
+    __slots__ = ("entries",)
+    ENTRIES_FIELD_NUMBER: _ClassVar[int]
+    entries: _containers.RepeatedCompositeFieldContainer[FindResponseEntry]
+    def __init__(self, entries: _Optional[_Iterable[_Union[FindResponseEntry, _Mapping]]] = ...) -> None: ...
+
+class FindResponseEntry(_message.Message):
+    __slots__ = ("external_id", "score")
+    EXTERNAL_ID_FIELD_NUMBER: _ClassVar[int]
+    SCORE_FIELD_NUMBER: _ClassVar[int]
+    external_id: str
+    score: float
+    def __init__(self, external_id: _Optional[str] = ..., score: _Optional[float] = ...) -> None: ...
+
+class InitBucketRequest(_message.Message):
+    __slots__ = ("bucket_uuid", "storage_profile")
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    STORAGE_PROFILE_FIELD_NUMBER: _ClassVar[int]
+    bucket_uuid: str
+    storage_profile: StorageProfile
+    def __init__(self, bucket_uuid: _Optional[str] = ..., storage_profile: _Optional[_Union[StorageProfile, _Mapping]] = ...) -> None: ...
+
+class StorageProfile(_message.Message):
+    __slots__ = ("quantization", "on_disk_vectors", "on_disk_payload", "hnsw_m", "hnsw_ef_construct")
+    QUANTIZATION_FIELD_NUMBER: _ClassVar[int]
+    ON_DISK_VECTORS_FIELD_NUMBER: _ClassVar[int]
+    ON_DISK_PAYLOAD_FIELD_NUMBER: _ClassVar[int]
+    HNSW_M_FIELD_NUMBER: _ClassVar[int]
+    HNSW_EF_CONSTRUCT_FIELD_NUMBER: _ClassVar[int]
+    quantization: Quantization
+    on_disk_vectors: bool
+    on_disk_payload: bool
+    hnsw_m: int
+    hnsw_ef_construct: int
+    def __init__(self, quantization: _Optional[_Union[Quantization, str]] = ..., on_disk_vectors: _Optional[bool] = ..., on_disk_payload: _Optional[bool] = ..., hnsw_m: _Optional[int] = ..., hnsw_ef_construct: _Optional[int] = ...) -> None: ...
+
+class DestroyBucketRequest(_message.Message):
+    __slots__ = ("bucket_uuid",)
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    bucket_uuid: str
+    def __init__(self, bucket_uuid: _Optional[str] = ...) -> None: ...
+
+class RemoveEntryRequest(_message.Message):
+    __slots__ = ("external_ticket_id", "bucket_uuid")
+    EXTERNAL_TICKET_ID_FIELD_NUMBER: _ClassVar[int]
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    external_ticket_id: str
+    bucket_uuid: str
+    def __init__(self, external_ticket_id: _Optional[str] = ..., bucket_uuid: _Optional[str] = ...) -> None: ...
+
+class RemoveEntriesRequest(_message.Message):
+    __slots__ = ("bucket_uuid", "external_ticket_ids", "payload_matches", "wait")
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    EXTERNAL_TICKET_IDS_FIELD_NUMBER: _ClassVar[int]
+    PAYLOAD_MATCHES_FIELD_NUMBER: _ClassVar[int]
+    WAIT_FIELD_NUMBER: _ClassVar[int]
+    bucket_uuid: str
+    external_ticket_ids: _containers.RepeatedScalarFieldContainer[str]
+    payload_matches: _containers.RepeatedCompositeFieldContainer[PayloadMatch]
+    wait: bool
+    def __init__(self, bucket_uuid: _Optional[str] = ..., external_ticket_ids: _Optional[_Iterable[str]] = ..., payload_matches: _Optional[_Iterable[_Union[PayloadMatch, _Mapping]]] = ..., wait: _Optional[bool] = ...) -> None: ...
+
+class PayloadMatch(_message.Message):
+    __slots__ = ("key", "values")
+    KEY_FIELD_NUMBER: _ClassVar[int]
+    VALUES_FIELD_NUMBER: _ClassVar[int]
+    key: str
+    values: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, key: _Optional[str] = ..., values: _Optional[_Iterable[str]] = ...) -> None: ...
+
+class RemoveEntriesResponse(_message.Message):
+    __slots__ = ("completed",)
+    COMPLETED_FIELD_NUMBER: _ClassVar[int]
+    completed: bool
+    def __init__(self, completed: _Optional[bool] = ...) -> None: ...
+
+class GetEntryStatusRequest(_message.Message):
+    __slots__ = ("external_ticket_id", "bucket_uuid")
+    EXTERNAL_TICKET_ID_FIELD_NUMBER: _ClassVar[int]
+    BUCKET_UUID_FIELD_NUMBER: _ClassVar[int]
+    external_ticket_id: str
+    bucket_uuid: str
+    def __init__(self, external_ticket_id: _Optional[str] = ..., bucket_uuid: _Optional[str] = ...) -> None: ...
+
+class GetEntryStatusResponse(_message.Message):
+    __slots__ = ("state", "error")
+    STATE_FIELD_NUMBER: _ClassVar[int]
+    ERROR_FIELD_NUMBER: _ClassVar[int]
+    state: EntryState
+    error: str
+    def __init__(self, state: _Optional[_Union[EntryState, str]] = ..., error: _Optional[str] = ...) -> None: ...
+
+class Empty(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
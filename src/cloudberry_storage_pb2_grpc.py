@@ -0,0 +1,398 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import cloudberry_storage_pb2 as cloudberry__storage__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in cloudberry_storage_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class CloudberryStorageStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.PutEntry = channel.unary_unary(
+                '/generated.CloudberryStorage/PutEntry',
+                request_serializer=cloudberry__storage__pb2.PutEntryRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.Empty.FromString,
+                _registered_method=True)
+        self.BatchPutEntries = channel.stream_unary(
+                '/generated.CloudberryStorage/BatchPutEntries',
+                request_serializer=cloudberry__storage__pb2.PutEntryRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.BatchPutEntriesResponse.FromString,
+                _registered_method=True)
+        self.RemoveEntry = channel.unary_unary(
+                '/generated.CloudberryStorage/RemoveEntry',
+                request_serializer=cloudberry__storage__pb2.RemoveEntryRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.Empty.FromString,
+                _registered_method=True)
+        self.RemoveEntries = channel.unary_unary(
+                '/generated.CloudberryStorage/RemoveEntries',
+                request_serializer=cloudberry__storage__pb2.RemoveEntriesRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.RemoveEntriesResponse.FromString,
+                _registered_method=True)
+        self.Find = channel.unary_unary(
+                '/generated.CloudberryStorage/Find',
+                request_serializer=cloudberry__storage__pb2.FindRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.FindResponse.FromString,
+                _registered_method=True)
+        self.InitBucket = channel.unary_unary(
+                '/generated.CloudberryStorage/InitBucket',
+                request_serializer=cloudberry__storage__pb2.InitBucketRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.Empty.FromString,
+                _registered_method=True)
+        self.DestroyBucket = channel.unary_unary(
+                '/generated.CloudberryStorage/DestroyBucket',
+                request_serializer=cloudberry__storage__pb2.DestroyBucketRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.Empty.FromString,
+                _registered_method=True)
+        self.GetEntryStatus = channel.unary_unary(
+                '/generated.CloudberryStorage/GetEntryStatus',
+                request_serializer=cloudberry__storage__pb2.GetEntryStatusRequest.SerializeToString,
+                response_deserializer=cloudberry__storage__pb2.GetEntryStatusResponse.FromString,
+                _registered_method=True)
+
+
+class CloudberryStorageServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def PutEntry(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BatchPutEntries(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RemoveEntry(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RemoveEntries(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Find(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def InitBucket(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def DestroyBucket(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetEntryStatus(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_CloudberryStorageServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'PutEntry': grpc.unary_unary_rpc_method_handler(
+                    servicer.PutEntry,
+                    request_deserializer=cloudberry__storage__pb2.PutEntryRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.Empty.SerializeToString,
+            ),
+            'BatchPutEntries': grpc.stream_unary_rpc_method_handler(
+                    servicer.BatchPutEntries,
+                    request_deserializer=cloudberry__storage__pb2.PutEntryRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.BatchPutEntriesResponse.SerializeToString,
+            ),
+            'RemoveEntry': grpc.unary_unary_rpc_method_handler(
+                    servicer.RemoveEntry,
+                    request_deserializer=cloudberry__storage__pb2.RemoveEntryRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.Empty.SerializeToString,
+            ),
+            'RemoveEntries': grpc.unary_unary_rpc_method_handler(
+                    servicer.RemoveEntries,
+                    request_deserializer=cloudberry__storage__pb2.RemoveEntriesRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.RemoveEntriesResponse.SerializeToString,
+            ),
+            'Find': grpc.unary_unary_rpc_method_handler(
+                    servicer.Find,
+                    request_deserializer=cloudberry__storage__pb2.FindRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.FindResponse.SerializeToString,
+            ),
+            'InitBucket': grpc.unary_unary_rpc_method_handler(
+                    servicer.InitBucket,
+                    request_deserializer=cloudberry__storage__pb2.InitBucketRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.Empty.SerializeToString,
+            ),
+            'DestroyBucket': grpc.unary_unary_rpc_method_handler(
+                    servicer.DestroyBucket,
+                    request_deserializer=cloudberry__storage__pb2.DestroyBucketRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.Empty.SerializeToString,
+            ),
+            'GetEntryStatus': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetEntryStatus,
+                    request_deserializer=cloudberry__storage__pb2.GetEntryStatusRequest.FromString,
+                    response_serializer=cloudberry__storage__pb2.GetEntryStatusResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'generated.CloudberryStorage', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('generated.CloudberryStorage', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class CloudberryStorage:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def PutEntry(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/PutEntry',
+            cloudberry__storage__pb2.PutEntryRequest.SerializeToString,
+            cloudberry__storage__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BatchPutEntries(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/generated.CloudberryStorage/BatchPutEntries',
+            cloudberry__storage__pb2.PutEntryRequest.SerializeToString,
+            cloudberry__storage__pb2.BatchPutEntriesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RemoveEntry(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/RemoveEntry',
+            cloudberry__storage__pb2.RemoveEntryRequest.SerializeToString,
+            cloudberry__storage__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RemoveEntries(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/RemoveEntries',
+            cloudberry__storage__pb2.RemoveEntriesRequest.SerializeToString,
+            cloudberry__storage__pb2.RemoveEntriesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Find(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/Find',
+            cloudberry__storage__pb2.FindRequest.SerializeToString,
+            cloudberry__storage__pb2.FindResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def InitBucket(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/InitBucket',
+            cloudberry__storage__pb2.InitBucketRequest.SerializeToString,
+            cloudberry__storage__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def DestroyBucket(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/DestroyBucket',
+            cloudberry__storage__pb2.DestroyBucketRequest.SerializeToString,
+            cloudberry__storage__pb2.Empty.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetEntryStatus(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.CloudberryStorage/GetEntryStatus',
+            cloudberry__storage__pb2.GetEntryStatusRequest.SerializeToString,
+            cloudberry__storage__pb2.GetEntryStatusResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+
+import grpc
+import numpy as np
+import one_peace_service_pb2 as pb2
+
+from .one_peace_client import _ResilientClientBase, response_vector
+from .resilience import CHANNEL_OPTIONS, Endpoint, OnePeaceError, OnePeaceRequestError, RetryPolicy
+
+logger = logging.getLogger("AsyncOnePeaceClient")
+
+
+class AsyncOnePeaceClient(_ResilientClientBase):
+    """Асинхронный вариант OnePeaceClient поверх grpc.aio для asyncio-режима сервера."""
+
+    def __init__(self, host='localhost', port=60061, max_batch_size=32, max_batch_bytes=3 * 1024 * 1024,
+                 endpoints: list[str] | None = None, policy: RetryPolicy | None = None,
+                 failure_threshold: int = 5, reset_timeout: float = 10.0):
+        # Каналы grpc.aio привязаны к event loop, поэтому клиент создаётся внутри работающего цикла.
+        super().__init__(host, port, max_batch_size, max_batch_bytes, endpoints, policy, failure_threshold,
+                         reset_timeout, lambda address: grpc.aio.insecure_channel(address, options=CHANNEL_OPTIONS))
+
+    async def encode_text(self, text: str) -> np.ndarray:
+        return response_vector(await self._call("EncodeText", pb2.TextRequest(text=text)))
+
+    async def encode_image_bytes(self, content: bytes) -> np.ndarray:
+        return response_vector(await self._call("EncodeImage", pb2.ImageRequest(content=content)))
+
+    async def encode_texts(self, texts: list[str]) -> list[np.ndarray]:
+        if not self._batch_supported:
+            return [await self.encode_text(text) for text in texts]
+        try:
+            vectors = []
+            for chunk in self._chunks(texts, [len(text.encode("utf-8")) for text in texts]):
+                response = await self._call("EncodeTexts", pb2.TextBatchRequest(texts=chunk))
+                vectors.extend(self._batch_vectors("EncodeTexts", response, chunk))
+            return vectors
+        except OnePeaceRequestError as e:
+            if not self._unimplemented(e):
+                raise
+            logger.warning("Сервис ONE-PEACE не поддерживает пакетные RPC, переходим на поштучные вызовы.")
+            self._batch_supported = False
+            return [await self.encode_text(text) for text in texts]
+
+    async def encode_images(self, contents: list[bytes]) -> list[np.ndarray]:
+        if not self._batch_supported:
+            return [await self.encode_image_bytes(content) for content in contents]
+        try:
+            vectors = []
+            for chunk in self._chunks(contents, [len(content) for content in contents]):
+                response = await self._call("EncodeImages", pb2.ImageBatchRequest(contents=chunk))
+                vectors.extend(self._batch_vectors("EncodeImages", response, chunk))
+            return vectors
+        except OnePeaceRequestError as e:
+            if not self._unimplemented(e):
+                raise
+            logger.warning("Сервис ONE-PEACE не поддерживает пакетные RPC, переходим на поштучные вызовы.")
+            self._batch_supported = False
+            return [await self.encode_image_bytes(content) for content in contents]
+
+    async def close(self) -> None:
+        for endpoint in self.pool.endpoints:
+            await endpoint.channel.close()
+
+    async def _call(self, method: str, request):
+        tried: list[Endpoint] = []
+        error: OnePeaceError | None = None
+        for attempt in range(self.policy.retries + 1):
+            if attempt:
+                await asyncio.sleep(self.policy.delay(attempt))
+            endpoint = self.pool.pick(exclude=tried)
+            tried.append(endpoint)
+            try:
+                return await self._invoke(endpoint, method, request, tried)
+            except grpc.RpcError as e:
+                error = self._on_error(endpoint, method, e, attempt)
+        logger.error(f"ONE-PEACE не ответил после {self.policy.retries + 1} попыток: {error}")
+        raise error
+
+    async def _invoke(self, endpoint: Endpoint, method: str, request, tried: list[Endpoint]):
+        timeout = self.policy.timeout
+        if not self.policy.hedge_after:
+            return await self._settle(endpoint, getattr(endpoint.stub, method)(request, timeout=timeout))
+        primary = asyncio.ensure_future(getattr(endpoint.stub, method)(request, timeout=timeout))
+        try:
+            await asyncio.wait({primary}, timeout=self.policy.hedge_after)
+            hedge_endpoint = None if primary.done() else self._hedge_endpoint(endpoint, tried)
+            if hedge_endpoint is None:
+                return await self._settle(endpoint, primary)
+            return await self._hedge(endpoint, primary, hedge_endpoint, method, request)
+        finally:
+            primary.cancel()
+
+    async def _hedge(self, endpoint: Endpoint, primary: asyncio.Future, hedge_endpoint: Endpoint, method: str,
+                     request):
+        hedge = asyncio.ensure_future(getattr(hedge_endpoint.stub, method)(request, timeout=self.policy.timeout))
+        calls = {primary: endpoint, hedge: hedge_endpoint}
+        pending = set(calls)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for call in done:
+                    error = call.exception()
+                    self._record(calls[call], error)
+                    if error is None:
+                        if call is hedge:
+                            self._record_hedge_win(endpoint, hedge_endpoint, primary.done())
+                        return call.result()
+            raise primary.exception()
+        finally:
+            hedge.cancel()
+
+    async def _settle(self, endpoint: Endpoint, call):
+        try:
+            response = await call
+        except grpc.RpcError as e:
+            self._record(endpoint, e)
+            raise
+        self._record(endpoint)
+        return response
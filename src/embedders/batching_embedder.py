@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import TEXT_BATCH_QUEUE_DEPTH, TEXT_BATCH_SIZE
+from .interfaces import TextEmbedder
+
+logger = logging.getLogger("BatchingTextEmbedder")
+
+
+class BatchingTextEmbedder(TextEmbedder):
+    """Собирает запросы из всех gRPC-потоков в общие батчи для обёрнутого эмбеддера.
+
+    Батч отправляется в модель, как только набралось max_batch_size текстов
+    или с момента первого запроса в батче прошло max_wait_ms миллисекунд.
+    При concurrency > 1 несколько батчей обрабатываются одновременно — для
+    эмбеддера, который сам параллелится (например, пул процессов).
+    Размеры батчей и глубина очереди видны в /metrics с меткой embedder=name.
+    """
+
+    def __init__(self, embedder: TextEmbedder, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 concurrency: int = 1, name: str = "sbert"):
+        self.embedder = embedder
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._max_queue_depth = 0
+        self._closed = False
+        TEXT_BATCH_QUEUE_DEPTH.track(self._queue.qsize, embedder=name)
+        self._workers = [threading.Thread(target=self._run, name=f"text-embedder-batcher-{idx}", daemon=True)
+                         for idx in range(concurrency)]
+        for worker in self._workers:
+            worker.start()
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self._submit(text).result()
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        futures = self.submit_texts(texts)
+        return np.stack([future.result() for future in futures])
+
+    def submit_texts(self, texts: list[str]) -> list[Future]:
+        return [self._submit(text) for text in texts]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "batches": self._batches,
+                "items": self._items,
+                "avg_batch_size": self._items / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch,
+            }
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def _submit(self, text: str) -> Future:
+        if self._closed:
+            raise RuntimeError("BatchingTextEmbedder закрыт")
+        future: Future = Future()
+        self._queue.put((text, future))
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._max_queue_depth = max(self._max_queue_depth, depth)
+        return future
+
+    def _collect_batch(self) -> list | None:
+        first = self._queue.get()
+        if first is None:
+            # Сигнал остановки остаётся в очереди для остальных потоков.
+            self._queue.put(None)
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Дообрабатываем собранное и передаём сигнал остановки следующей итерации.
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.embedder.encode_texts(texts)
+                if len(vectors) != len(batch):
+                    # Иначе часть вызывающих не получит ни вектора, ни ошибки и будет ждать вечно.
+                    raise RuntimeError(f"Эмбеддер вернул {len(vectors)} векторов на {len(batch)} текстов")
+            except Exception as e:
+                logger.error(f"Ошибка при кодировании батча из {len(texts)} текстов: {e}", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            TEXT_BATCH_SIZE.observe(len(batch), embedder=self.name)
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._max_batch = max(self._max_batch, len(batch))
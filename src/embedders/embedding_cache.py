@@ -0,0 +1,271 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+from metrics import EMBEDDING_CACHE_HIT_RATE
+from .interfaces import TextEmbedder
+
+logger = logging.getLogger("EmbeddingCache")
+
+KEY_SIZE = 32  # sha256
+DIGEST_SIZE = 8  # blake2b вектора рядом с ключом: по нему при загрузке отбрасываются недописанные строки
+DISK_FORMAT = 2
+
+
+class EmbeddingCache:
+    """Кэш эмбеддингов по хэшу содержимого и идентификатору модели.
+
+    Первый уровень — LRU в памяти, второй (необязательный) — кольцевой буфер
+    float32-векторов в memory-mapped файле, переживающий перезапуск сервиса.
+    Рядом с ним лежит заголовок (модель, размерность, ёмкость): файл, записанный
+    с другими параметрами, не читается, а пересоздаётся. Ключ строки пишется
+    после вектора вместе с его дайджестом, и строка, чей вектор не совпал с
+    дайджестом (сбой между записями), при загрузке пропускается.
+    """
+
+    def __init__(self, model_id: str, dim: int, max_entries: int = 100_000,
+                 disk_path: str | None = None, disk_capacity: int = 200_000):
+        self.model_id = model_id
+        self.dim = dim
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._disk_vectors = None
+        self._disk_keys = None
+        self._disk_index: dict[bytes, int] = {}
+        self._disk_next = 0
+        if disk_path:
+            self._open_disk(disk_path, disk_capacity)
+        EMBEDDING_CACHE_HIT_RATE.track(lambda: self.stats()["hit_rate"], model=model_id)
+
+    def key(self, content: bytes, modality: str = "") -> bytes:
+        digest = hashlib.sha256()
+        digest.update(f"{self.model_id}:{modality}".encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(content)
+        return digest.digest()
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return vector
+            row = self._disk_index.get(key)
+            if row is not None:
+                vector = np.array(self._disk_vectors[row])
+                self._remember(key, vector)
+                self._hits += 1
+                self._disk_hits += 1
+                return vector
+            self._misses += 1
+            return None
+
+    def put(self, key: bytes, vector) -> None:
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.dim,):
+            # Пустые и битые ответы эмбеддеров не кэшируем.
+            return
+        with self._lock:
+            self._remember(key, vector)
+            if self._disk_vectors is not None and key not in self._disk_index:
+                self._write_disk(key, vector)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk_index),
+            }
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._disk_vectors is not None:
+                self._disk_vectors.flush()
+                self._disk_keys.flush()
+
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_header(self, capacity: int) -> dict:
+        return {"model_id": self.model_id, "dim": self.dim, "capacity": capacity, "format": DISK_FORMAT}
+
+    def _open_disk(self, path: str, capacity: int) -> None:
+        keys_path = f"{path}.keys"
+        header_path = f"{path}.json"
+        mode = "w+"
+        if os.path.exists(path) and os.path.exists(keys_path):
+            stored = self._read_header(header_path)
+            if stored == self._disk_header(capacity):
+                mode = "r+"
+            else:
+                # Смена модели, SBERT_VECTOR_SIZE или ёмкости: старые строки не того размера, кэш строим заново.
+                logger.warning(f"Дисковый кэш эмбеддингов {path} записан с параметрами {stored}, "
+                               f"ожидались {self._disk_header(capacity)}: файл пересоздаётся.")
+        self._disk_vectors = np.memmap(path, dtype=np.float32, mode=mode, shape=(capacity, self.dim))
+        self._disk_keys = np.memmap(keys_path, dtype=np.uint8, mode=mode, shape=(capacity, KEY_SIZE + DIGEST_SIZE))
+        if mode == "w+":
+            with open(header_path, "w") as header:
+                json.dump(self._disk_header(capacity), header)
+        filled = np.flatnonzero(self._disk_keys[:, :KEY_SIZE].any(axis=1))
+        torn = 0
+        for row in filled:
+            if self._disk_keys[row, KEY_SIZE:].tobytes() != self._vector_digest(self._disk_vectors[row]):
+                self._disk_keys[row] = 0
+                torn += 1
+                continue
+            self._disk_index[self._disk_keys[row, :KEY_SIZE].tobytes()] = int(row)
+        self._disk_next = len(filled) % capacity
+        if torn:
+            logger.warning(f"Дисковый кэш эмбеддингов {path}: {torn} недописанных строк отброшено.")
+        logger.info(f"Дисковый кэш эмбеддингов {path}: загружено {len(self._disk_index)} векторов.")
+
+    @staticmethod
+    def _vector_digest(vector) -> bytes:
+        return hashlib.blake2b(np.ascontiguousarray(vector, dtype=np.float32).tobytes(),
+                               digest_size=DIGEST_SIZE).digest()
+
+    @staticmethod
+    def _read_header(header_path: str) -> dict | None:
+        try:
+            with open(header_path) as header:
+                return json.load(header)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: bytes, vector: np.ndarray) -> None:
+        row = self._disk_next
+        self._disk_index.pop(self._disk_keys[row, :KEY_SIZE].tobytes(), None)
+        # Сначала гасим старый ключ, затем пишем вектор и только потом ключ с дайджестом нового вектора.
+        self._disk_keys[row] = 0
+        self._disk_vectors[row] = vector
+        self._disk_keys[row] = np.frombuffer(key + self._vector_digest(vector), dtype=np.uint8)
+        self._disk_index[key] = row
+        self._disk_next = (row + 1) % len(self._disk_keys)
+
+
+class CachedTextEmbedder(TextEmbedder):
+    def __init__(self, embedder: TextEmbedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.encode_texts([text])[0]
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        keys = [self.cache.key(text.encode("utf-8")) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Повторы внутри одного батча кодируем один раз.
+            unique = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = dict(zip(unique, self.embedder.encode_texts(unique)))
+            for i in missing:
+                vectors[i] = encoded[texts[i]]
+                self.cache.put(keys[i], vectors[i])
+        return np.stack(vectors)
+
+    def submit_texts(self, texts: list[str]) -> list[Future] | None:
+        keys = [self.cache.key(text.encode("utf-8")) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        unique = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        submitted = self.embedder.submit_texts(unique) if unique else []
+        if submitted is None:
+            return None
+        encoded = dict(zip(unique, submitted))
+        futures = []
+        for text, key, vector in zip(texts, keys, vectors):
+            if vector is None:
+                future = encoded[text]
+                future.add_done_callback(functools.partial(self._store, key))
+            else:
+                future = Future()
+                future.set_result(vector)
+            futures.append(future)
+        return futures
+
+    def _store(self, key: bytes, future: Future) -> None:
+        if future.exception() is None:
+            self.cache.put(key, future.result())
+
+
+class CachedOnePeaceClient:
+    def __init__(self, client, cache: EmbeddingCache):
+        self.client = client
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def encode_text(self, text: str):
+        return self.encode_texts([text])[0]
+
+    def encode_texts(self, texts: list[str]):
+        return self._cached("text", [text.encode("utf-8") for text in texts],
+                            lambda missing: self.client.encode_texts([m.decode("utf-8") for m in missing]))
+
+    def encode_image_bytes(self, content: bytes):
+        return self.encode_images([content])[0]
+
+    def encode_images(self, contents: list[bytes]):
+        return self._cached("image", contents, self.client.encode_images)
+
+    def _cached(self, modality: str, contents: list[bytes], encode):
+        keys, vectors, unique = self._lookup(modality, contents)
+        if unique:
+            self._store(contents, keys, vectors, dict(zip(unique, encode(unique))))
+        return vectors
+
+    def _lookup(self, modality: str, contents: list[bytes]) -> tuple[list[bytes], list, list[bytes]]:
+        keys = [self.cache.key(content, modality) for content in contents]
+        vectors = [self.cache.get(key) for key in keys]
+        unique = list(dict.fromkeys(content for content, vector in zip(contents, vectors) if vector is None))
+        return keys, vectors, unique
+
+    def _store(self, contents: list[bytes], keys: list[bytes], vectors: list, encoded: dict) -> None:
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                vectors[i] = encoded[contents[i]]
+                self.cache.put(keys[i], vectors[i])
+
+
+class AsyncCachedOnePeaceClient(CachedOnePeaceClient):
+    async def encode_text(self, text: str):
+        return (await self.encode_texts([text]))[0]
+
+    async def encode_texts(self, texts: list[str]):
+        contents = [text.encode("utf-8") for text in texts]
+        keys, vectors, unique = self._lookup("text", contents)
+        if unique:
+            encoded = await self.client.encode_texts([content.decode("utf-8") for content in unique])
+            self._store(contents, keys, vectors, dict(zip(unique, encoded)))
+        return vectors
+
+    async def encode_image_bytes(self, content: bytes):
+        return (await self.encode_images([content]))[0]
+
+    async def encode_images(self, contents: list[bytes]):
+        keys, vectors, unique = self._lookup("image", contents)
+        if unique:
+            self._store(contents, keys, vectors, dict(zip(unique, await self.client.encode_images(unique))))
+        return vectors
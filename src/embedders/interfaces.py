@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 
 import numpy as np
 from PIL import Image
@@ -9,6 +10,15 @@ class TextEmbedder(ABC):
     def encode_text(self, text: str) -> np.ndarray:
         pass
 
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        # Реализации с поддержкой батчей переопределяют этот метод одним forward-проходом.
+        return np.stack([self.encode_text(text) for text in texts])
+
+    def submit_texts(self, texts: list[str]) -> list[Future] | None:
+        # Неблокирующая постановка текстов, чьи векторы считают другие потоки; None — такой возможности нет,
+        # и encode_texts вызывают в пуле потоков.
+        return None
+
 
 class ImageEmbedder(ABC):
     @abstractmethod
@@ -1,86 +1,258 @@
 import logging
+import queue
+import time
 
 import grpc
+import numpy as np
 import one_peace_service_pb2 as pb2
 import one_peace_service_pb2_grpc as pb2_grpc
 from PIL.Image import Image
-import soundfile as sf
 from io import BytesIO
 
 from cloudberry_storage_pb2 import ImageContentType
+from .resilience import CHANNEL_OPTIONS, ONE_PEACE_EVENTS, RETRYABLE_CODES, CircuitBreaker, Endpoint, EndpointPool, \
+    OnePeaceCircuitOpenError, OnePeaceError, OnePeaceRequestError, RetryPolicy, typed_error
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger("OnePeaceClient")
 
 
-class OnePeaceClient:
-    def __init__(self, host='localhost', port=60061):
-        self.host = host
-        self.port = port
+def response_vector(response: pb2.VectorResponse) -> np.ndarray:
+    # Новые версии сервиса присылают vector_f32, старые — только repeated float.
+    if response.vector_f32:
+        return np.frombuffer(response.vector_f32, dtype="<f4")
+    return np.asarray(response.vector, dtype=np.float32)
+
+
+def split_batches(items: list, sizes: list[int], max_count: int, max_bytes: int):
+    # Делим пачку по числу элементов и по объёму, чтобы не упереться в лимит размера gRPC-сообщения.
+    chunk, chunk_bytes = [], 0
+    for item, size in zip(items, sizes):
+        if chunk and (len(chunk) >= max_count or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(item)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+class _ResilientClientBase:
+    """Общая часть синхронного и асинхронного клиентов: экземпляры, политика повторов и журналирование."""
+
+    def __init__(self, host: str, port: int, max_batch_size: int, max_batch_bytes: int,
+                 endpoints: list[str] | None, policy: RetryPolicy | None, failure_threshold: int,
+                 reset_timeout: float, make_channel):
+        self.max_batch_size = max_batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.policy = policy or RetryPolicy()
+        # Сбрасывается при первом UNIMPLEMENTED от старой версии сервиса.
+        self._batch_supported = True
+        addresses = endpoints or [f"{host}:{port}"]
+        logger.info(f"Каналы к ONE-PEACE: {', '.join(addresses)}")
+        self.pool = EndpointPool([
+            Endpoint(address, channel, pb2_grpc.OnePeaceEmbedderStub(channel),
+                     CircuitBreaker(failure_threshold, reset_timeout))
+            for address, channel in ((address, make_channel(address)) for address in addresses)
+        ])
+
+    @staticmethod
+    def _record(endpoint: Endpoint, error: grpc.RpcError | None = None) -> None:
+        if error is None or error.code() not in RETRYABLE_CODES:
+            # Экземпляр ответил (пусть и отказом на сам запрос), значит, он жив.
+            endpoint.breaker.record_success()
+        else:
+            endpoint.breaker.record_failure()
+
+    def _hedge_endpoint(self, endpoint: Endpoint, tried: list[Endpoint]) -> Endpoint | None:
         try:
-            logger.info(f"Попытка подключения к gRPC-сервису ONE-PEACE по адресу {host}:{port}...")
-            channel = grpc.insecure_channel(f"{host}:{port}")
-            self.stub = pb2_grpc.OnePeaceEmbedderStub(channel)
-            logger.info("Подключение к ONE-PEACE успешно установлено.")
-        except Exception as e:
-            logger.exception(f"Ошибка при подключении к ONE-PEACE gRPC-сервису: {e}")
-
-    def encode_text(self, text: str):
-        logger.info(f"Получен текст для эмбеддинга: '{text}'")
+            hedge_endpoint = self.pool.pick(exclude=[endpoint, *tried])
+        except OnePeaceCircuitOpenError:
+            return None
+        ONE_PEACE_EVENTS.inc(endpoint=hedge_endpoint.address, event="hedge")
+        # Если откажут оба, повтор пойдёт в обход и хеджа, а не на только что отказавший экземпляр.
+        tried.append(hedge_endpoint)
+        return hedge_endpoint
+
+    @staticmethod
+    def _record_hedge_win(endpoint: Endpoint, hedge_endpoint: Endpoint, primary_done: bool) -> None:
+        if not primary_done and hedge_endpoint is not endpoint:
+            # Основной экземпляр не успел, пока ответил другой: для его breaker это отказ, как и таймаут,
+            # иначе зависший экземпляр, которого всегда выручает хедж, не выходит из ротации.
+            endpoint.breaker.record_failure()
+
+    def _on_error(self, endpoint: Endpoint, method: str, error: grpc.RpcError, attempt: int) -> OnePeaceError:
+        # Breaker уже обновлён в _invoke по тому экземпляру, который на самом деле ответил.
+        typed = typed_error(error, endpoint.address, method)
+        if error.code() not in RETRYABLE_CODES:
+            raise typed
+        if attempt < self.policy.retries:
+            ONE_PEACE_EVENTS.inc(endpoint=endpoint.address, event="retry")
+            logger.warning(f"Ошибка ONE-PEACE, повторяем запрос: {typed}")
+        return typed
+
+    @staticmethod
+    def _batch_vectors(method: str, response, chunk: list) -> list[np.ndarray]:
+        if len(response.vectors) != len(chunk):
+            # Иначе векторы следующих элементов молча достались бы чужим тикетам.
+            raise OnePeaceError(f"{method} вернул {len(response.vectors)} векторов на {len(chunk)} элементов")
+        return [response_vector(v) for v in response.vectors]
+
+    @staticmethod
+    def _unimplemented(error: OnePeaceError) -> bool:
+        return error.code == grpc.StatusCode.UNIMPLEMENTED
+
+    def _chunks(self, items: list, sizes: list[int]):
+        return split_batches(items, sizes, self.max_batch_size, self.max_batch_bytes)
+
+
+class OnePeaceClient(_ResilientClientBase):
+    """Клиент ONE-PEACE поверх нескольких экземпляров сервиса.
+
+    Запросы распределяются по экземплярам по кругу. У каждой попытки есть
+    дедлайн; при недоступности или таймауте запрос повторяется на другом
+    экземпляре с экспоненциальной паузой, а медленный запрос можно
+    продублировать (hedge_after). Ошибки поднимаются как OnePeaceError.
+    """
+
+    def __init__(self, host='localhost', port=60061, max_batch_size=32, max_batch_bytes=3 * 1024 * 1024,
+                 endpoints: list[str] | None = None, policy: RetryPolicy | None = None,
+                 failure_threshold: int = 5, reset_timeout: float = 10.0):
+        super().__init__(host, port, max_batch_size, max_batch_bytes, endpoints, policy, failure_threshold,
+                         reset_timeout, lambda address: grpc.insecure_channel(address, options=CHANNEL_OPTIONS))
+
+    def encode_text(self, text: str) -> np.ndarray:
+        logger.debug("Получен текст для эмбеддинга: '%s'", text)
+        return response_vector(self._call("EncodeText", pb2.TextRequest(text=text)))
+
+    def encode_image(self, image: Image, content_type: ImageContentType) -> np.ndarray:
+        logger.debug("Получено изображение для эмбеддинга. Размер: %s, формат: %s", image.size, image.mode)
+        return self.encode_image_bytes(self._serialize_image(image, content_type))
+
+    def encode_image_bytes(self, content: bytes) -> np.ndarray:
+        return response_vector(self._call("EncodeImage", pb2.ImageRequest(content=content)))
+
+    def encode_texts(self, texts: list[str]) -> list[np.ndarray]:
+        logger.debug("Получено %d текстов для пакетного эмбеддинга", len(texts))
+        if not self._batch_supported:
+            return [self.encode_text(text) for text in texts]
         try:
-            request = pb2.TextRequest(text=text)
-            response = self.stub.EncodeText(request)
-            logger.info(f"Эмбеддинг текста успешно получен. Размер вектора: {len(response.vector)}")
-            return list(response.vector)
-        except grpc.RpcError as e:
-            logger.error(f"gRPC-ошибка при вызове EncodeText: {e.details()} (code={e.code()})")
-        except Exception as e:
-            logger.exception(f"Непредвиденная ошибка при вызове EncodeText: {e}")
-        return []
+            vectors = []
+            for chunk in self._chunks(texts, [len(text.encode("utf-8")) for text in texts]):
+                response = self._call("EncodeTexts", pb2.TextBatchRequest(texts=chunk))
+                vectors.extend(self._batch_vectors("EncodeTexts", response, chunk))
+            return vectors
+        except OnePeaceRequestError as e:
+            if not self._unimplemented(e):
+                raise
+            logger.warning("Сервис ONE-PEACE не поддерживает пакетные RPC, переходим на поштучные вызовы.")
+            self._batch_supported = False
+            return [self.encode_text(text) for text in texts]
 
-    def encode_image(self, image: Image, content_type: ImageContentType):
-        logger.info(f"Получено изображение для эмбеддинга. Размер: {image.size}, формат: {image.mode}")
+    def encode_images(self, contents: list[bytes]) -> list[np.ndarray]:
+        logger.debug("Получено %d изображений для пакетного эмбеддинга", len(contents))
+        if not self._batch_supported:
+            return [self.encode_image_bytes(content) for content in contents]
         try:
-            if content_type == ImageContentType.PNG:
-                format_str = "PNG"
-            elif content_type == ImageContentType.JPEG:
-                format_str = "JPEG"
-            else:
-                raise ValueError(f"Неподдерживаемый формат изображения: {content_type}")
-
-            buffer = BytesIO()
-            image.save(buffer, format=format_str)
-            image_bytes = buffer.getvalue()
-
-            logger.info(f"Изображение сериализовано в формате {format_str}, размер {len(image_bytes)} байт")
-
-            request = pb2.ImageRequest(content=image_bytes)
-            response = self.stub.EncodeImage(request)
-            logger.info(f"Эмбеддинг изображения успешно получен. Размер вектора: {len(response.vector)}")
-            return list(response.vector)
-        except grpc.RpcError as e:
-            logger.error(f"gRPC-ошибка при вызове EncodeImage: {e.details()} (code={e.code()})")
-        except Exception as e:
-            logger.exception(f"Непредвиденная ошибка при вызове EncodeImage: {e}")
-        return []
+            vectors = []
+            for chunk in self._chunks(contents, [len(content) for content in contents]):
+                response = self._call("EncodeImages", pb2.ImageBatchRequest(contents=chunk))
+                vectors.extend(self._batch_vectors("EncodeImages", response, chunk))
+            return vectors
+        except OnePeaceRequestError as e:
+            if not self._unimplemented(e):
+                raise
+            logger.warning("Сервис ONE-PEACE не поддерживает пакетные RPC, переходим на поштучные вызовы.")
+            self._batch_supported = False
+            return [self.encode_image_bytes(content) for content in contents]
 
-    def encode_audio(self, audio_path: str):
-        logger.info(f"Получен аудиофайл для эмбеддинга: {audio_path}")
+    def _call(self, method: str, request):
+        tried: list[Endpoint] = []
+        error: OnePeaceError | None = None
+        for attempt in range(self.policy.retries + 1):
+            if attempt:
+                time.sleep(self.policy.delay(attempt))
+            endpoint = self.pool.pick(exclude=tried)
+            tried.append(endpoint)
+            try:
+                return self._invoke(endpoint, method, request, tried)
+            except grpc.RpcError as e:
+                error = self._on_error(endpoint, method, e, attempt)
+        logger.error(f"ONE-PEACE не ответил после {self.policy.retries + 1} попыток: {error}")
+        raise error
+
+    def _invoke(self, endpoint: Endpoint, method: str, request, tried: list[Endpoint]):
+        timeout = self.policy.timeout
+        primary = getattr(endpoint.stub, method).future(request, timeout=timeout)
+        try:
+            if self.policy.hedge_after:
+                try:
+                    primary.exception(timeout=self.policy.hedge_after)
+                except grpc.FutureTimeoutError:
+                    hedge_endpoint = self._hedge_endpoint(endpoint, tried)
+                    if hedge_endpoint is not None:
+                        return self._hedge(endpoint, primary, hedge_endpoint, method, request)
+            return self._settle(endpoint, primary)
+        finally:
+            primary.cancel()
+
+    def _hedge(self, endpoint: Endpoint, primary, hedge_endpoint: Endpoint, method: str, request):
+        hedge = getattr(hedge_endpoint.stub, method).future(request, timeout=self.policy.timeout)
+        calls = {primary: endpoint, hedge: hedge_endpoint}
+        # Берём первый успешный ответ; второй запрос отменяем, чтобы не занимать экземпляр зря.
+        done: queue.Queue = queue.Queue()
+        primary.add_done_callback(done.put)
+        hedge.add_done_callback(done.put)
+        try:
+            for _ in calls:
+                call = done.get()
+                error = call.exception()
+                self._record(calls[call], error)
+                if error is None:
+                    if call is hedge:
+                        self._record_hedge_win(endpoint, hedge_endpoint, primary.done())
+                    return call.result()
+            raise primary.exception()
+        finally:
+            hedge.cancel()
+
+    def _settle(self, endpoint: Endpoint, call):
         try:
-            waveform, sample_rate = sf.read(audio_path, dtype='float32')
-            if waveform.ndim > 1:
-                waveform = waveform.mean(axis=1)
-                logger.info("Аудиофайл был многоканальным, преобразован в моно.")
-            content = waveform.tobytes()
-            request = pb2.AudioRequest(content=content, sample_rate=sample_rate)
-            response = self.stub.EncodeAudio(request)
-            logger.info(f"Эмбеддинг аудио успешно получен. Размер вектора: {len(response.vector)}")
-            return list(response.vector)
+            response = call.result()
         except grpc.RpcError as e:
-            logger.error(f"gRPC-ошибка при вызове EncodeAudio: {e.details()} (code={e.code()})")
-        except Exception as e:
-            logger.exception(f"Непредвиденная ошибка при вызове EncodeAudio: {e}")
-        return []
+            self._record(endpoint, e)
+            raise
+        self._record(endpoint)
+        return response
+
+    @staticmethod
+    def _serialize_image(image: Image, content_type: ImageContentType) -> bytes:
+        if content_type == ImageContentType.PNG:
+            format_str = "PNG"
+        elif content_type == ImageContentType.JPEG:
+            format_str = "JPEG"
+        else:
+            raise ValueError(f"Неподдерживаемый формат изображения: {content_type}")
+
+        buffer = BytesIO()
+        image.save(buffer, format=format_str)
+        image_bytes = buffer.getvalue()
+
+        logger.debug("Изображение сериализовано в формате %s, размер %d байт", format_str, len(image_bytes))
+        return image_bytes
+
+    def encode_audio(self, audio_path: str) -> np.ndarray:
+        logger.info(f"Получен аудиофайл для эмбеддинга: {audio_path}")
+        # soundfile нужен только для аудио, поэтому не импортируем его при старте сервиса.
+        import soundfile as sf
+        waveform, sample_rate = sf.read(audio_path, dtype='float32')
+        if waveform.ndim > 1:
+            waveform = waveform.mean(axis=1)
+            logger.info("Аудиофайл был многоканальным, преобразован в моно.")
+        request = pb2.AudioRequest(content=waveform.tobytes(), sample_rate=sample_rate)
+        vector = response_vector(self._call("EncodeAudio", request))
+        logger.info(f"Эмбеддинг аудио успешно получен. Размер вектора: {len(vector)}")
+        return vector
 
 # if __name__ == "__main__":
 #     client = OnePeaceClient()
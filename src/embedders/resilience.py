@@ -0,0 +1,152 @@
+import itertools
+import random
+import threading
+import time
+
+import grpc
+
+from metrics import REGISTRY, Counter
+
+# Эти коды означают проблему с конкретным экземпляром или сетью: запрос можно повторить на другом.
+RETRYABLE_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.ABORTED,
+)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", MAX_MESSAGE_BYTES),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_BYTES),
+    # Keepalive замечает «зависшее» соединение (например, после перезапуска узла) без ожидания дедлайна.
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+]
+
+ONE_PEACE_EVENTS = REGISTRY.register(Counter(
+    "cloudberry_one_peace_events_total", "Повторы, хеджирование и срабатывания circuit breaker клиента ONE-PEACE.",
+    ("endpoint", "event")
+))
+
+
+class OnePeaceError(Exception):
+    """Базовая ошибка вызова ONE-PEACE; status_code — код, с которым её стоит вернуть нашему клиенту."""
+    status_code = grpc.StatusCode.INTERNAL
+
+    def __init__(self, message: str, code: grpc.StatusCode | None = None):
+        super().__init__(message)
+        self.code = code
+
+
+class OnePeaceUnavailableError(OnePeaceError):
+    status_code = grpc.StatusCode.UNAVAILABLE
+
+
+class OnePeaceTimeoutError(OnePeaceError):
+    status_code = grpc.StatusCode.DEADLINE_EXCEEDED
+
+
+class OnePeaceCircuitOpenError(OnePeaceUnavailableError):
+    pass
+
+
+class OnePeaceRequestError(OnePeaceError):
+    """Сервис ответил, но отверг запрос (INVALID_ARGUMENT, UNIMPLEMENTED и т. п.): повтор не поможет."""
+
+
+def typed_error(error: grpc.RpcError, endpoint: str, method: str) -> OnePeaceError:
+    code = error.code()
+    message = f"{method} на {endpoint}: {error.details()} (code={code})"
+    if code == grpc.StatusCode.DEADLINE_EXCEEDED:
+        return OnePeaceTimeoutError(message, code)
+    if code in RETRYABLE_CODES:
+        return OnePeaceUnavailableError(message, code)
+    return OnePeaceRequestError(message, code)
+
+
+class CircuitBreaker:
+    """После failure_threshold ошибок подряд экземпляр считается недоступным.
+
+    Пока breaker открыт, вызовы на экземпляр не идут вовсе; раз в reset_timeout
+    пропускается одна пробная попытка, и первый успех закрывает breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                # Следующая проба — не раньше чем через reset_timeout, даже если результат этой не придёт.
+                self._opened_at = self._clock()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class Endpoint:
+    def __init__(self, address: str, channel, stub, breaker: CircuitBreaker):
+        self.address = address
+        self.channel = channel
+        self.stub = stub
+        self.breaker = breaker
+
+
+class EndpointPool:
+    """Каналы к нескольким экземплярам сервиса с выбором по кругу в обход открытых breaker."""
+
+    def __init__(self, endpoints: list[Endpoint]):
+        self.endpoints = endpoints
+        self._counter = itertools.count()
+
+    def pick(self, exclude: list[Endpoint] = ()) -> Endpoint:
+        start = next(self._counter)
+        ordered = [self.endpoints[(start + i) % len(self.endpoints)] for i in range(len(self.endpoints))]
+        # Повтор по возможности идёт на другой экземпляр; если других нет — на тот же.
+        for candidates in ([e for e in ordered if e not in exclude], ordered):
+            for endpoint in candidates:
+                if endpoint.breaker.allow():
+                    return endpoint
+        for endpoint in self.endpoints:
+            ONE_PEACE_EVENTS.inc(endpoint=endpoint.address, event="circuit_open")
+        raise OnePeaceCircuitOpenError(
+            f"Все экземпляры ONE-PEACE недоступны: {', '.join(e.address for e in self.endpoints)}"
+        )
+
+
+class RetryPolicy:
+    def __init__(self, timeout: float = 10.0, retries: int = 2, backoff: float = 0.1, max_backoff: float = 2.0,
+                 hedge_after: float | None = None):
+        # Дедлайн одной попытки; всего на вызов уходит не больше (retries + 1) * timeout плюс паузы.
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Через сколько секунд без ответа отправить тот же запрос на второй экземпляр; None — без хеджирования.
+        self.hedge_after = hedge_after
+
+    def delay(self, attempt: int) -> float:
+        # Экспоненциальная пауза с полным джиттером, чтобы повторы разных клиентов не шли волной.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
@@ -1,12 +1,93 @@
+import logging
+import threading
+import time
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
 from .interfaces import TextEmbedder
 
+SBERT_MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+logger = logging.getLogger("SBERTEmbedder")
+
+
+def _set_torch_threads(threads: int) -> None:
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+
+
+def _load_torch(model_name: str, threads: int):
+    from sentence_transformers import SentenceTransformer
+    _set_torch_threads(threads)
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def _load_torch_int8(model_name: str, threads: int):
+    import torch
+    model = _load_torch(model_name, threads)
+    # Динамическая квантизация: веса Linear в int8, активации квантуются на лету; на CPU это основная часть времени.
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name: str, threads: int):
+    import onnxruntime
+    from sentence_transformers import SentenceTransformer
+    session_options = onnxruntime.SessionOptions()
+    if threads:
+        session_options.intra_op_num_threads = threads
+    return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs={
+        "provider": "CPUExecutionProvider",
+        "session_options": session_options,
+    })
+
+
+SBERT_BACKENDS = {
+    "torch": _load_torch,
+    "torch-int8": _load_torch_int8,
+    "onnx": _load_onnx,
+}
+
 
 class SBERTEmbedder(TextEmbedder):
-    def __init__(self):
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+    """Модель грузится в фоновом потоке, чтобы сервер открывал порт сразу; encode ждёт окончания загрузки."""
+
+    def __init__(self, batch_size: int = 64, model_name: str = SBERT_MODEL_NAME, backend: str = "torch",
+                 threads: int = 0):
+        if backend not in SBERT_BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд SBERT: {backend}. Доступны: {', '.join(SBERT_BACKENDS)}")
+        self.batch_size = batch_size
+        self.model_name = model_name
+        self.backend = backend
+        # 0 — число потоков по умолчанию у torch/onnxruntime (все ядра).
+        self.threads = threads
+        self._model = None
+        self._load_error: Exception | None = None
+        self._loaded = threading.Event()
+        threading.Thread(target=self._load, name="sbert-load", daemon=True).start()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            # sentence_transformers тянет за собой torch: импорт занимает секунды, поэтому он здесь, а не в начале модуля.
+            self._model = SBERT_BACKENDS[self.backend](self.model_name, self.threads)
+            logger.info(f"Модель {self.model_name} ({self.backend}) загружена за {time.perf_counter() - started:.1f} с.")
+        except Exception as e:
+            self._load_error = e
+            logger.error(f"Не удалось загрузить модель {self.model_name} ({self.backend}): {e}")
+        finally:
+            self._loaded.set()
+
+    @property
+    def model(self):
+        self._loaded.wait()
+        if self._load_error is not None:
+            raise RuntimeError(f"Модель {self.model_name} не загружена") from self._load_error
+        return self._model
 
     def encode_text(self, text: str) -> np.ndarray:
         return self.model.encode(text)
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        # SentenceTransformer.encode сам группирует тексты по длине и возвращает векторы в исходном порядке.
+        return np.asarray(self.model.encode(texts, batch_size=self.batch_size))
@@ -0,0 +1,90 @@
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from cloudberry_storage_pb2 import FindRequest
+from translation import normalize_query
+
+
+class TtlLruCache:
+    """LRU в памяти с необязательным временем жизни записи (ttl в секундах, None — бессрочно)."""
+
+    def __init__(self, max_entries: int, ttl: float | None = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key, value) -> None:
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+def content_digest(content: bytes) -> bytes:
+    return hashlib.sha256(content).digest()
+
+
+class FindResultCache(TtlLruCache):
+    """Ответы Find по бакету, нормализованному запросу, хэшам картинок и top_k.
+
+    У каждого бакета есть поколение, которое увеличивают PutEntry, RemoveEntry и
+    DestroyBucket. Поколение входит в ключ и читается до начала поиска, поэтому
+    ответ, посчитанный параллельно с записью, попадает под старый ключ и больше
+    никому не достаётся; устаревшие записи вытесняются LRU и TTL.
+    """
+
+    def __init__(self, max_entries: int, ttl: float | None = None, clock=time.monotonic):
+        super().__init__(max_entries, ttl, clock)
+        # Поколения берутся из общего счётчика и никогда не повторяются, даже после удаления бакета.
+        self._generation_counter = itertools.count(1)
+        self._generations: dict[str, int] = {}
+
+    def generation(self, bucket_uuid: str) -> int:
+        with self._lock:
+            return self._generations.get(bucket_uuid, 0)
+
+    def invalidate(self, bucket_uuid: str) -> None:
+        with self._lock:
+            self._generations[bucket_uuid] = next(self._generation_counter)
+
+    def request_key(self, request: FindRequest, top_k: int) -> tuple:
+        return (
+            request.bucket_uuid,
+            self.generation(request.bucket_uuid),
+            normalize_query(request.query.content),
+            tuple(content_digest(image.content) for image in request.images),
+            top_k,
+            request.search_params.SerializeToString(deterministic=True),
+        )
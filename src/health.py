@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+
+import cloudberry_storage_pb2 as pb2
+from model_registry import ModelRegistry
+
+logger = logging.getLogger("CloudberryStorage")
+
+# Короткие тексты на обоих языках: первый батч заодно прогревает токенизатор и аллокатор torch.
+WARMUP_TEXTS = ["прогрев модели", "model warm-up"]
+READY_RETRY_INTERVAL = 5.0
+
+SERVICE_NAME = pb2.DESCRIPTOR.services_by_name["CloudberryStorage"].full_name
+
+
+def warm_up(registry: ModelRegistry) -> None:
+    """Пробный батч через SBERT и ONE-PEACE и запрос к Qdrant; исключение — значит, сервис ещё не готов."""
+    registry.text_embedder.encode_texts(WARMUP_TEXTS)
+    vectors = registry.one_peace_client.encode_texts(WARMUP_TEXTS)
+    if not vectors or not all(len(vector) for vector in vectors):
+        raise RuntimeError("ONE-PEACE не вернул эмбеддинги")
+    registry.qdrant_client.get_collections()
+
+
+async def warm_up_async(registry: ModelRegistry, encode_texts) -> None:
+    await encode_texts(WARMUP_TEXTS)
+    vectors = await registry.one_peace_client.encode_texts(WARMUP_TEXTS)
+    if not vectors or not all(len(vector) for vector in vectors):
+        raise RuntimeError("ONE-PEACE не вернул эмбеддинги")
+    await registry.qdrant_client.get_collections()
+
+
+def wait_until_ready(check, retry_interval: float = READY_RETRY_INTERVAL) -> float:
+    """Повторяет check, пока он не пройдёт; возвращает время от вызова до готовности в секундах."""
+    started = time.perf_counter()
+    while True:
+        try:
+            check()
+            break
+        except Exception as e:
+            logger.warning(f"Сервис ещё не готов: {e}. Повтор через {retry_interval:.0f} с.")
+            time.sleep(retry_interval)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Модели прогреты, Qdrant доступен: сервис готов через {elapsed:.1f} с.")
+    return elapsed
+
+
+async def wait_until_ready_async(check, retry_interval: float = READY_RETRY_INTERVAL) -> float:
+    started = time.perf_counter()
+    while True:
+        try:
+            await check()
+            break
+        except Exception as e:
+            logger.warning(f"Сервис ещё не готов: {e}. Повтор через {retry_interval:.0f} с.")
+            await asyncio.sleep(retry_interval)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Модели прогреты, Qdrant доступен: сервис готов через {elapsed:.1f} с.")
+    return elapsed
+
+
+def add_health_servicer(server):
+    """Стандартный grpc.health.v1 со статусом NOT_SERVING до окончания прогрева."""
+    from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+    servicer = health.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(servicer, server)
+    _set_status(servicer, health_pb2.HealthCheckResponse.NOT_SERVING)
+    return servicer
+
+
+def mark_serving(servicer) -> None:
+    from grpc_health.v1 import health_pb2
+    _set_status(servicer, health_pb2.HealthCheckResponse.SERVING)
+
+
+def _set_status(servicer, status) -> None:
+    # Пустое имя — статус сервера целиком, его проверяют балансировщики и grpc_health_probe по умолчанию.
+    for service in ("", SERVICE_NAME):
+        servicer.set(service, status)
+
+
+async def add_async_health_servicer(server):
+    from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+    servicer = health.aio.HealthServicer()
+    health_pb2_grpc.add_HealthServicer_to_server(servicer, server)
+    await _set_status_async(servicer, health_pb2.HealthCheckResponse.NOT_SERVING)
+    return servicer
+
+
+async def mark_serving_async(servicer) -> None:
+    from grpc_health.v1 import health_pb2
+    await _set_status_async(servicer, health_pb2.HealthCheckResponse.SERVING)
+
+
+async def _set_status_async(servicer, status) -> None:
+    for service in ("", SERVICE_NAME):
+        await servicer.set(service, status)
@@ -0,0 +1,47 @@
+import logging
+from io import BytesIO
+
+from PIL import Image
+
+logger = logging.getLogger("ImagePreprocessing")
+
+# ONE-PEACE всё равно приводит вход к 256x256 (transforms.Resize((256, 256))),
+# поэтому присылать ему больше пикселей бессмысленно.
+ONE_PEACE_INPUT_SIZE = (256, 256)
+PASSTHROUGH_FORMATS = ("JPEG", "PNG")
+PASSTHROUGH_MODES = ("RGB", "L")
+JPEG_QUALITY = 95
+
+
+def prepare_for_one_peace(content: bytes) -> bytes:
+    # Image.open читает только заголовок, пиксели здесь ещё не декодируются.
+    image = Image.open(BytesIO(content))
+    width, height = image.size
+    if (image.format in PASSTHROUGH_FORMATS and image.mode in PASSTHROUGH_MODES
+            and width <= ONE_PEACE_INPUT_SIZE[0] and height <= ONE_PEACE_INPUT_SIZE[1]):
+        return content
+
+    if image.format == "JPEG":
+        # Масштабирование на этапе DCT: декодер сразу выдаёт картинку в 2/4/8 раз меньше.
+        image.draft("RGB", ONE_PEACE_INPUT_SIZE)
+    image = image.convert("RGB")
+    target_size = (min(image.width, ONE_PEACE_INPUT_SIZE[0]), min(image.height, ONE_PEACE_INPUT_SIZE[1]))
+    if image.size != target_size:
+        image = image.resize(target_size, Image.BILINEAR)
+
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY)
+    prepared = buffer.getvalue()
+    logger.debug("Изображение %dx%d уменьшено для ONE-PEACE: %d -> %d байт", width, height, len(content), len(prepared))
+    return prepared
+
+
+def prepare_many(contents: list[bytes]) -> list[bytes | Exception]:
+    """prepare_for_one_peace для пачки: битая картинка не роняет остальные, на её месте — исключение."""
+    prepared: list[bytes | Exception] = []
+    for content in contents:
+        try:
+            prepared.append(prepare_for_one_peace(content))
+        except Exception as e:
+            prepared.append(e)
+    return prepared
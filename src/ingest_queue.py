@@ -0,0 +1,187 @@
+import logging
+import sqlite3
+import threading
+import time
+
+from cloudberry_storage_pb2 import PutEntryRequest, PutEntryStatus
+
+logger = logging.getLogger("IngestQueue")
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+SUPERSEDED = "superseded"  # более новая версия тикета пришла раньше, чем эту успели взять в работу
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class IngestQueue:
+    """Долговременная очередь PutEntry на SQLite в режиме WAL.
+
+    Запрос сохраняется до ответа клиенту, поэтому после падения процесса
+    необработанные тикеты подхватываются заново (см. recover).
+
+    Версии одного тикета не обрабатываются параллельно: claim_batch берёт только
+    последнюю ожидающую версию тикета, которого нет в работе, а более старые
+    помечает SUPERSEDED. Иначе старая версия могла бы записаться в Qdrant позже новой.
+    """
+
+    def __init__(self, path: str, max_depth: int = 10_000, retention: float = 24 * 3600):
+        self.max_depth = max_depth
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ingest_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bucket_uuid TEXT NOT NULL,
+                external_ticket_id TEXT NOT NULL,
+                request BLOB NOT NULL,
+                state TEXT NOT NULL,
+                error TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ingest_queue_state ON ingest_queue (state, id)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ingest_queue_ticket ON ingest_queue (bucket_uuid, external_ticket_id, id)"
+        )
+        self.recover()
+
+    def recover(self) -> None:
+        with self._lock:
+            cursor = self._conn.execute("UPDATE ingest_queue SET state = ? WHERE state = ?", (PENDING, PROCESSING))
+        if cursor.rowcount:
+            logger.info(f"Возвращено в очередь {cursor.rowcount} тикетов, не обработанных до перезапуска.")
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM ingest_queue WHERE state IN (?, ?)", (PENDING, PROCESSING)
+            ).fetchone()[0]
+
+    def enqueue(self, request: PutEntryRequest) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                depth = self._conn.execute(
+                    "SELECT COUNT(*) FROM ingest_queue WHERE state IN (?, ?)", (PENDING, PROCESSING)
+                ).fetchone()[0]
+                if depth >= self.max_depth:
+                    raise QueueFullError(f"Очередь загрузки переполнена: {depth} тикетов ожидают обработки.")
+                self._conn.execute(
+                    "INSERT INTO ingest_queue (bucket_uuid, external_ticket_id, request, state, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (request.bucket_uuid, request.external_ticket_id, request.SerializeToString(), PENDING,
+                     time.time())
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim_batch(self, limit: int) -> list[tuple[int, PutEntryRequest]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                rows = self._conn.execute(
+                    "SELECT id, bucket_uuid, external_ticket_id, request FROM ingest_queue AS q "
+                    "WHERE state = ? "
+                    "AND id = (SELECT MAX(id) FROM ingest_queue WHERE bucket_uuid = q.bucket_uuid "
+                    "          AND external_ticket_id = q.external_ticket_id AND state = ?) "
+                    "AND NOT EXISTS (SELECT 1 FROM ingest_queue WHERE bucket_uuid = q.bucket_uuid "
+                    "                AND external_ticket_id = q.external_ticket_id AND state = ?) "
+                    "ORDER BY id LIMIT ?",
+                    (PENDING, PENDING, PROCESSING, limit)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE ingest_queue SET state = ?, updated_at = ? WHERE id = ?",
+                    [(PROCESSING, now, row_id) for row_id, _, _, _ in rows]
+                )
+                self._conn.executemany(
+                    "UPDATE ingest_queue SET state = ?, updated_at = ?, request = x'' "
+                    "WHERE state = ? AND bucket_uuid = ? AND external_ticket_id = ? AND id < ?",
+                    [(SUPERSEDED, now, PENDING, bucket_uuid, ticket_id, row_id)
+                     for row_id, bucket_uuid, ticket_id, _ in rows]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(row_id, PutEntryRequest.FromString(blob)) for row_id, _, _, blob in rows]
+
+    def complete(self, results: list[tuple[int, PutEntryStatus]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE ingest_queue SET state = ?, error = ?, updated_at = ?, request = x'' WHERE id = ?",
+                    [(DONE if status.ok else FAILED, status.error, now, row_id) for row_id, status in results]
+                )
+                self._conn.execute(
+                    "DELETE FROM ingest_queue WHERE state IN (?, ?, ?) AND updated_at < ?",
+                    (DONE, FAILED, SUPERSEDED, now - self.retention)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def status(self, bucket_uuid: str, external_ticket_id: str) -> tuple[str, str] | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state, error FROM ingest_queue WHERE bucket_uuid = ? AND external_ticket_id = ? "
+                "ORDER BY id DESC LIMIT 1",
+                (bucket_uuid, external_ticket_id)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class IngestWorkerPool:
+    """Потоки, разбирающие IngestQueue пачками через process_batch (обычно CloudberryStorage._put_batch)."""
+
+    def __init__(self, queue: IngestQueue, process_batch, workers: int = 2, batch_size: int = 64,
+                 poll_interval: float = 0.2):
+        self.queue = queue
+        self.process_batch = process_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._run, name=f"ingest-{i}", daemon=True) for i in range(workers)]
+
+    def start(self) -> None:
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def run_once(self) -> int:
+        claimed = self.queue.claim_batch(self.batch_size)
+        if not claimed:
+            return 0
+        try:
+            statuses = self.process_batch([request for _, request in claimed])
+        except Exception as e:
+            logger.error(f"Ошибка при обработке пачки из очереди: {e}", exc_info=True)
+            statuses = [PutEntryStatus(ok=False, error=str(e)) for _ in claimed]
+        self.queue.complete([(row_id, status) for (row_id, _), status in zip(claimed, statuses)])
+        return len(claimed)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.run_once():
+                self._stop.wait(self.poll_interval)
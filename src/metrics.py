@@ -0,0 +1,263 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import grpc
+
+# Границы корзин в секундах: от долей миллисекунды (кэш, Qdrant) до секунд (OCR, ONE-PEACE на CPU).
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                                   for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class CallbackGauge(_Metric):
+    """Gauge, значение которого считается при выдаче /metrics: для величин, которые объект и так ведёт сам."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callbacks: dict[tuple[str, ...], object] = {}
+
+    def track(self, callback, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._callbacks[key] = callback
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            callback = self._callbacks.get(self._key(labels))
+        return float(callback()) if callback is not None else 0.0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            callbacks = sorted(self._callbacks.items(), key=lambda item: item[0])
+        return super().render() + [f"{self.name}{_format_labels(self.labelnames, key)} {float(callback())}"
+                                   for key, callback in callbacks]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Для каждой комбинации меток: счётчики по корзинам (последняя — +Inf), сумма и количество.
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0], [0.0]))
+            return sum(counts)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = super().render()
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "cloudberry_stage_seconds", "Длительность стадий обработки запроса.", ("operation", "stage")
+))
+RPC_SECONDS = REGISTRY.register(Histogram(
+    "cloudberry_rpc_seconds", "Длительность gRPC-методов.", ("method", "code")
+))
+RPC_IN_FLIGHT = REGISTRY.register(Gauge(
+    "cloudberry_rpc_in_flight", "Число выполняющихся gRPC-запросов.", ("method",)
+))
+TEXT_BATCH_SIZE = REGISTRY.register(Histogram(
+    "cloudberry_text_batch_size", "Число текстов в батче BatchingTextEmbedder.", ("embedder",),
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+))
+TEXT_BATCH_QUEUE_DEPTH = REGISTRY.register(CallbackGauge(
+    "cloudberry_text_batch_queue_depth", "Тексты, ожидающие батча в BatchingTextEmbedder.", ("embedder",)
+))
+EMBEDDING_CACHE_HIT_RATE = REGISTRY.register(CallbackGauge(
+    "cloudberry_embedding_cache_hit_rate", "Доля попаданий в кэш эмбеддингов с запуска процесса.", ("model",)
+))
+
+
+def _code_name(code) -> str:
+    return (code or grpc.StatusCode.OK).name
+
+
+def _method_name(handler_call_details) -> str:
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Латентность, число одновременных запросов и коды ответа по каждому методу."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        if handler.unary_unary:
+            return handler._replace(unary_unary=self._wrap(method, handler.unary_unary))
+        if handler.stream_unary:
+            return handler._replace(stream_unary=self._wrap(method, handler.stream_unary))
+        return handler
+
+    @staticmethod
+    def _wrap(method: str, behavior):
+        def wrapped(request, context):
+            RPC_IN_FLIGHT.inc(method=method)
+            started = time.perf_counter()
+            code = "UNKNOWN"
+            try:
+                response = behavior(request, context)
+                code = _code_name(context.code())
+                return response
+            finally:
+                RPC_IN_FLIGHT.dec(method=method)
+                RPC_SECONDS.observe(time.perf_counter() - started, method=method, code=code)
+
+        return wrapped
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        if handler.unary_unary:
+            return handler._replace(unary_unary=self._wrap(method, handler.unary_unary))
+        if handler.stream_unary:
+            return handler._replace(stream_unary=self._wrap(method, handler.stream_unary))
+        return handler
+
+    @staticmethod
+    def _wrap(method: str, behavior):
+        async def wrapped(request, context):
+            RPC_IN_FLIGHT.inc(method=method)
+            started = time.perf_counter()
+            code = "UNKNOWN"
+            try:
+                response = await behavior(request, context)
+                code = _code_name(context.code())
+                return response
+            finally:
+                RPC_IN_FLIGHT.dec(method=method)
+                RPC_SECONDS.observe(time.perf_counter() - started, method=method, code=code)
+
+        return wrapped
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Запросы Prometheus раз в несколько секунд не должны засорять лог сервиса.
+        pass
+
+
+def start_metrics_server(port: int, host: str = "") -> ThreadingHTTPServer:
+    """HTTP-эндпоинт /metrics в формате Prometheus в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
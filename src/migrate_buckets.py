@@ -0,0 +1,86 @@
+"""Перенос бакетов из отдельных коллекций в общие коллекции раскладки "shared".
+
+Точки каждого бакета постранично копируются в его общую коллекцию: к payload
+добавляется bucket_uuid, id пересчитываются с префиксом бакета — так же, как их
+посчитает PutEntry, поэтому повторная запись неизменившегося тикета ничего не
+пересчитывает. Копирование идемпотентно и его можно повторить. Исходная коллекция
+удаляется только с --delete-source и только после сверки числа точек.
+
+На время переноса запись в переносимые бакеты нужно остановить (поиск может
+работать), затем перезапустить сервер с CLOUDBERRY_BUCKET_LAYOUT=shared:
+
+    python3 src/migrate_buckets.py --shared-collections 1 --delete-source
+"""
+import argparse
+import logging
+import uuid
+
+from qdrant_client import QdrantClient, models
+
+from bucket_layout import SharedCollections
+from cloudberry_storage import CloudberryStorage, QDRANT_URL, SHARED_COLLECTIONS, is_valid_uuid
+from model_registry import ModelRegistry
+from ticket_updates import SCROLL_PAGE_SIZE, point_id, point_suffix
+
+logger = logging.getLogger("MigrateBuckets")
+
+
+def shared_point(record, layout: SharedCollections, bucket_uuid: str) -> models.PointStruct:
+    payload = {**record.payload, **layout.payload(bucket_uuid)}
+    namespace = layout.namespace(bucket_uuid)
+    try:
+        new_id = point_id(payload["ticket_id"], point_suffix(payload), namespace)
+    except (KeyError, ValueError):
+        # Точка не из раскладки PutEntry: id остаётся уникальным, а PutEntry тикета удалит её как лишнюю.
+        new_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{namespace}{record.id}"))
+    return models.PointStruct(id=new_id, vector=record.vector, payload=payload)
+
+
+def migrate_bucket(qdrant_client: QdrantClient, layout: SharedCollections, bucket_uuid: str,
+                   page_size: int = SCROLL_PAGE_SIZE) -> int:
+    target = layout.collection(bucket_uuid)
+    moved = 0
+    offset = None
+    while True:
+        records, offset = qdrant_client.scroll(collection_name=bucket_uuid, limit=page_size, offset=offset,
+                                               with_payload=True, with_vectors=True)
+        if records:
+            qdrant_client.upsert(collection_name=target, wait=True,
+                                 points=[shared_point(record, layout, bucket_uuid) for record in records])
+            moved += len(records)
+        if offset is None:
+            break
+
+    stored = qdrant_client.count(collection_name=target, count_filter=layout.bucket_filter(bucket_uuid),
+                                 exact=True).count
+    if stored < moved:
+        raise RuntimeError(f"В {target} точек бакета {bucket_uuid} меньше, чем скопировано: {stored} < {moved}")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("buckets", nargs="*", help="UUID бакетов; по умолчанию все коллекции с UUID в имени")
+    parser.add_argument("--qdrant-url", default=QDRANT_URL)
+    parser.add_argument("--shared-collections", type=int, default=SHARED_COLLECTIONS)
+    parser.add_argument("--delete-source", action="store_true", help="удалить коллекцию бакета после переноса")
+    args = parser.parse_args()
+
+    qdrant_client = QdrantClient(args.qdrant_url)
+    layout = SharedCollections(args.shared_collections)
+    # Сервис нужен только ради создания общих коллекций с теми же векторами и индексами, что и у сервера.
+    storage = CloudberryStorage(ModelRegistry(text_embedder=None, one_peace_client=None, qdrant_client=qdrant_client),
+                                layout=layout, find_workers=0)
+    buckets = args.buckets or [collection.name for collection in qdrant_client.get_collections().collections
+                               if is_valid_uuid(collection.name)]
+    for bucket_uuid in buckets:
+        storage.create_collection_if_not_exists(layout.collection(bucket_uuid))
+        moved = migrate_bucket(qdrant_client, layout, bucket_uuid)
+        logger.info(f"Бакет {bucket_uuid}: перенесено точек {moved} в {layout.collection(bucket_uuid)}.")
+        if args.delete_source:
+            qdrant_client.delete_collection(bucket_uuid)
+            logger.info(f"Коллекция {bucket_uuid} удалена.")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,30 @@ from qdrant_client import QdrantClient
 
 from embedders.interfaces import TextEmbedder
 from embedders.one_peace_client import OnePeaceClient
+from image_preprocessing import prepare_many
+from ocr import OcrPipeline
+from translation import QueryTranslator
 
 
 class ModelRegistry:
     def __init__(self,
                  text_embedder: TextEmbedder,
                  one_peace_client: OnePeaceClient,
-                 qdrant_client: QdrantClient):
+                 qdrant_client: QdrantClient,
+                 query_translator: QueryTranslator | None = None,
+                 ocr_pipeline: OcrPipeline | None = None,
+                 image_preprocessor=None,
+                 text_model_id: str = "",
+                 image_model_id: str = ""):
         self.text_embedder = text_embedder
         self.one_peace_client = one_peace_client
         self.qdrant_client = qdrant_client
+        self.query_translator = query_translator or QueryTranslator()
+        self.ocr_pipeline = ocr_pipeline
+        # prepare_many в текущем процессе или EmbeddingWorkerPool.prepare_images в пуле процессов.
+        self.image_preprocessor = image_preprocessor or prepare_many
+        # Версии конвейеров входят в хэши содержимого точек (ticket_updates.content_hash).
+        # Вектор OCR картинки строит текстовая модель, поэтому она входит и в версию картинок.
+        self.text_pipeline = text_model_id
+        ocr = f"ocr:{ocr_pipeline.languages}:{text_model_id}" if ocr_pipeline is not None else ""
+        self.image_pipeline = ":".join(part for part in (image_model_id, ocr) if part)
@@ -0,0 +1,202 @@
+import logging
+import multiprocessing
+import queue
+import threading
+from concurrent import futures
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger("OCR")
+
+OCR_LANGUAGES = "eng+rus"
+OCR_MAX_SIDE = 2000  # больше tesseract не нужно, а время растёт с числом пикселей
+HEURISTIC_SIDE = 256
+MIN_CONTRAST = 8.0  # стандартное отклонение яркости почти однотонной картинки
+MIN_EDGE_DENSITY = 0.01  # доля резких горизонтальных перепадов, ниже которой текста обычно нет
+DEADLINE_MARGIN = 1.0  # секунд сверх timeout tesseract на декодирование и передачу картинки
+
+
+def likely_has_text(image: Image.Image) -> bool:
+    thumbnail = image.convert("L")
+    thumbnail.thumbnail((HEURISTIC_SIDE, HEURISTIC_SIDE))
+    pixels = np.asarray(thumbnail, dtype=np.int16)
+    if pixels.std() < MIN_CONTRAST:
+        return False
+    edges = np.abs(np.diff(pixels, axis=1)) > 48
+    return edges.mean() >= MIN_EDGE_DENSITY
+
+
+def prepare_for_ocr(image: Image.Image) -> Image.Image:
+    image = image.convert("L")
+    if max(image.size) > OCR_MAX_SIDE:
+        image.thumbnail((OCR_MAX_SIDE, OCR_MAX_SIDE))
+    # Бинаризация по среднему уровню яркости: tesseract быстрее работает с чистым ч/б.
+    threshold = int(np.asarray(image).mean())
+    return image.point(lambda p: 255 if p > threshold else 0)
+
+
+def recognize(content: bytes, languages: str = OCR_LANGUAGES, timeout: float = 0) -> str:
+    # Выполняется в процессе пула; pytesseract импортируется только там.
+    import pytesseract
+
+    image = Image.open(BytesIO(content))
+    if image.format == "JPEG":
+        image.draft("L", (OCR_MAX_SIDE, OCR_MAX_SIDE))
+    if not likely_has_text(image):
+        return ""
+    return pytesseract.image_to_string(prepare_for_ocr(image), lang=languages, timeout=timeout).strip()
+
+
+class OcrWorkerError(RuntimeError):
+    """Процесс OCR упал или не уложился в срок и перезапущен; вложение остаётся без текста."""
+
+
+def _worker_main(conn, recognizer, languages: str, timeout: float) -> None:
+    while True:
+        content = conn.recv()
+        if content is None:
+            break
+        try:
+            conn.send(("ok", recognizer(content, languages, timeout)))
+        except Exception as e:
+            # Исключения tesseract и Pillow не всегда переживают pickle, поэтому передаём текст.
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _OcrWorker:
+    def __init__(self, index: int, context, recognizer, languages: str, timeout: float):
+        self.index = index
+        self._context = context
+        self._args = (recognizer, languages, timeout)
+        self.start()
+
+    def start(self) -> None:
+        self.conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(target=_worker_main, args=(child_conn, *self._args),
+                                             name=f"ocr-worker-{self.index}", daemon=True)
+        self.process.start()
+        # Закрываем свою копию конца воркера, иначе recv не узнает о его падении (EOFError).
+        child_conn.close()
+
+    def restart(self) -> None:
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.start()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class OcrPipeline:
+    """OCR вложений на ограниченном числе процессов с бюджетом времени на картинку.
+
+    Задачи всех запросов идут в общую очередь; каждый процесс обслуживает свой
+    поток. Срок задачи отсчитывается от начала её выполнения, а не от постановки
+    в очередь. Процесс, не уложившийся в срок или упавший, перезапускается один:
+    задачи других запросов на остальных процессах не затрагиваются.
+    """
+
+    def __init__(self, max_workers: int = 2, timeout: float = 10.0, languages: str = OCR_LANGUAGES,
+                 recognizer=recognize):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.languages = languages
+        self.recognizer = recognizer
+        self.restarts = 0
+        self._stats_lock = threading.Lock()
+        self._tasks: queue.Queue = queue.Queue()
+        # spawn, а не fork: родительский процесс держит потоки gRPC.
+        context = multiprocessing.get_context("spawn")
+        self._workers = [_OcrWorker(idx, context, recognizer, languages, timeout) for idx in range(max_workers)]
+        self._threads = [threading.Thread(target=self._serve, args=(worker,), name=f"ocr-{worker.index}", daemon=True)
+                         for worker in self._workers]
+        for thread in self._threads:
+            thread.start()
+
+    def submit_many(self, contents: list[bytes]) -> list[futures.Future]:
+        pending = []
+        for content in contents:
+            future = futures.Future()
+            self._tasks.put((future, content))
+            pending.append(future)
+        return pending
+
+    def collect(self, pending: list[futures.Future]) -> list[str | None]:
+        futures.wait(pending)
+        return self.texts(pending)
+
+    @staticmethod
+    def texts(done: list[futures.Future]) -> list[str | None]:
+        # None, а не "": вложение, на котором OCR не удался, нужно распознать заново при следующей записи.
+        texts = []
+        for future in done:
+            try:
+                texts.append(future.result())
+            except Exception as e:
+                logger.warning(f"Ошибка OCR, вложение пропущено: {e}")
+                texts.append(None)
+        return texts
+
+    def recognize_many(self, contents: list[bytes]) -> list[str | None]:
+        return self.collect(self.submit_many(contents))
+
+    def close(self) -> None:
+        while True:
+            try:
+                future, _ = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+        for worker in self._workers:
+            worker.stop()
+
+    def _serve(self, worker: _OcrWorker) -> None:
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, content = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._run(worker, content))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _run(self, worker: _OcrWorker, content: bytes) -> str:
+        try:
+            worker.conn.send(content)
+            answered = worker.conn.poll(self.timeout + DEADLINE_MARGIN)
+            reply = worker.conn.recv() if answered else None
+        except (EOFError, OSError) as e:
+            self._restart(worker, f"упал (exitcode={worker.process.exitcode})")
+            raise OcrWorkerError(f"Процесс OCR {worker.index} упал при обработке вложения") from e
+        if reply is None:
+            # cancel() не прерывает начатую задачу, а зависший tesseract занимал бы процесс и дальше.
+            self._restart(worker, "не уложился в срок")
+            raise OcrWorkerError(f"OCR не уложился в {self.timeout} с")
+        status, result = reply
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def _restart(self, worker: _OcrWorker, reason: str) -> None:
+        logger.warning(f"Процесс OCR {worker.index} {reason}, перезапускаем.")
+        worker.restart()
+        with self._stats_lock:
+            self.restarts += 1
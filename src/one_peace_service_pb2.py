@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: one_peace_service.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'one_peace_service.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x17one_peace_service.proto\x12\tgenerated\"\x1b\n\x0bTextRequest\x12\x0c\n\x04text\x18\x01 \x01(\t\"\x1f\n\x0cImageRequest\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\x0c\"4\n\x0c\x41udioRequest\x12\x0f\n\x07\x63ontent\x18\x01 \x01(\x0c\x12\x13\n\x0bsample_rate\x18\x02 \x01(\x05\"4\n\x0eVectorResponse\x12\x0e\n\x06vector\x18\x01 \x03(\x02\x12\x12\n\nvector_f32\x18\x02 \x01(\x0c\"!\n\x10TextBatchRequest\x12\r\n\x05texts\x18\x01 \x03(\t\"%\n\x11ImageBatchRequest\x12\x10\n\x08\x63ontents\x18\x01 \x03(\x0c\"A\n\x13VectorBatchResponse\x12*\n\x07vectors\x18\x01 \x03(\x0b\x32\x19.generated.VectorResponse2\xf3\x02\n\x10OnePeaceEmbedder\x12?\n\nEncodeText\x12\x16.generated.TextRequest\x1a\x19.generated.VectorResponse\x12\x41\n\x0b\x45ncodeImage\x12\x17.generated.ImageRequest\x1a\x19.generated.VectorResponse\x12\x41\n\x0b\x45ncodeAudio\x12\x17.generated.AudioRequest\x1a\x19.generated.VectorResponse\x12J\n\x0b\x45ncodeTexts\x12\x1b.generated.TextBatchRequest\x1a\x1e.generated.VectorBatchResponse\x12L\n\x0c\x45ncodeImages\x12\x1c.generated.ImageBatchRequest\x1a\x1e.generated.VectorBatchResponseb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'one_peace_service_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_TEXTREQUEST']._serialized_start=38
+  _globals['_TEXTREQUEST']._serialized_end=65
+  _globals['_IMAGEREQUEST']._serialized_start=67
+  _globals['_IMAGEREQUEST']._serialized_end=98
+  _globals['_AUDIOREQUEST']._serialized_start=100
+  _globals['_AUDIOREQUEST']._serialized_end=152
+  _globals['_VECTORRESPONSE']._serialized_start=154
+  _globals['_VECTORRESPONSE']._serialized_end=206
+  _globals['_TEXTBATCHREQUEST']._serialized_start=208
+  _globals['_TEXTBATCHREQUEST']._serialized_end=241
+  _globals['_IMAGEBATCHREQUEST']._serialized_start=243
+  _globals['_IMAGEBATCHREQUEST']._serialized_end=280
+  _globals['_VECTORBATCHRESPONSE']._serialized_start=282
+  _globals['_VECTORBATCHRESPONSE']._serialized_end=347
+  _globals['_ONEPEACEEMBEDDER']._serialized_start=350
+  _globals['_ONEPEACEEMBEDDER']._serialized_end=721
+# @@protoc_insertion_point(module_scope)
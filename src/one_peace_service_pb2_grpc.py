@@ -0,0 +1,269 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+import one_peace_service_pb2 as one__peace__service__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in one_peace_service_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class OnePeaceEmbedderStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.EncodeText = channel.unary_unary(
+                '/generated.OnePeaceEmbedder/EncodeText',
+                request_serializer=one__peace__service__pb2.TextRequest.SerializeToString,
+                response_deserializer=one__peace__service__pb2.VectorResponse.FromString,
+                _registered_method=True)
+        self.EncodeImage = channel.unary_unary(
+                '/generated.OnePeaceEmbedder/EncodeImage',
+                request_serializer=one__peace__service__pb2.ImageRequest.SerializeToString,
+                response_deserializer=one__peace__service__pb2.VectorResponse.FromString,
+                _registered_method=True)
+        self.EncodeAudio = channel.unary_unary(
+                '/generated.OnePeaceEmbedder/EncodeAudio',
+                request_serializer=one__peace__service__pb2.AudioRequest.SerializeToString,
+                response_deserializer=one__peace__service__pb2.VectorResponse.FromString,
+                _registered_method=True)
+        self.EncodeTexts = channel.unary_unary(
+                '/generated.OnePeaceEmbedder/EncodeTexts',
+                request_serializer=one__peace__service__pb2.TextBatchRequest.SerializeToString,
+                response_deserializer=one__peace__service__pb2.VectorBatchResponse.FromString,
+                _registered_method=True)
+        self.EncodeImages = channel.unary_unary(
+                '/generated.OnePeaceEmbedder/EncodeImages',
+                request_serializer=one__peace__service__pb2.ImageBatchRequest.SerializeToString,
+                response_deserializer=one__peace__service__pb2.VectorBatchResponse.FromString,
+                _registered_method=True)
+
+
+class OnePeaceEmbedderServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def EncodeText(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EncodeImage(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EncodeAudio(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EncodeTexts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def EncodeImages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_OnePeaceEmbedderServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'EncodeText': grpc.unary_unary_rpc_method_handler(
+                    servicer.EncodeText,
+                    request_deserializer=one__peace__service__pb2.TextRequest.FromString,
+                    response_serializer=one__peace__service__pb2.VectorResponse.SerializeToString,
+            ),
+            'EncodeImage': grpc.unary_unary_rpc_method_handler(
+                    servicer.EncodeImage,
+                    request_deserializer=one__peace__service__pb2.ImageRequest.FromString,
+                    response_serializer=one__peace__service__pb2.VectorResponse.SerializeToString,
+            ),
+            'EncodeAudio': grpc.unary_unary_rpc_method_handler(
+                    servicer.EncodeAudio,
+                    request_deserializer=one__peace__service__pb2.AudioRequest.FromString,
+                    response_serializer=one__peace__service__pb2.VectorResponse.SerializeToString,
+            ),
+            'EncodeTexts': grpc.unary_unary_rpc_method_handler(
+                    servicer.EncodeTexts,
+                    request_deserializer=one__peace__service__pb2.TextBatchRequest.FromString,
+                    response_serializer=one__peace__service__pb2.VectorBatchResponse.SerializeToString,
+            ),
+            'EncodeImages': grpc.unary_unary_rpc_method_handler(
+                    servicer.EncodeImages,
+                    request_deserializer=one__peace__service__pb2.ImageBatchRequest.FromString,
+                    response_serializer=one__peace__service__pb2.VectorBatchResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'generated.OnePeaceEmbedder', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('generated.OnePeaceEmbedder', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class OnePeaceEmbedder:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def EncodeText(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.OnePeaceEmbedder/EncodeText',
+            one__peace__service__pb2.TextRequest.SerializeToString,
+            one__peace__service__pb2.VectorResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EncodeImage(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.OnePeaceEmbedder/EncodeImage',
+            one__peace__service__pb2.ImageRequest.SerializeToString,
+            one__peace__service__pb2.VectorResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EncodeAudio(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.OnePeaceEmbedder/EncodeAudio',
+            one__peace__service__pb2.AudioRequest.SerializeToString,
+            one__peace__service__pb2.VectorResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EncodeTexts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.OnePeaceEmbedder/EncodeTexts',
+            one__peace__service__pb2.TextBatchRequest.SerializeToString,
+            one__peace__service__pb2.VectorBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def EncodeImages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/generated.OnePeaceEmbedder/EncodeImages',
+            one__peace__service__pb2.ImageBatchRequest.SerializeToString,
+            one__peace__service__pb2.VectorBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
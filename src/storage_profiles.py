@@ -0,0 +1,44 @@
+from qdrant_client import models
+
+import cloudberry_storage_pb2 as pb2
+from cloudberry_storage_pb2 import StorageProfile, SearchParams
+
+SCALAR_QUANTILE = 0.99  # отбрасываем выбросы, чтобы int8 не тратил диапазон на редкие значения
+
+
+def quantization_config(quantization: int) -> models.QuantizationConfig | None:
+    # Квантованные векторы всегда в RAM: по ним идёт поиск, исходные нужны только для пересчёта оценок.
+    if quantization == pb2.QUANTIZATION_SCALAR_INT8:
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=SCALAR_QUANTILE, always_ram=True
+        ))
+    if quantization == pb2.QUANTIZATION_BINARY:
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def collection_params(profile: StorageProfile, vectors_config: dict[str, models.VectorParams]) -> dict:
+    """Аргументы create_collection для профиля; пустой профиль даёт прежнюю коллекцию целиком в RAM."""
+    vectors = {
+        name: params.model_copy(update={"on_disk": True}) if profile.on_disk_vectors else params
+        for name, params in vectors_config.items()
+    }
+    hnsw_config = None
+    if profile.hnsw_m or profile.hnsw_ef_construct:
+        hnsw_config = models.HnswConfigDiff(m=profile.hnsw_m or None, ef_construct=profile.hnsw_ef_construct or None)
+    return dict(
+        vectors_config=vectors,
+        hnsw_config=hnsw_config,
+        quantization_config=quantization_config(profile.quantization),
+        on_disk_payload=profile.on_disk_payload or None,
+    )
+
+
+def search_params(params: SearchParams) -> models.SearchParams | None:
+    if not params.hnsw_ef and not params.oversampling:
+        return None
+    quantization = None
+    if params.oversampling:
+        # Без пересчёта по исходным векторам oversampling не имеет смысла.
+        quantization = models.QuantizationSearchParams(rescore=True, oversampling=params.oversampling)
+    return models.SearchParams(hnsw_ef=params.hnsw_ef or None, quantization=quantization)
@@ -0,0 +1,119 @@
+import hashlib
+import uuid
+
+from qdrant_client import models
+
+from cloudberry_storage_pb2 import PutEntryRequest
+
+SCROLL_PAGE_SIZE = 1024
+REMOVE_BATCH_SIZE = 1024  # ticket_id в одном условии MatchAny при массовом удалении
+
+
+def point_id(external_id: str, suffix: str, namespace: str = "") -> str:
+    # namespace — префикс бакета в общей коллекции; без него id совпадают с записанными раньше.
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, f"{namespace}{external_id}_{suffix}"))
+
+
+def point_suffix(payload: dict) -> str:
+    """Суффикс id точки по её payload — обратное к раскладке точек тикета в PutEntry."""
+    point_type = payload.get("type")
+    if point_type == "title":
+        return "title"
+    if point_type == "description":
+        return "desc"
+    if point_type == "image":
+        return f"img_{payload['img_idx']}"
+    raise ValueError(f"Неизвестный тип точки: {point_type}")
+
+
+def content_hash(content: bytes | str, pipeline: str = "") -> str:
+    """Хэш содержимого точки вместе с версией конвейера, который строил её векторы.
+
+    Смена модели, бэкенда или включение OCR меняет хэш, и тикет пересчитывается при следующей записи.
+    Без версии хэш совпадает с записанными раньше, чтобы не пересчитывать их без нужды.
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    if pipeline:
+        content = pipeline.encode("utf-8") + b"\0" + content
+    return hashlib.sha256(content).hexdigest()
+
+
+def ticket_hashes(request: PutEntryRequest, namespace: str = "", text_pipeline: str = "",
+                  image_pipeline: str = "") -> dict[str, str]:
+    """Хэш исходного содержимого каждой точки тикета по её id."""
+    external_id: str = request.external_ticket_id
+    hashes = {
+        point_id(external_id, "title", namespace): content_hash(request.ticket.title.content, text_pipeline),
+        point_id(external_id, "desc", namespace): content_hash(request.ticket.description.content, text_pipeline),
+    }
+    for idx, attachment in enumerate(request.ticket.attachments):
+        hashes[point_id(external_id, f"img_{idx}", namespace)] = content_hash(attachment.content, image_pipeline)
+    return hashes
+
+
+class TicketUpdate:
+    """Что нужно пересчитать для тикета по сравнению с точками, уже лежащими в Qdrant."""
+
+    def __init__(self, request: PutEntryRequest, stored: dict[str, str | None], namespace: str = "",
+                 text_pipeline: str = "", image_pipeline: str = ""):
+        external_id: str = request.external_ticket_id
+        self.namespace = namespace
+        self.hashes = ticket_hashes(request, namespace, text_pipeline, image_pipeline)
+        changed = {pid for pid, digest in self.hashes.items() if stored.get(pid) != digest}
+        self.title: bool = point_id(external_id, "title", namespace) in changed
+        self.description: bool = point_id(external_id, "desc", namespace) in changed
+        self.images: list[int] = [
+            idx for idx in range(len(request.ticket.attachments))
+            if point_id(external_id, f"img_{idx}", namespace) in changed
+        ]
+        # Например, _img_N, оставшиеся после удаления вложений из тикета.
+        self.orphans: list[str] = [pid for pid in stored if pid not in self.hashes]
+
+
+def stored_hashes_filter(ticket_ids: list[str], bucket_conditions: list = ()) -> models.Filter:
+    return models.Filter(must=[*bucket_conditions,
+                               models.FieldCondition(key="ticket_id", match=models.MatchAny(any=ticket_ids))])
+
+
+def group_stored_hashes(records) -> dict[str, dict[str, str | None]]:
+    # У точек, записанных до появления хэшей, и у картинок, чей OCR не удался, content_hash нет:
+    # они считаются изменившимися.
+    stored: dict[str, dict[str, str | None]] = {}
+    for record in records:
+        stored.setdefault(record.payload["ticket_id"], {})[str(record.id)] = record.payload.get("content_hash")
+    return stored
+
+
+def write_operations(points: list[models.PointStruct], orphans: list[str]) -> list:
+    """Upsert изменившихся точек и удаление лишних одним batch_update_points."""
+    operations = []
+    if points:
+        operations.append(models.UpsertOperation(upsert=models.PointsList(points=points)))
+    if orphans:
+        operations.append(models.DeleteOperation(delete=models.PointIdsList(points=orphans)))
+    return operations
+
+
+def remove_operations(ticket_ids: list[str], payload_matches, bucket_conditions: list = ()) -> list:
+    """Удаление тикетов из списка и/или точек по условиям на payload для одного batch_update_points.
+
+    Каждая операция — фильтр с MatchAny по пачке ticket_id, так что Qdrant ищет
+    их по индексу один раз на пачку, а не по разу на тикет.
+    """
+    matches = []
+    for match in payload_matches:
+        if not match.key or not match.values:
+            raise ValueError(f"Условие на payload должно содержать ключ и хотя бы одно значение: {match.key!r}")
+        matches.append(models.FieldCondition(key=match.key, match=models.MatchAny(any=list(match.values))))
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    if not ticket_ids and not matches:
+        raise ValueError("Не заданы ни тикеты, ни условия на payload; для удаления всего бакета есть DestroyBucket")
+
+    conditions = [*bucket_conditions, *matches]
+    batches = [ticket_ids[start:start + REMOVE_BATCH_SIZE] for start in range(0, len(ticket_ids), REMOVE_BATCH_SIZE)]
+    filters = [
+        models.Filter(must=[*conditions, models.FieldCondition(key="ticket_id", match=models.MatchAny(any=batch))])
+        for batch in batches
+    ] or [models.Filter(must=conditions)]
+    return [models.DeleteOperation(delete=models.FilterSelector(filter=f)) for f in filters]
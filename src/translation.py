@@ -0,0 +1,83 @@
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+logger = logging.getLogger("Translation")
+
+
+class TranslatorBackend(ABC):
+    @abstractmethod
+    def translate(self, text: str) -> str:
+        pass
+
+
+class NoTranslator(TranslatorBackend):
+    def translate(self, text: str) -> str:
+        return text
+
+
+class GoogleTranslatorBackend(TranslatorBackend):
+    def __init__(self, target: str = "en"):
+        # deep_translator нужен только этому бэкенду, поэтому импортируем его лениво.
+        from deep_translator import GoogleTranslator
+        self.translator = GoogleTranslator(source="auto", target=target)
+
+    def translate(self, text: str) -> str:
+        return self.translator.translate(text)
+
+
+TRANSLATOR_BACKENDS = {
+    "none": NoTranslator,
+    "google": GoogleTranslatorBackend,
+}
+
+
+def make_translator_backend(name: str) -> TranslatorBackend:
+    try:
+        return TRANSLATOR_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Неизвестный бэкенд перевода: {name}. Доступны: {', '.join(TRANSLATOR_BACKENDS)}")
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.split())
+
+
+def needs_translation(text: str) -> bool:
+    # Запросы приходят на русском или английском (как и вложения для OCR: eng+rus), поэтому переводим
+    # только текст с кириллицей. Латиница на других языках (испанский, транслит) уходит в ONE-PEACE как есть.
+    return any("\u0400" <= ch <= "\u04ff" for ch in text)
+
+
+class QueryTranslator:
+    def __init__(self, backend: TranslatorBackend | None = None, cache_size: int = 10_000):
+        self.backend = backend or NoTranslator()
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def translate(self, text: str) -> str:
+        query = normalize_query(text)
+        if isinstance(self.backend, NoTranslator) or not needs_translation(query):
+            return query
+
+        key = query.casefold()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        try:
+            translated = self.backend.translate(query)
+        except Exception as e:
+            # Поиск не должен падать из-за переводчика: ONE-PEACE получит исходный текст.
+            logger.warning(f"Не удалось перевести запрос, используем исходный текст: {e}")
+            return query
+
+        with self._lock:
+            self._cache[key] = translated
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return translated
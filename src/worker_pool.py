@@ -0,0 +1,211 @@
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from embedders.interfaces import TextEmbedder
+from image_preprocessing import prepare_many
+
+logger = logging.getLogger("EmbeddingWorkerPool")
+
+# Размер сегмента разделяемой памяти на воркер. Данные крупнее (очень большие вложения) идут через pipe.
+SLOT_BYTES = 8 * 1024 * 1024
+# Секунд на ответ воркера; с запасом на загрузку модели, которую ждёт первый запрос после (пере)запуска.
+REQUEST_TIMEOUT = 120.0
+
+
+class WorkerCrashedError(RuntimeError):
+    pass
+
+
+class WorkerTimeoutError(WorkerCrashedError):
+    pass
+
+
+def _put_blobs(buf: memoryview, blobs: list[bytes]) -> tuple:
+    lengths = [len(blob) for blob in blobs]
+    if sum(lengths) > len(buf):
+        return "inline", blobs
+    offset = 0
+    for blob in blobs:
+        buf[offset:offset + len(blob)] = blob
+        offset += len(blob)
+    return "shm", lengths
+
+
+def _get_blobs(buf: memoryview, packed: tuple) -> list[bytes]:
+    where, data = packed
+    if where == "inline":
+        return data
+    blobs, offset = [], 0
+    for length in data:
+        blobs.append(bytes(buf[offset:offset + length]))
+        offset += length
+    return blobs
+
+
+def _put_array(buf: memoryview, array) -> tuple:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    if array.nbytes > len(buf):
+        return "inline", array
+    np.ndarray(array.shape, dtype=np.float32, buffer=buf)[...] = array
+    return "shm", array.shape
+
+
+def _get_array(buf: memoryview, packed: tuple) -> np.ndarray:
+    where, data = packed
+    if where == "inline":
+        return data
+    # Копия обязательна: после ответа сегмент воркера сразу переиспользуется следующим запросом.
+    return np.ndarray(data, dtype=np.float32, buffer=buf).copy()
+
+
+def _portable(error: Exception) -> Exception:
+    # Не всякое исключение переживает pickle (например, с несериализуемыми аргументами).
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _worker_main(conn, shm_name: str, text_embedder_factory, image_preprocessor) -> None:
+    # При spawn воркер пользуется resource_tracker родителя, поэтому повторная регистрация сегмента безвредна:
+    # удаляет его только родитель в close.
+    shm = SharedMemory(name=shm_name)
+    text_embedder: TextEmbedder = text_embedder_factory()
+    while True:
+        kind, payload = conn.recv()
+        if kind == "stop":
+            break
+        try:
+            items = _get_blobs(shm.buf, payload)
+            if kind == "texts":
+                vectors = text_embedder.encode_texts([item.decode("utf-8") for item in items])
+                result = _put_array(shm.buf, vectors)
+            else:
+                prepared = image_preprocessor(items)
+                errors = {idx: _portable(item) for idx, item in enumerate(prepared) if isinstance(item, Exception)}
+                blobs = [b"" if idx in errors else item for idx, item in enumerate(prepared)]
+                result = _put_blobs(shm.buf, blobs), errors
+            conn.send(("ok", result))
+        except Exception as e:
+            logger.error(f"Ошибка в воркере эмбеддингов ({kind}): {e}", exc_info=True)
+            conn.send(("error", _portable(e)))
+    shm.close()
+
+
+class _Worker:
+    def __init__(self, index: int, context, text_embedder_factory, image_preprocessor, slot_bytes: int):
+        self.index = index
+        self._context = context
+        self._args = (text_embedder_factory, image_preprocessor)
+        self.shm = SharedMemory(create=True, size=slot_bytes)
+        self.start()
+
+    def start(self) -> None:
+        self.conn, child_conn = self._context.Pipe()
+        self.process = self._context.Process(target=_worker_main, args=(child_conn, self.shm.name, *self._args),
+                                             name=f"embedding-worker-{self.index}", daemon=True)
+        self.process.start()
+        # Закрываем свою копию конца воркера, иначе recv не узнает о его падении (EOFError).
+        child_conn.close()
+
+    def restart(self) -> None:
+        self.conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.start()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(("stop", None))
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class EmbeddingWorkerPool:
+    """Текстовый эмбеддер и подготовка картинок в отдельных процессах, чтобы не упираться в GIL.
+
+    У каждого воркера свой сегмент разделяемой памяти: тексты, байты картинок и
+    float32-векторы передаются через него, по pipe идут только длины и формы.
+    Запрос уходит первому свободному воркеру; упавший или зависший воркер перезапускается,
+    а запрос, на котором это случилось, завершается WorkerCrashedError (WorkerTimeoutError).
+    """
+
+    def __init__(self, workers: int, text_embedder_factory, image_preprocessor=prepare_many,
+                 slot_bytes: int = SLOT_BYTES, timeout: float = REQUEST_TIMEOUT):
+        # spawn, а не fork: родительский процесс держит потоки gRPC.
+        context = multiprocessing.get_context("spawn")
+        self.workers = workers
+        self.timeout = timeout
+        self._workers = [_Worker(idx, context, text_embedder_factory, image_preprocessor, slot_bytes)
+                         for idx in range(workers)]
+        self._idle: queue.Queue = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._stats_lock = threading.Lock()
+        self.restarts = 0
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        return self._call("texts", [text.encode("utf-8") for text in texts], _get_array)
+
+    def prepare_images(self, contents: list[bytes]) -> list[bytes | Exception]:
+        def unpack(buf, result):
+            packed, errors = result
+            return [errors.get(idx, item) for idx, item in enumerate(_get_blobs(buf, packed))]
+
+        return self._call("images", contents, unpack)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+
+    def _call(self, kind: str, items: list[bytes], unpack):
+        worker: _Worker = self._idle.get()
+        try:
+            try:
+                worker.conn.send((kind, _put_blobs(worker.shm.buf, items)))
+                if not worker.conn.poll(self.timeout):
+                    # Ответ, пришедший позже, достался бы следующему запросу, поэтому воркер только перезапускать.
+                    logger.error(f"Воркер эмбеддингов {worker.index} не ответил за {self.timeout} с, перезапускаем.")
+                    self._restart(worker)
+                    raise WorkerTimeoutError(f"Воркер эмбеддингов {worker.index} не ответил за {self.timeout} с")
+                status, result = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                logger.error(f"Воркер эмбеддингов {worker.index} упал (exitcode={worker.process.exitcode}), "
+                             f"перезапускаем.")
+                self._restart(worker)
+                raise WorkerCrashedError(f"Воркер эмбеддингов {worker.index} упал при обработке запроса") from e
+            if status == "error":
+                raise result
+            return unpack(worker.shm.buf, result)
+        finally:
+            self._idle.put(worker)
+
+    def _restart(self, worker: _Worker) -> None:
+        worker.restart()
+        with self._stats_lock:
+            self.restarts += 1
+
+
+class PooledTextEmbedder(TextEmbedder):
+    def __init__(self, pool: EmbeddingWorkerPool):
+        self.pool = pool
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return self.pool.encode_texts([text])[0]
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        return self.pool.encode_texts(texts)
@@ -54,6 +54,27 @@ def test_put_entry_with_real_image(stub: pb2_grpc.CloudberryStorageStub, image_p
     print("[✓] PutEntry", response)
 
 
+def test_batch_put_entries(stub: pb2_grpc.CloudberryStorageStub, image_path: str):
+    image_data = Path(image_path).read_bytes()
+
+    def requests():
+        for ticket_uuid in [FAKE_TICKET_UUID_1, FAKE_TICKET_UUID_2, FAKE_TICKET_UUID_3, FAKE_TICKET_UUID_4]:
+            yield pb2.PutEntryRequest(
+                external_ticket_id=ticket_uuid,
+                bucket_uuid=TEST_BUCKET_UUID_0,
+                ticket=pb2.TicketEntry(
+                    title=pb2.TextEntry(content=f"Title of {ticket_uuid}"),
+                    description=pb2.TextEntry(content=f"Description of {ticket_uuid}"),
+                    attachments=[pb2.ImageEntry(content=image_data, content_type=pb2.PNG)],
+                ),
+            )
+
+    response = stub.BatchPutEntries(requests())
+    print("[✓] BatchPutEntries")
+    for status in response.statuses:
+        print(" ->", status.external_ticket_id, "ok" if status.ok else status.error)
+
+
 def test_find(stub: pb2_grpc.CloudberryStorageStub):
     request = pb2.FindRequest(
         query=pb2.TextEntry(content="test search query"),
@@ -113,6 +134,7 @@ if __name__ == "__main__":
 
         # test_init_bucket(stub)
         # test_put_entry_with_real_image(stub, EXAMPLE_IMAGE_PATH)
+        # test_batch_put_entries(stub, EXAMPLE_IMAGE_PATH)
         # test_find(stub)
         # test_remove_entry(stub)
         # test_destroy_bucket(stub)
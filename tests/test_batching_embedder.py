@@ -0,0 +1,88 @@
+import threading
+
+import numpy as np
+import pytest
+
+from embedders.batching_embedder import BatchingTextEmbedder
+from embedders.interfaces import TextEmbedder
+from metrics import REGISTRY, TEXT_BATCH_QUEUE_DEPTH, TEXT_BATCH_SIZE
+
+
+class RecordingEmbedder(TextEmbedder):
+    def __init__(self):
+        self.batch_sizes = []
+
+    def encode_text(self, text: str) -> np.ndarray:
+        return np.full(4, float(len(text)), dtype=np.float32)
+
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        self.batch_sizes.append(len(texts))
+        return np.stack([self.encode_text(text) for text in texts])
+
+
+class ShortEmbedder(RecordingEmbedder):
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        return super().encode_texts(texts)[:-1]
+
+
+class FailingEmbedder(TextEmbedder):
+    def encode_text(self, text: str) -> np.ndarray:
+        raise RuntimeError("model is down")
+
+
+def test_concurrent_callers_share_batches_and_get_own_rows():
+    inner = RecordingEmbedder()
+    embedder = BatchingTextEmbedder(inner, max_batch_size=16, max_wait_ms=50)
+    results = {}
+
+    def call(n: int):
+        results[n] = embedder.encode_text("x" * n)
+
+    threads = [threading.Thread(target=call, args=(n,)) for n in range(1, 33)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    embedder.close()
+
+    for n, vector in results.items():
+        assert vector[0] == n
+    assert sum(inner.batch_sizes) == 32
+    assert max(inner.batch_sizes) <= 16
+    assert len(inner.batch_sizes) < 32
+    stats = embedder.stats()
+    assert stats["items"] == 32
+    assert stats["batches"] == len(inner.batch_sizes)
+
+
+def test_encode_texts_preserves_order():
+    embedder = BatchingTextEmbedder(RecordingEmbedder(), max_batch_size=2, max_wait_ms=1)
+    vectors = embedder.encode_texts(["a", "bbb", "cc"])
+    embedder.close()
+    assert vectors[:, 0].tolist() == [1.0, 3.0, 2.0]
+
+
+def test_errors_are_propagated_to_callers():
+    embedder = BatchingTextEmbedder(FailingEmbedder(), max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model is down"):
+        embedder.encode_text("hello")
+    embedder.close()
+
+
+def test_short_answer_fails_every_caller_in_the_batch():
+    embedder = BatchingTextEmbedder(ShortEmbedder(), max_batch_size=4, max_wait_ms=50)
+    with pytest.raises(RuntimeError, match="вернул 2 векторов на 3 текстов"):
+        embedder.encode_texts(["a", "b", "c"])
+    embedder.close()
+
+
+def test_batch_sizes_and_queue_depth_are_exported():
+    embedder = BatchingTextEmbedder(RecordingEmbedder(), max_batch_size=4, max_wait_ms=50, name="test")
+    embedder.encode_texts(["a", "b", "c"])
+    embedder.close()
+
+    assert TEXT_BATCH_SIZE.count(embedder="test") == 1
+    assert TEXT_BATCH_QUEUE_DEPTH.value(embedder="test") <= 1
+    text = REGISTRY.render()
+    assert 'cloudberry_text_batch_size_bucket{embedder="test",le="4"} 1' in text
+    assert 'cloudberry_text_batch_queue_depth{embedder="test"}' in text
@@ -0,0 +1,127 @@
+import uuid
+
+import grpc
+from qdrant_client import QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+from benchmarks.stand_ins import DeterministicTextEmbedder, RecordingContext, SerializedClient, fake_vector, \
+    synthetic_ticket
+from bucket_layout import SharedCollections, make_bucket_layout
+from cloudberry_storage import CloudberryStorage
+from migrate_buckets import migrate_bucket
+from model_registry import ModelRegistry
+
+
+class CountingTextEmbedder(DeterministicTextEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def encode_texts(self, texts: list[str]):
+        self.calls += 1
+        return super().encode_texts(texts)
+
+
+class LocalOnePeace:
+    def encode_text(self, text: str):
+        return fake_vector(text.encode("utf-8"))
+
+    def encode_images(self, contents: list[bytes]):
+        return [fake_vector(content) for content in contents]
+
+
+def make_storage(qdrant_client, layout=None) -> CloudberryStorage:
+    registry = ModelRegistry(text_embedder=CountingTextEmbedder(), one_peace_client=LocalOnePeace(),
+                             qdrant_client=qdrant_client)
+    return CloudberryStorage(registry, layout=layout)
+
+
+def put_bucket(storage: CloudberryStorage, tickets: range) -> str:
+    bucket_uuid = str(uuid.uuid4())
+    storage.InitBucket(pb2.InitBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+    for i in tickets:
+        storage.PutEntry(synthetic_ticket(i, bucket_uuid), RecordingContext())
+    return bucket_uuid
+
+
+def found(storage: CloudberryStorage, bucket_uuid: str) -> set[str]:
+    context = RecordingContext()
+    response = storage.Find(pb2.FindRequest(query=pb2.TextEntry(content="error"), bucket_uuid=bucket_uuid, top_k=50),
+                            context)
+    assert context.code is None, context.details
+    return {entry.external_id for entry in response.entries}
+
+
+def test_make_bucket_layout():
+    assert not make_bucket_layout("collection").shared
+    layout = make_bucket_layout("shared", shared_collections=4)
+    assert {layout.collection(str(uuid.uuid4())) for _ in range(100)} <= {f"cloudberry_shared_{i}" for i in range(4)}
+    assert layout.collection("bucket") == layout.collection("bucket")
+
+
+def test_shared_buckets_are_isolated():
+    qdrant_client = SerializedClient(QdrantClient(":memory:"))
+    storage = make_storage(qdrant_client, SharedCollections())
+    # Одинаковые external_ticket_id в двух бакетах одной коллекции.
+    first, second = put_bucket(storage, range(3)), put_bucket(storage, range(2))
+
+    assert [c.name for c in qdrant_client.get_collections().collections] == ["cloudberry_shared_0"]
+    assert found(storage, first) == {"ticket-0", "ticket-1", "ticket-2"}
+    assert found(storage, second) == {"ticket-0", "ticket-1"}
+
+    storage.RemoveEntry(pb2.RemoveEntryRequest(bucket_uuid=first, external_ticket_id="ticket-0"), RecordingContext())
+    status = storage.GetEntryStatus(pb2.GetEntryStatusRequest(bucket_uuid=second, external_ticket_id="ticket-0"),
+                                    RecordingContext())
+    assert status.state == pb2.ENTRY_SEARCHABLE
+    assert found(storage, first) == {"ticket-1", "ticket-2"}
+
+    context = RecordingContext()
+    storage.DestroyBucket(pb2.DestroyBucketRequest(bucket_uuid=first), context)
+    assert context.code is None
+    assert found(storage, first) == set()
+    assert found(storage, second) == {"ticket-0", "ticket-1"}
+
+
+def test_shared_remove_entries_stays_in_bucket():
+    storage = make_storage(SerializedClient(QdrantClient(":memory:")), SharedCollections())
+    first, second = put_bucket(storage, range(2)), put_bucket(storage, range(2))
+
+    context = RecordingContext()
+    storage.RemoveEntries(pb2.RemoveEntriesRequest(
+        bucket_uuid=first, payload_matches=[pb2.PayloadMatch(key="ticket_id", values=["ticket-0", "ticket-1"])],
+        wait=True
+    ), context)
+
+    assert context.code is None
+    assert found(storage, first) == set()
+    assert found(storage, second) == {"ticket-0", "ticket-1"}
+
+
+def test_migration_keeps_results_and_point_ids():
+    qdrant_client = SerializedClient(QdrantClient(":memory:"))
+    old_storage = make_storage(qdrant_client)
+    bucket_uuid = put_bucket(old_storage, range(4))
+    expected = found(old_storage, bucket_uuid)
+
+    layout = SharedCollections()
+    storage = make_storage(qdrant_client, layout)
+    storage.create_collection_if_not_exists(layout.collection(bucket_uuid))
+    assert migrate_bucket(qdrant_client, layout, bucket_uuid, page_size=5) == 12
+    qdrant_client.delete_collection(bucket_uuid)
+
+    assert found(storage, bucket_uuid) == expected
+    # id точек совпали с теми, что считает PutEntry: повторная запись тикета ничего не пересчитывает.
+    text_embedder = storage.models_registry.text_embedder
+    calls = text_embedder.calls
+    context = RecordingContext()
+    storage.PutEntry(synthetic_ticket(1, bucket_uuid), context)
+    assert context.code is None
+    assert text_embedder.calls == calls
+    assert qdrant_client.count(layout.collection(bucket_uuid)).count == 12
+
+
+def test_per_bucket_destroy_of_unknown_bucket_is_not_found():
+    storage = make_storage(SerializedClient(QdrantClient(":memory:")))
+    context = RecordingContext()
+    storage.DestroyBucket(pb2.DestroyBucketRequest(bucket_uuid=str(uuid.uuid4())), context)
+    assert context.code == grpc.StatusCode.NOT_FOUND
@@ -0,0 +1,348 @@
+import asyncio
+import uuid
+from concurrent import futures
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+from benchmarks.stand_ins import DeterministicTextEmbedder, RecordingContext, SerializedClient, fake_vector, \
+    synthetic_ticket
+from async_cloudberry_storage import AsyncCloudberryStorage
+from cloudberry_storage import CloudberryStorage
+from ingest_queue import FAILED, IngestQueue
+from embedders.batching_embedder import BatchingTextEmbedder
+from model_registry import ModelRegistry
+from ocr import OcrPipeline
+from translation import QueryTranslator, TranslatorBackend
+
+
+class LocalOnePeace:
+    def encode_text(self, text: str):
+        return fake_vector(text.encode("utf-8"))
+
+    def encode_images(self, contents: list[bytes]):
+        return [fake_vector(content) for content in contents]
+
+
+class AsyncLocalOnePeace:
+    async def encode_text(self, text: str):
+        return fake_vector(text.encode("utf-8"))
+
+    async def encode_images(self, contents: list[bytes]):
+        return [fake_vector(content) for content in contents]
+
+
+class RecordingClient(SerializedClient):
+    """Локальный Qdrant, запоминающий каждый вызов с его именованными аргументами."""
+
+    def __init__(self, target):
+        super().__init__(target)
+        self.calls: list[tuple[str, dict]] = []
+
+    def __getattr__(self, attr: str):
+        value = super().__getattr__(attr)
+        if not callable(value):
+            return value
+
+        def recorded(*args, **kwargs):
+            self.calls.append((attr, kwargs))
+            return value(*args, **kwargs)
+
+        return recorded
+
+    def sent(self, method: str) -> list[dict]:
+        return [kwargs for name, kwargs in self.calls if name == method]
+
+
+class UppercaseTranslator(TranslatorBackend):
+    def translate(self, text: str) -> str:
+        return text.upper()
+
+
+class FlakyOcr:
+    """OCR в текущем процессе: пока failing, каждое вложение завершается ошибкой."""
+    languages = "eng+rus"
+    collect = OcrPipeline.collect
+    texts = staticmethod(OcrPipeline.texts)
+
+    def __init__(self):
+        self.failing = True
+        self.recognized = 0
+
+    def submit_many(self, contents: list[bytes]) -> list[futures.Future]:
+        pending = []
+        for _ in contents:
+            future = futures.Future()
+            self.recognized += 1
+            if self.failing:
+                future.set_exception(RuntimeError("tesseract упал"))
+            else:
+                future.set_result("Traceback")
+            pending.append(future)
+        return pending
+
+
+class HeldOcr(FlakyOcr):
+    """OCR, результаты которого приходят только после release()."""
+
+    def __init__(self):
+        super().__init__()
+        self.held: list[futures.Future] = []
+
+    def submit_many(self, contents: list[bytes]) -> list[futures.Future]:
+        pending = [futures.Future() for _ in contents]
+        self.held.extend(pending)
+        return pending
+
+    def release(self) -> None:
+        for future in self.held:
+            future.set_result("Traceback")
+
+
+def make_storage(ocr_pipeline=None) -> tuple[CloudberryStorage, RecordingClient, str]:
+    qdrant_client = RecordingClient(QdrantClient(":memory:"))
+    registry = ModelRegistry(text_embedder=DeterministicTextEmbedder(), one_peace_client=LocalOnePeace(),
+                             qdrant_client=qdrant_client, query_translator=QueryTranslator(UppercaseTranslator()),
+                             ocr_pipeline=ocr_pipeline, text_model_id="sbert:test", image_model_id="one-peace")
+    storage = CloudberryStorage(registry)
+    bucket_uuid = str(uuid.uuid4())
+    storage.InitBucket(pb2.InitBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+    qdrant_client.calls.clear()
+    return storage, qdrant_client, bucket_uuid
+
+
+def upserted_points(operations) -> list:
+    return [point for operation in operations if hasattr(operation, "upsert") for point in operation.upsert.points]
+
+
+def test_batch_put_entries_reports_per_ticket_statuses():
+    storage, qdrant_client, bucket_uuid = make_storage()
+    broken = synthetic_ticket(1, bucket_uuid)
+    broken.ticket.attachments[0].content = b"not an image"
+    missing_bucket = synthetic_ticket(3, str(uuid.uuid4()))
+    context = RecordingContext()
+
+    response = storage.BatchPutEntries(iter([synthetic_ticket(0, bucket_uuid), broken,
+                                             synthetic_ticket(2, bucket_uuid), missing_bucket]), context)
+
+    assert context.code is None
+    assert [(status.external_ticket_id, status.ok) for status in response.statuses] == [
+        ("ticket-0", True), ("ticket-1", False), ("ticket-2", True), ("ticket-3", False)
+    ]
+    assert all(status.error for status in response.statuses if not status.ok)
+    # Удачные тикеты бакета записаны одним вызовом, тикеты с ошибками в него не попали.
+    writes = qdrant_client.sent("batch_update_points")
+    assert [write["collection_name"] for write in writes] == [bucket_uuid]
+    points = upserted_points(writes[0]["update_operations"])
+    assert {point.payload["ticket_id"] for point in points} == {"ticket-0", "ticket-2"}
+    assert len(points) == 6
+
+
+def test_grouped_find_returns_distinct_tickets_up_to_top_k():
+    storage, qdrant_client, bucket_uuid = make_storage()
+    # По три вложения на тикет: без группировки одни и те же тикеты заняли бы весь top_k.
+    storage.BatchPutEntries(iter([synthetic_ticket(i, bucket_uuid, attachments=3) for i in range(6)]),
+                            RecordingContext())
+    qdrant_client.calls.clear()
+    context = RecordingContext()
+
+    response = storage.Find(pb2.FindRequest(query=pb2.TextEntry(content="server error"), bucket_uuid=bucket_uuid,
+                                            top_k=4, images=[synthetic_ticket(0, bucket_uuid).ticket.attachments[0]]),
+                            context)
+
+    assert context.code is None
+    ticket_ids = [entry.external_id for entry in response.entries]
+    assert len(ticket_ids) == len(set(ticket_ids)) == 4
+    assert [entry.score for entry in response.entries] == sorted((entry.score for entry in response.entries),
+                                                                 reverse=True)
+    searches = qdrant_client.sent("query_points_groups")
+    assert searches and not qdrant_client.sent("query_points")
+    for search in searches:
+        assert (search["group_by"], search["group_size"], search["limit"]) == ("ticket_id", 1, 4)
+        assert search["with_payload"] is False
+
+
+def test_ticket_text_is_stored_once_and_not_read_back():
+    storage, qdrant_client, bucket_uuid = make_storage()
+    request = synthetic_ticket(0, bucket_uuid, attachments=2)
+
+    storage.PutEntry(request, RecordingContext())
+
+    (write,) = qdrant_client.sent("batch_update_points")
+    payloads = {point.payload["type"]: point.payload for point in upserted_points(write["update_operations"])}
+    assert payloads["title"]["title"] == request.ticket.title.content
+    assert payloads["description"]["description"] == request.ticket.description.content
+    assert "description" not in payloads["title"] and "title" not in payloads["description"]
+    images = [point.payload for point in upserted_points(write["update_operations"])
+              if point.payload["type"] == "image"]
+    assert len(images) == 2
+    assert all(set(payload) <= {"ticket_id", "type", "img_idx", "content_hash", "ocr_text"} for payload in images)
+    # Перед записью читаются только хэши, а не сохранённый текст тикета.
+    (scroll,) = qdrant_client.sent("scroll")
+    assert scroll["with_payload"] == ["ticket_id", "content_hash"] and scroll["with_vectors"] is False
+
+
+def test_entry_status_counts_points_exactly():
+    storage, qdrant_client, bucket_uuid = make_storage()
+    storage.PutEntry(synthetic_ticket(0, bucket_uuid), RecordingContext())
+    qdrant_client.calls.clear()
+
+    states = [storage.GetEntryStatus(pb2.GetEntryStatusRequest(bucket_uuid=bucket_uuid, external_ticket_id=ticket_id),
+                                     RecordingContext()).state
+              for ticket_id in ("ticket-0", "ticket-1")]
+
+    assert states == [pb2.ENTRY_SEARCHABLE, pb2.ENTRY_UNKNOWN]
+    assert [count["exact"] for count in qdrant_client.sent("count")] == [True, True]
+
+
+def test_find_searches_images_with_translated_one_peace_text_vector():
+    storage, qdrant_client, bucket_uuid = make_storage()
+    image = synthetic_ticket(0, bucket_uuid).ticket.attachments[0]
+    storage.PutEntry(synthetic_ticket(0, bucket_uuid), RecordingContext())
+    qdrant_client.calls.clear()
+
+    storage.Find(pb2.FindRequest(query=pb2.TextEntry(content="ошибка сервера"), bucket_uuid=bucket_uuid,
+                                 images=[image]), RecordingContext())
+
+    branches = {(search["using"], tuple(search["query"])) for search in qdrant_client.sent("query_points_groups")}
+    assert branches == {
+        ("description_sbert_embedding", tuple(DeterministicTextEmbedder().encode_text("ошибка сервера").tolist())),
+        # Текстовый вектор ONE-PEACE — от переведённого запроса, и он ищет по векторам картинок.
+        ("one_peace_embedding", tuple(fake_vector("ОШИБКА СЕРВЕРА".encode("utf-8")).tolist())),
+        ("one_peace_embedding", tuple(fake_vector(image.content).tolist())),
+    }
+
+
+def test_async_servicer_does_not_start_find_pool():
+    registry = ModelRegistry(text_embedder=DeterministicTextEmbedder(), one_peace_client=LocalOnePeace(),
+                             qdrant_client=None)
+    assert AsyncCloudberryStorage(registry)._find_pool is None
+    assert CloudberryStorage(registry)._find_pool is not None
+
+
+def test_last_copy_of_a_ticket_in_a_batch_wins():
+    storage, qdrant_client, bucket_uuid = make_storage()
+    storage.PutEntry(synthetic_ticket(0, bucket_uuid, attachments=2), RecordingContext())
+    latest = synthetic_ticket(0, bucket_uuid, attachments=1)
+    latest.ticket.title.content = "new title"
+    qdrant_client.calls.clear()
+
+    # Вторая копия убирает вложение, а первая — прежняя версия — его ещё содержит.
+    response = storage.BatchPutEntries(iter([synthetic_ticket(0, bucket_uuid, attachments=2), latest]),
+                                       RecordingContext())
+
+    assert [(status.ok, status.superseded) for status in response.statuses] == [(True, True), (True, False)]
+    (write,) = qdrant_client.sent("batch_update_points")
+    assert [point.payload["title"] for point in upserted_points(write["update_operations"])] == ["new title"]
+    records, _ = qdrant_client.scroll(bucket_uuid, limit=100, with_payload=True)
+    assert sorted((r.payload["type"], r.payload.get("img_idx")) for r in records) == [
+        ("description", None), ("image", 0), ("title", None)
+    ]
+
+
+def test_attachment_with_failed_ocr_is_recognized_again_on_resend():
+    ocr = FlakyOcr()
+    storage, qdrant_client, bucket_uuid = make_storage(ocr)
+    storage.PutEntry(synthetic_ticket(0, bucket_uuid, attachments=2), RecordingContext())
+    (write,) = qdrant_client.sent("batch_update_points")
+    images = [point.payload for point in upserted_points(write["update_operations"])
+              if point.payload["type"] == "image"]
+    assert images and all("content_hash" not in payload for payload in images)
+
+    ocr.failing = False
+    qdrant_client.calls.clear()
+    storage.PutEntry(synthetic_ticket(0, bucket_uuid, attachments=2), RecordingContext())
+
+    (write,) = qdrant_client.sent("batch_update_points")
+    points = upserted_points(write["update_operations"])
+    # Заголовок и описание не изменились; пересчитаны только картинки, и теперь с текстом и хэшем.
+    assert [point.payload["type"] for point in points] == ["image", "image"]
+    assert all(point.payload["ocr_text"] == "Traceback" and point.payload["content_hash"] for point in points)
+    assert ocr.recognized == 4
+
+
+async def _async_storage(text_embedder=None, ocr_pipeline=None, cpu_workers: int = 4, ingest_queue=None) -> tuple:
+    registry = ModelRegistry(text_embedder=text_embedder or DeterministicTextEmbedder(),
+                             one_peace_client=AsyncLocalOnePeace(), qdrant_client=AsyncQdrantClient(":memory:"),
+                             ocr_pipeline=ocr_pipeline)
+    storage = AsyncCloudberryStorage(registry, cpu_workers=cpu_workers, ingest_queue=ingest_queue)
+    bucket_uuid = str(uuid.uuid4())
+    await storage.InitBucket(pb2.InitBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+    return storage, bucket_uuid
+
+
+def test_async_servicer_puts_finds_and_reports_tickets():
+    async def scenario():
+        storage, bucket_uuid = await _async_storage()
+        context = RecordingContext()
+        for i in range(3):
+            await storage.PutEntry(synthetic_ticket(i, bucket_uuid, attachments=2), context)
+        found = await storage.Find(pb2.FindRequest(query=pb2.TextEntry(content="server error"),
+                                                   bucket_uuid=bucket_uuid, top_k=2), context)
+        statuses = [await storage.GetEntryStatus(pb2.GetEntryStatusRequest(bucket_uuid=bucket_uuid,
+                                                                           external_ticket_id=ticket_id), context)
+                    for ticket_id in ("ticket-1", "ticket-9")]
+        return context, found, statuses
+
+    context, found, statuses = asyncio.run(scenario())
+
+    assert context.code is None
+    ticket_ids = [entry.external_id for entry in found.entries]
+    assert len(ticket_ids) == len(set(ticket_ids)) == 2
+    assert [status.state for status in statuses] == [pb2.ENTRY_SEARCHABLE, pb2.ENTRY_UNKNOWN]
+
+
+def test_async_ocr_and_batcher_waits_do_not_hold_cpu_threads():
+    text_embedder = BatchingTextEmbedder(DeterministicTextEmbedder())
+    ocr = HeldOcr()
+
+    async def scenario():
+        storage, bucket_uuid = await _async_storage(text_embedder, ocr, cpu_workers=1)
+        put = asyncio.create_task(storage.PutEntry(synthetic_ticket(0, bucket_uuid), RecordingContext()))
+        try:
+            while not ocr.held:
+                await asyncio.sleep(0.01)
+            # PutEntry ждёт OCR; единственный CPU-поток при этом свободен, и Find с картинкой проходит.
+            context = RecordingContext()
+            image = synthetic_ticket(1, bucket_uuid).ticket.attachments[0]
+            await asyncio.wait_for(storage.Find(pb2.FindRequest(query=pb2.TextEntry(content="error"),
+                                                                bucket_uuid=bucket_uuid, images=[image]), context),
+                                   timeout=5)
+            assert context.code is None and not put.done()
+        finally:
+            ocr.release()
+        await put
+        return await storage.models_registry.qdrant_client.scroll(bucket_uuid, limit=10)
+
+    try:
+        records, _ = asyncio.run(scenario())
+    finally:
+        text_embedder.close()
+    assert [record.payload.get("ocr_text") for record in records if record.payload["type"] == "image"] == \
+        ["Traceback"]
+
+
+def test_async_ingest_worker_marks_failed_batch_and_keeps_ticket_unblocked(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"))
+
+    async def failing_batch(requests):
+        raise RuntimeError("qdrant is down")
+
+    async def scenario():
+        storage, bucket_uuid = await _async_storage(ingest_queue=queue)
+        storage._put_batch = failing_batch
+        await storage.PutEntry(synthetic_ticket(0, bucket_uuid), RecordingContext())
+        worker = asyncio.create_task(storage.run_ingest_worker(poll_interval=0.01))
+        try:
+            while queue.status(bucket_uuid, "ticket-0")[0] != FAILED:
+                await asyncio.sleep(0.01)
+        finally:
+            worker.cancel()
+        return bucket_uuid
+
+    bucket_uuid = asyncio.run(asyncio.wait_for(scenario(), timeout=10))
+
+    assert queue.status(bucket_uuid, "ticket-0") == (FAILED, "qdrant is down")
+    # Следующая версия тикета не ждёт «вечной» строки в processing.
+    queue.enqueue(synthetic_ticket(0, bucket_uuid))
+    assert [request.external_ticket_id for _, request in queue.claim_batch(10)] == ["ticket-0"]
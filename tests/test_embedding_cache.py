@@ -0,0 +1,134 @@
+import numpy as np
+
+from embedders.batching_embedder import BatchingTextEmbedder
+from embedders.embedding_cache import CachedOnePeaceClient, CachedTextEmbedder, EmbeddingCache
+from embedders.interfaces import TextEmbedder
+from metrics import EMBEDDING_CACHE_HIT_RATE, REGISTRY
+
+
+class CountingEmbedder(TextEmbedder):
+    def __init__(self):
+        self.encoded = []
+
+    def encode_text(self, text: str) -> np.ndarray:
+        self.encoded.append(text)
+        return np.full(4, float(len(text)), dtype=np.float32)
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = EmbeddingCache("model", 4, max_entries=2)
+    keys = [cache.key(bytes([i])) for i in range(3)]
+    for key in keys:
+        cache.put(key, np.ones(4))
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_model_identity_is_part_of_the_key():
+    assert EmbeddingCache("a", 4).key(b"x") != EmbeddingCache("b", 4).key(b"x")
+    assert EmbeddingCache("a", 4).key(b"x", "text") != EmbeddingCache("a", 4).key(b"x", "image")
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "vectors.f32")
+    cache = EmbeddingCache("model", 4, disk_path=path, disk_capacity=8)
+    key = cache.key(b"screenshot")
+    cache.put(key, np.arange(4))
+    cache.flush()
+
+    reopened = EmbeddingCache("model", 4, disk_path=path, disk_capacity=8)
+    assert reopened.get(key).tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_torn_disk_row_is_dropped_on_load(tmp_path):
+    path = str(tmp_path / "vectors.f32")
+    cache = EmbeddingCache("model", 4, disk_path=path, disk_capacity=8)
+    torn, intact = cache.key(b"torn"), cache.key(b"intact")
+    cache.put(torn, np.arange(4))
+    cache.put(intact, np.ones(4))
+    cache.flush()
+    # Процесс упал, когда ключ уже лежал на диске, а вектор записался не полностью.
+    vectors = np.memmap(path, dtype=np.float32, mode="r+", shape=(8, 4))
+    vectors[0] = 0.0
+    vectors.flush()
+    del vectors
+
+    reopened = EmbeddingCache("model", 4, disk_path=path, disk_capacity=8)
+    assert reopened.get(torn) is None
+    assert reopened.get(intact).tolist() == [1.0] * 4
+    assert reopened.stats()["disk_entries"] == 1
+
+
+def test_cached_text_embedder_skips_repeats():
+    inner = CountingEmbedder()
+    embedder = CachedTextEmbedder(inner, EmbeddingCache("model", 4))
+
+    first = embedder.encode_texts(["title", "description", "title"])
+    second = embedder.encode_text("description")
+
+    assert inner.encoded == ["title", "description"]
+    assert first[:, 0].tolist() == [5.0, 11.0, 5.0]
+    assert second[0] == 11.0
+    assert embedder.cache.stats()["hits"] == 1
+
+
+def test_submitted_texts_are_cached_when_the_batcher_answers():
+    inner = CountingEmbedder()
+    batcher = BatchingTextEmbedder(inner)
+    try:
+        embedder = CachedTextEmbedder(batcher, EmbeddingCache("model", 4))
+        submitted = embedder.submit_texts(["title", "title"])
+        assert [future.result(timeout=5)[0] for future in submitted] == [5.0, 5.0]
+
+        (cached,) = embedder.submit_texts(["title"])
+        assert cached.done() and inner.encoded == ["title"]
+        # Без неблокирующего пути у обёрнутого эмбеддера вызывающий уходит в encode_texts.
+        assert CachedTextEmbedder(inner, EmbeddingCache("other", 4)).submit_texts(["title"]) is None
+    finally:
+        batcher.close()
+
+
+def test_cached_one_peace_client_does_not_cache_failures():
+    class FlakyClient:
+        def __init__(self):
+            self.calls = 0
+
+        def encode_images(self, contents):
+            self.calls += 1
+            return [np.empty(0, dtype=np.float32) if self.calls == 1 else np.ones(4, dtype=np.float32)
+                    for _ in contents]
+
+    client = CachedOnePeaceClient(FlakyClient(), EmbeddingCache("one-peace", 4))
+    assert [v.tolist() for v in client.encode_images([b"img"])] == [[]]
+    assert [v.tolist() for v in client.encode_images([b"img"])] == [[1.0] * 4]
+    assert [v.tolist() for v in client.encode_images([b"img"])] == [[1.0] * 4]
+    assert client.client.calls == 2
+
+
+def test_disk_tier_with_other_parameters_is_rebuilt(tmp_path):
+    path = str(tmp_path / "vectors.f32")
+    cache = EmbeddingCache("model", 4, disk_path=path, disk_capacity=8)
+    key = cache.key(b"screenshot")
+    cache.put(key, np.arange(4))
+    cache.flush()
+
+    resized = EmbeddingCache("model", 6, disk_path=path, disk_capacity=8)
+    assert resized.get(key) is None and resized.stats()["disk_entries"] == 0
+    resized.put(key, np.arange(6))
+    resized.flush()
+    assert EmbeddingCache("model", 6, disk_path=path, disk_capacity=8).get(key).tolist() == list(range(6))
+    assert EmbeddingCache("model", 6, disk_path=path, disk_capacity=16).stats()["disk_entries"] == 0
+
+
+def test_hit_rate_is_exported():
+    cache = EmbeddingCache("metrics-test", 4)
+    key = cache.key(b"x")
+    cache.get(key)
+    cache.put(key, np.ones(4))
+    cache.get(key)
+
+    assert EMBEDDING_CACHE_HIT_RATE.value(model="metrics-test") == 0.5
+    assert 'cloudberry_embedding_cache_hit_rate{model="metrics-test"} 0.5' in REGISTRY.render()
@@ -0,0 +1,127 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+from benchmarks.stand_ins import DeterministicTextEmbedder, RecordingContext, SerializedClient, fake_vector, \
+    synthetic_png, synthetic_ticket
+from cloudberry_storage import CloudberryStorage
+from find_cache import FindResultCache, TtlLruCache
+from model_registry import ModelRegistry
+
+
+class CountingTextEmbedder(DeterministicTextEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.texts: list[str] = []
+
+    def encode_texts(self, texts: list[str]):
+        self.texts.extend(texts)
+        return super().encode_texts(texts)
+
+
+class LocalOnePeace:
+    def __init__(self):
+        self.texts: list[str] = []
+        self.images = 0
+
+    def encode_text(self, text: str):
+        self.texts.append(text)
+        return fake_vector(text.encode("utf-8"))
+
+    def encode_texts(self, texts: list[str]):
+        return [self.encode_text(text) for text in texts]
+
+    def encode_images(self, contents: list[bytes]):
+        self.images += len(contents)
+        return [fake_vector(content) for content in contents]
+
+
+def test_ttl_and_lru_eviction():
+    now = [0.0]
+    cache = TtlLruCache(max_entries=2, ttl=30.0, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    now[0] = 30.0
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_request_key():
+    cache = FindResultCache(max_entries=10)
+    image = pb2.ImageEntry(content=b"png")
+
+    def key(**kwargs):
+        fields = {"bucket_uuid": "b", "query": pb2.TextEntry(content="disk  is full "), "top_k": 10, **kwargs}
+        return cache.request_key(pb2.FindRequest(**fields), fields["top_k"])
+
+    assert key() == key(query=pb2.TextEntry(content=" disk is\tfull"))
+    assert len({key(), key(top_k=5), key(images=[image]), key(search_params=pb2.SearchParams(hnsw_ef=64))}) == 4
+
+    before = key()
+    cache.invalidate("b")
+    assert key() != before
+    assert cache.generation("other") == 0
+
+
+@pytest.fixture
+def storage():
+    text_embedder, one_peace = CountingTextEmbedder(), LocalOnePeace()
+    registry = ModelRegistry(text_embedder=text_embedder, one_peace_client=one_peace,
+                             qdrant_client=SerializedClient(QdrantClient(":memory:")))
+    storage = CloudberryStorage(registry, find_cache=FindResultCache(100, ttl=60.0), query_cache=TtlLruCache(100))
+    bucket_uuid = str(uuid.uuid4())
+    storage.InitBucket(pb2.InitBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+    for i in range(3):
+        storage.PutEntry(synthetic_ticket(i, bucket_uuid), RecordingContext())
+    text_embedder.texts.clear()
+    one_peace.texts.clear()
+    one_peace.images = 0
+    return storage, bucket_uuid, text_embedder, one_peace
+
+
+def find(storage, bucket_uuid: str, query: str) -> pb2.FindResponse:
+    request = pb2.FindRequest(query=pb2.TextEntry(content=query), bucket_uuid=bucket_uuid, top_k=10,
+                              images=[pb2.ImageEntry(content=synthetic_png(7), content_type=pb2.PNG)])
+    context = RecordingContext()
+    response = storage.Find(request, context)
+    assert context.code is None, context.details
+    return response
+
+
+def test_repeated_find_is_served_from_cache(storage):
+    storage, bucket_uuid, text_embedder, one_peace = storage
+
+    first = find(storage, bucket_uuid, "server crash")
+    second = find(storage, bucket_uuid, "  server   crash ")
+
+    assert second is first
+    assert len(first.entries) == 3
+    assert text_embedder.texts == ["server crash"]
+    assert one_peace.texts == ["server crash"] and one_peace.images == 1
+
+
+def test_writes_invalidate_results_but_keep_query_vectors(storage):
+    storage, bucket_uuid, text_embedder, one_peace = storage
+    before = find(storage, bucket_uuid, "server crash")
+
+    storage.PutEntry(synthetic_ticket(3, bucket_uuid), RecordingContext())
+    text_embedder.texts.clear()
+    one_peace.images = 0
+    after_put = find(storage, bucket_uuid, "server crash")
+    assert after_put is not before
+    assert {entry.external_id for entry in after_put.entries} == {f"ticket-{i}" for i in range(4)}
+
+    storage.RemoveEntry(pb2.RemoveEntryRequest(bucket_uuid=bucket_uuid, external_ticket_id="ticket-0"),
+                        RecordingContext())
+    after_remove = find(storage, bucket_uuid, "server crash")
+    assert "ticket-0" not in {entry.external_id for entry in after_remove.entries}
+
+    # Ответы пересчитывались, но векторы запроса брались из кэша.
+    assert text_embedder.texts == []
+    assert one_peace.texts == ["server crash"] and one_peace.images == 0
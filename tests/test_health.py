@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from benchmarks.stand_ins import DeterministicTextEmbedder
+from health import wait_until_ready, warm_up
+from model_registry import ModelRegistry
+
+
+class FlakyOnePeace:
+    """Первые failures вызовов ведут себя как недоступный сервис: OnePeaceClient возвращает пустые векторы."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def encode_texts(self, texts: list[str]) -> list[np.ndarray]:
+        self.calls += 1
+        if self.calls <= self.failures:
+            return [np.empty(0, dtype=np.float32) for _ in texts]
+        return [np.ones(2, dtype=np.float32) for _ in texts]
+
+
+def make_registry(one_peace) -> ModelRegistry:
+    return ModelRegistry(text_embedder=DeterministicTextEmbedder(), one_peace_client=one_peace,
+                         qdrant_client=QdrantClient(":memory:"))
+
+
+def test_warm_up_fails_while_one_peace_is_unavailable():
+    with pytest.raises(RuntimeError):
+        warm_up(make_registry(FlakyOnePeace(failures=1)))
+
+
+def test_wait_until_ready_retries_until_warm_up_passes():
+    one_peace = FlakyOnePeace(failures=2)
+    registry = make_registry(one_peace)
+
+    elapsed = wait_until_ready(lambda: warm_up(registry), retry_interval=0.01)
+
+    assert one_peace.calls == 3
+    assert elapsed >= 0.02
@@ -0,0 +1,33 @@
+from io import BytesIO
+
+from PIL import Image
+
+from image_preprocessing import ONE_PEACE_INPUT_SIZE, prepare_for_one_peace
+
+
+def encode(image: Image.Image, format_str: str) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format=format_str)
+    return buffer.getvalue()
+
+
+def test_small_image_is_forwarded_as_is():
+    content = encode(Image.new("RGB", (200, 120), "red"), "PNG")
+    assert prepare_for_one_peace(content) is content
+
+
+def test_large_png_is_downscaled():
+    content = encode(Image.effect_noise((1920, 1080), 64).convert("RGB"), "PNG")
+    prepared = prepare_for_one_peace(content)
+    assert len(prepared) < len(content)
+    assert Image.open(BytesIO(prepared)).size == ONE_PEACE_INPUT_SIZE
+
+
+def test_large_jpeg_is_downscaled_via_draft():
+    content = encode(Image.new("RGB", (2048, 1536), "blue"), "JPEG")
+    assert Image.open(BytesIO(prepare_for_one_peace(content))).size == ONE_PEACE_INPUT_SIZE
+
+
+def test_alpha_channel_is_dropped():
+    content = encode(Image.new("RGBA", (64, 64), (0, 0, 255, 128)), "PNG")
+    assert Image.open(BytesIO(prepare_for_one_peace(content))).mode == "RGB"
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from cloudberry_storage_pb2 import PutEntryRequest, PutEntryStatus, TextEntry, TicketEntry
+from ingest_queue import IngestQueue, IngestWorkerPool, QueueFullError, PENDING, PROCESSING, DONE, FAILED
+
+
+def _request(ticket_id: str, version: str = "") -> PutEntryRequest:
+    return PutEntryRequest(external_ticket_id=ticket_id, bucket_uuid="bucket",
+                           ticket=TicketEntry(title=TextEntry(content=version)))
+
+
+def test_enqueue_claim_complete(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(_request("a"))
+    queue.enqueue(_request("b"))
+
+    claimed = queue.claim_batch(10)
+    assert [request.external_ticket_id for _, request in claimed] == ["a", "b"]
+    assert queue.status("bucket", "a") == (PROCESSING, "")
+    assert queue.claim_batch(10) == []
+
+    queue.complete([(claimed[0][0], PutEntryStatus(ok=True)), (claimed[1][0], PutEntryStatus(ok=False, error="boom"))])
+    assert queue.status("bucket", "a") == (DONE, "")
+    assert queue.status("bucket", "b") == (FAILED, "boom")
+    assert queue.status("bucket", "missing") is None
+    assert queue.depth() == 0
+
+
+def test_backpressure(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"), max_depth=2)
+    queue.enqueue(_request("a"))
+    queue.enqueue(_request("b"))
+    with pytest.raises(QueueFullError):
+        queue.enqueue(_request("c"))
+    assert queue.status("bucket", "c") is None
+
+
+def test_recover_after_restart(tmp_path):
+    path = str(tmp_path / "queue.db")
+    queue = IngestQueue(path)
+    queue.enqueue(_request("a"))
+    queue.claim_batch(10)
+    queue.close()
+
+    restarted = IngestQueue(path)
+    assert restarted.status("bucket", "a") == (PENDING, "")
+    assert [request.external_ticket_id for _, request in restarted.claim_batch(10)] == ["a"]
+
+
+def test_worker_marks_batch_failed_on_error(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(_request("a"))
+
+    def process_batch(requests):
+        raise RuntimeError("qdrant is down")
+
+    assert IngestWorkerPool(queue, process_batch).run_once() == 1
+    assert queue.status("bucket", "a") == (FAILED, "qdrant is down")
+
+
+def test_only_latest_version_is_claimed_and_in_flight_tickets_are_skipped(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(_request("a", "v1"))
+    queue.enqueue(_request("b", "v1"))
+    queue.enqueue(_request("a", "v2"))
+
+    claimed = queue.claim_batch(10)
+    assert [(r.external_ticket_id, r.ticket.title.content) for _, r in claimed] == [("b", "v1"), ("a", "v2")]
+    assert queue.depth() == 2
+
+    # Пока v2 в работе, v3 того же тикета не берётся ни одним воркером.
+    queue.enqueue(_request("a", "v3"))
+    assert queue.claim_batch(10) == []
+    queue.complete([(row_id, PutEntryStatus(ok=True)) for row_id, _ in claimed])
+    assert queue.status("bucket", "a") == (PENDING, "")
+    assert [r.ticket.title.content for _, r in queue.claim_batch(10)] == ["v3"]
+
+
+def test_concurrent_workers_keep_the_latest_version(tmp_path):
+    queue = IngestQueue(str(tmp_path / "queue.db"))
+    stored: dict[str, str] = {}
+    in_flight: set[str] = set()
+    overlaps = []
+    lock = threading.Lock()
+
+    def process_batch(requests):
+        with lock:
+            tickets = {request.external_ticket_id for request in requests}
+            overlaps.extend(tickets & in_flight)
+            in_flight.update(tickets)
+        # Более старые версии пишутся дольше: при гонке они перезаписали бы новые.
+        time.sleep(0.05 if requests[0].ticket.title.content.endswith("0") else 0.01)
+        with lock:
+            for request in requests:
+                stored[request.external_ticket_id] = request.ticket.title.content
+            in_flight.difference_update(tickets)
+        return [PutEntryStatus(ok=True) for _ in requests]
+
+    pool = IngestWorkerPool(queue, process_batch, workers=4, batch_size=1, poll_interval=0.01)
+    pool.start()
+    for version in range(20):
+        for ticket_id in ("a", "b"):
+            queue.enqueue(_request(ticket_id, f"v{version}"))
+        time.sleep(0.005)
+    deadline = time.monotonic() + 10
+    while queue.depth() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    pool.stop()
+
+    assert overlaps == []
+    assert stored == {"a": "v19", "b": "v19"}
+    assert queue.status("bucket", "a") == (DONE, "") and queue.status("bucket", "b") == (DONE, "")
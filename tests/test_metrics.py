@@ -0,0 +1,63 @@
+import urllib.request
+from concurrent import futures
+
+import grpc
+
+import one_peace_service_pb2 as pb2
+import one_peace_service_pb2_grpc as pb2_grpc
+from benchmarks.stand_ins import BatchOnePeaceServicer
+from metrics import Histogram, MetricsInterceptor, MetricsRegistry, RPC_IN_FLIGHT, RPC_SECONDS, start_metrics_server
+
+
+class FailingServicer(BatchOnePeaceServicer):
+    def EncodeText(self, request, context):
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        return pb2.VectorResponse()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("test_seconds", "Тест.", ("stage",), buckets=(0.1, 1.0)))
+    histogram.observe(0.05, stage="sbert")
+    histogram.observe(0.5, stage="sbert")
+    histogram.observe(5.0, stage="sbert")
+
+    text = registry.render()
+    assert 'test_seconds_bucket{stage="sbert",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{stage="sbert",le="1.0"} 2' in text
+    assert 'test_seconds_bucket{stage="sbert",le="+Inf"} 3' in text
+    assert 'test_seconds_count{stage="sbert"} 3' in text
+    assert histogram.count(stage="sbert") == 3
+
+
+def test_interceptor_records_latency_and_codes():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2), interceptors=[MetricsInterceptor()])
+    pb2_grpc.add_OnePeaceEmbedderServicer_to_server(FailingServicer(), server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    ok_before = RPC_SECONDS.count(method="EncodeImage", code="OK")
+    failed_before = RPC_SECONDS.count(method="EncodeText", code="INVALID_ARGUMENT")
+    try:
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            stub = pb2_grpc.OnePeaceEmbedderStub(channel)
+            stub.EncodeImage(pb2.ImageRequest(content=b"image"))
+            try:
+                stub.EncodeText(pb2.TextRequest(text="query"))
+            except grpc.RpcError as e:
+                assert e.code() == grpc.StatusCode.INVALID_ARGUMENT
+    finally:
+        server.stop(None)
+
+    assert RPC_SECONDS.count(method="EncodeImage", code="OK") == ok_before + 1
+    assert RPC_SECONDS.count(method="EncodeText", code="INVALID_ARGUMENT") == failed_before + 1
+    assert RPC_IN_FLIGHT.value(method="EncodeImage") == 0
+
+
+def test_metrics_endpoint():
+    server = start_metrics_server(0, host="localhost")
+    try:
+        with urllib.request.urlopen(f"http://localhost:{server.server_port}/metrics") as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+    assert "# TYPE cloudberry_stage_seconds histogram" in body
@@ -0,0 +1,80 @@
+import os
+import time
+from concurrent import futures
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from ocr import OcrPipeline, likely_has_text, prepare_for_ocr
+
+
+def slow_recognizer(content: bytes, languages: str, timeout: float) -> str:
+    if content == b"slow":
+        time.sleep(timeout + 2)
+    if content == b"crash":
+        os._exit(1)
+    if content == b"broken":
+        raise ValueError("cannot identify image file")
+    return content.decode("utf-8")
+
+
+def test_blank_images_are_skipped():
+    assert not likely_has_text(Image.new("RGB", (1280, 720), "white"))
+
+
+def test_screenshot_with_text_is_recognized_as_text():
+    image = Image.new("RGB", (640, 200), "white")
+    draw = ImageDraw.Draw(image)
+    for line in range(6):
+        draw.text((10, 10 + line * 30), "Traceback (most recent call last): KeyError 'ticket_id'", fill="black")
+    assert likely_has_text(image)
+
+
+def test_prepare_for_ocr_downscales_and_binarizes():
+    prepared = prepare_for_ocr(Image.effect_noise((4000, 3000), 64).convert("RGB"))
+    assert max(prepared.size) == 2000
+    assert set(np.unique(np.asarray(prepared)).tolist()) <= {0, 255}
+
+
+def test_pipeline_enforces_time_budget_and_swallows_errors():
+    pipeline = OcrPipeline(max_workers=2, timeout=0.5, recognizer=slow_recognizer)
+    try:
+        assert pipeline.recognize_many([b"first", b"slow", b"broken", b"last"]) == ["first", None, None, "last"]
+    finally:
+        pipeline.close()
+
+
+def test_hung_worker_is_replaced_without_failing_other_requests():
+    pipeline = OcrPipeline(max_workers=2, timeout=0.5, recognizer=slow_recognizer)
+    try:
+        slow = pipeline.submit_many([b"slow"])
+        # Второй процесс тем временем обслуживает другой запрос: перезапуск зависшего его не задевает.
+        assert pipeline.recognize_many([b"fast"] * 3) == ["fast"] * 3
+        assert pipeline.collect(slow) == [None]
+        assert pipeline.restarts == 1
+        assert pipeline.recognize_many([b"after", b"after"]) == ["after", "after"]
+    finally:
+        pipeline.close()
+
+
+def test_time_in_queue_does_not_count_against_deadline():
+    pipeline = OcrPipeline(max_workers=1, timeout=0.5, recognizer=slow_recognizer)
+    try:
+        slow = pipeline.submit_many([b"slow"])
+        started = time.perf_counter()
+        # Вложение ждёт в очереди дольше срока одной задачи, но его собственный срок ещё не начался.
+        assert pipeline.recognize_many([b"queued"]) == ["queued"]
+        assert time.perf_counter() - started > 1.5
+        futures.wait(slow)
+    finally:
+        pipeline.close()
+
+
+def test_crashed_worker_is_restarted():
+    pipeline = OcrPipeline(max_workers=1, timeout=0.5, recognizer=slow_recognizer)
+    try:
+        assert pipeline.recognize_many([b"crash"]) == [None]
+        assert pipeline.restarts == 1
+        assert pipeline.recognize_many([b"first", b"second"]) == ["first", "second"]
+    finally:
+        pipeline.close()
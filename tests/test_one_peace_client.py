@@ -0,0 +1,111 @@
+import asyncio
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import one_peace_service_pb2 as pb2
+from embedders.async_one_peace_client import AsyncOnePeaceClient
+from embedders.one_peace_client import OnePeaceClient, response_vector
+from embedders.resilience import OnePeaceError
+from benchmarks.stand_ins import BatchOnePeaceServicer, UnaryOnePeaceServicer, fake_vector, start_fake_server
+
+
+class ShortBatchServicer(BatchOnePeaceServicer):
+    """Теряет последний вектор пачки."""
+
+    def EncodeTexts(self, request, context):
+        response = super().EncodeTexts(request, context)
+        del response.vectors[-1]
+        return response
+
+    def EncodeImages(self, request, context):
+        response = super().EncodeImages(request, context)
+        del response.vectors[-1]
+        return response
+
+
+@pytest.fixture
+def short_server():
+    server, port = start_fake_server(ShortBatchServicer())
+    yield port
+    server.stop(None)
+
+
+@pytest.fixture(params=[BatchOnePeaceServicer, UnaryOnePeaceServicer])
+def fake_server(request):
+    servicer = request.param()
+    server, port = start_fake_server(servicer)
+    yield servicer, port
+    server.stop(None)
+
+
+def make_images(count: int) -> list[bytes]:
+    contents = []
+    for i in range(count):
+        buffer = BytesIO()
+        Image.new("RGB", (32, 32), (i * 10, 0, 0)).save(buffer, format="PNG")
+        contents.append(buffer.getvalue())
+    return contents
+
+
+def test_encode_images_matches_unary(fake_server):
+    servicer, port = fake_server
+    client = OnePeaceClient(port=port, max_batch_size=3)
+    images = make_images(8)
+
+    vectors = client.encode_images(images)
+
+    assert len(vectors) == 8
+    for content, vector in zip(images, vectors):
+        np.testing.assert_array_equal(vector, fake_vector(content))
+        np.testing.assert_array_equal(client.encode_image_bytes(content), fake_vector(content))
+    if isinstance(servicer, BatchOnePeaceServicer):
+        assert servicer.calls["EncodeImages"] == 3
+    else:
+        assert "EncodeImages" not in servicer.calls
+        assert not client._batch_supported
+
+
+def test_encode_texts(fake_server):
+    servicer, port = fake_server
+    client = OnePeaceClient(port=port)
+
+    vectors = client.encode_texts(["first", "second"])
+
+    np.testing.assert_array_equal(vectors, [fake_vector(b"first"), fake_vector(b"second")])
+    if isinstance(servicer, BatchOnePeaceServicer):
+        assert servicer.calls == {"EncodeTexts": 1}
+
+
+def test_response_vector_reads_both_encodings():
+    vector = fake_vector(b"content")
+
+    packed = response_vector(pb2.VectorResponse(vector_f32=vector.astype("<f4").tobytes()))
+    repeated = response_vector(pb2.VectorResponse(vector=vector.tolist()))
+
+    assert packed.dtype == repeated.dtype == np.float32
+    np.testing.assert_array_equal(packed, vector)
+    np.testing.assert_array_equal(repeated, vector)
+
+
+def test_short_batch_response_is_an_error(short_server):
+    client = OnePeaceClient(port=short_server)
+
+    with pytest.raises(OnePeaceError, match="1 векторов на 2"):
+        client.encode_texts(["first", "second"])
+    with pytest.raises(OnePeaceError, match="2 векторов на 3"):
+        client.encode_images(make_images(3))
+
+
+def test_async_short_batch_response_is_an_error(short_server):
+    async def encode():
+        client = AsyncOnePeaceClient(port=short_server)
+        try:
+            await client.encode_images(make_images(2))
+        finally:
+            await client.close()
+
+    with pytest.raises(OnePeaceError, match="1 векторов на 2"):
+        asyncio.run(encode())
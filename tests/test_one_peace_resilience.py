@@ -0,0 +1,225 @@
+import asyncio
+import time
+
+import grpc
+import numpy as np
+import pytest
+
+import one_peace_service_pb2 as pb2
+from benchmarks.stand_ins import BatchOnePeaceServicer, fake_vector, start_fake_server
+from embedders.async_one_peace_client import AsyncOnePeaceClient
+from embedders.one_peace_client import OnePeaceClient
+from embedders.resilience import CircuitBreaker, OnePeaceCircuitOpenError, OnePeaceRequestError, \
+    OnePeaceTimeoutError, OnePeaceUnavailableError, RetryPolicy
+
+
+class RejectingServicer(BatchOnePeaceServicer):
+    def EncodeText(self, request, context):
+        self._record("EncodeText")
+        context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+        return pb2.VectorResponse()
+
+
+class RestartingServicer(BatchOnePeaceServicer):
+    """Первый запрос долго висит и падает с UNAVAILABLE, следующие обслуживает."""
+
+    def EncodeText(self, request, context):
+        if not self.calls:
+            self._record("EncodeText")
+            context.abort(grpc.StatusCode.UNAVAILABLE, "перезапуск")
+        return super().EncodeText(request, context)
+
+    def EncodeTexts(self, request, context):
+        if not self.calls:
+            self._record("EncodeTexts")
+            context.abort(grpc.StatusCode.UNAVAILABLE, "перезапуск")
+        return super().EncodeTexts(request, context)
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(servicer):
+        server, port = start_fake_server(servicer)
+        started.append(server)
+        return f"localhost:{port}"
+
+    yield start
+    for server in started:
+        server.stop(None)
+
+
+@pytest.fixture
+def dead_endpoint():
+    # Порт только что освободившегося сервера: соединение сразу отклоняется (UNAVAILABLE).
+    server, port = start_fake_server(BatchOnePeaceServicer())
+    server.stop(None).wait()
+    return f"localhost:{port}"
+
+
+def test_round_robin_spreads_calls(servers):
+    first, second = BatchOnePeaceServicer(), BatchOnePeaceServicer()
+    client = OnePeaceClient(endpoints=[servers(first), servers(second)])
+
+    for _ in range(6):
+        client.encode_text("query")
+
+    assert first.calls == second.calls == {"EncodeText": 3}
+
+
+def test_deadline_raises_timeout(servers):
+    client = OnePeaceClient(endpoints=[servers(BatchOnePeaceServicer(latency=1.0))],
+                            policy=RetryPolicy(timeout=0.1, retries=0))
+
+    started = time.perf_counter()
+    with pytest.raises(OnePeaceTimeoutError):
+        client.encode_text("query")
+    assert time.perf_counter() - started < 0.5
+
+
+def test_retry_moves_to_live_endpoint(servers, dead_endpoint):
+    live = BatchOnePeaceServicer()
+    client = OnePeaceClient(endpoints=[dead_endpoint, servers(live)], policy=RetryPolicy(retries=1, backoff=0.01))
+
+    np.testing.assert_array_equal(client.encode_text("query"), fake_vector(b"query"))
+    assert live.calls == {"EncodeText": 1}
+
+
+def test_request_errors_are_not_retried(servers):
+    servicer = RejectingServicer()
+    client = OnePeaceClient(endpoints=[servers(servicer)], policy=RetryPolicy(retries=3, backoff=0.01))
+
+    with pytest.raises(OnePeaceRequestError):
+        client.encode_text("query")
+    assert servicer.calls == {"EncodeText": 1}
+
+
+def test_hedged_request_returns_fast_replica(servers):
+    slow, fast = BatchOnePeaceServicer(latency=1.0), BatchOnePeaceServicer()
+    client = OnePeaceClient(endpoints=[servers(slow), servers(fast)], policy=RetryPolicy(hedge_after=0.05))
+
+    started = time.perf_counter()
+    vector = client.encode_text("query")
+
+    assert time.perf_counter() - started < 0.5
+    np.testing.assert_array_equal(vector, fake_vector(b"query"))
+    assert fast.calls == {"EncodeText": 1}
+
+
+def test_circuit_breaker_fails_fast(dead_endpoint):
+    client = OnePeaceClient(endpoints=[dead_endpoint], policy=RetryPolicy(retries=0), failure_threshold=2)
+
+    for _ in range(2):
+        with pytest.raises(OnePeaceUnavailableError):
+            client.encode_text("query")
+    with pytest.raises(OnePeaceCircuitOpenError):
+        client.encode_text("query")
+
+
+def test_circuit_breaker_lets_probe_through_after_reset_timeout():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and not breaker.is_open
+
+
+async def _encode_texts(endpoints: list[str], policy: RetryPolicy, texts: list[str]):
+    client = AsyncOnePeaceClient(endpoints=endpoints, policy=policy)
+    try:
+        started = time.perf_counter()
+        vectors = await client.encode_texts(texts)
+        return time.perf_counter() - started, vectors
+    finally:
+        await client.close()
+
+
+def test_async_client_retries_on_live_endpoint(servers, dead_endpoint):
+    live = BatchOnePeaceServicer()
+    policy = RetryPolicy(retries=1, backoff=0.01)
+
+    _, vectors = asyncio.run(_encode_texts([dead_endpoint, servers(live)], policy, ["first", "second"]))
+
+    np.testing.assert_array_equal(vectors, [fake_vector(b"first"), fake_vector(b"second")])
+    assert live.calls == {"EncodeTexts": 1}
+
+
+def test_async_client_hedges_slow_primary(servers):
+    slow, fast = BatchOnePeaceServicer(latency=1.0), BatchOnePeaceServicer()
+    policy = RetryPolicy(hedge_after=0.05)
+
+    elapsed, vectors = asyncio.run(_encode_texts([servers(slow), servers(fast)], policy, ["first"]))
+
+    assert elapsed < 0.5
+    np.testing.assert_array_equal(vectors, [fake_vector(b"first")])
+
+
+def test_hedged_call_records_breakers_of_endpoints_that_answered(servers, dead_endpoint):
+    slow = BatchOnePeaceServicer(latency=0.3)
+    slow_endpoint = servers(slow)
+    client = OnePeaceClient(endpoints=[slow_endpoint, dead_endpoint],
+                            policy=RetryPolicy(retries=0, hedge_after=0.05), failure_threshold=1)
+    breakers = {endpoint.address: endpoint.breaker for endpoint in client.pool.endpoints}
+
+    np.testing.assert_array_equal(client.encode_text("query"), fake_vector(b"query"))
+
+    # Отказ хеджа засчитан его экземпляру, а ответ медленного основного — основному.
+    assert breakers[dead_endpoint].is_open
+    assert not breakers[slow_endpoint].is_open
+
+
+def test_hedge_win_counts_as_failure_of_slow_primary(servers):
+    slow, fast = BatchOnePeaceServicer(latency=1.0), BatchOnePeaceServicer()
+    slow_endpoint, fast_endpoint = servers(slow), servers(fast)
+    client = OnePeaceClient(endpoints=[slow_endpoint, fast_endpoint], policy=RetryPolicy(hedge_after=0.05),
+                            failure_threshold=1)
+    breakers = {endpoint.address: endpoint.breaker for endpoint in client.pool.endpoints}
+
+    client.encode_text("query")
+
+    assert breakers[slow_endpoint].is_open
+    assert not breakers[fast_endpoint].is_open
+
+
+def test_async_hedged_call_records_breakers_of_endpoints_that_answered(servers, dead_endpoint):
+    slow_endpoint = servers(BatchOnePeaceServicer(latency=0.3))
+
+    async def encode():
+        client = AsyncOnePeaceClient(endpoints=[slow_endpoint, dead_endpoint],
+                                     policy=RetryPolicy(retries=0, hedge_after=0.05), failure_threshold=1)
+        try:
+            vector = await client.encode_text("query")
+            return vector, {endpoint.address: endpoint.breaker.is_open for endpoint in client.pool.endpoints}
+        finally:
+            await client.close()
+
+    vector, opened = asyncio.run(encode())
+
+    np.testing.assert_array_equal(vector, fake_vector(b"query"))
+    assert opened == {slow_endpoint: False, dead_endpoint: True}
+
+
+def test_retry_skips_endpoint_of_failed_hedge(servers, dead_endpoint):
+    restarting = RestartingServicer(latency=0.2)
+    client = OnePeaceClient(endpoints=[servers(restarting), dead_endpoint],
+                            policy=RetryPolicy(retries=1, backoff=0.01, hedge_after=0.05))
+
+    # Основной и хедж отказали; повтор идёт не на мёртвый экземпляр хеджа, а на ожившего основного.
+    np.testing.assert_array_equal(client.encode_text("query"), fake_vector(b"query"))
+    assert restarting.calls == {"EncodeText": 2}
+
+
+def test_async_retry_skips_endpoint_of_failed_hedge(servers, dead_endpoint):
+    restarting = RestartingServicer(latency=0.2)
+    policy = RetryPolicy(retries=1, backoff=0.01, hedge_after=0.05)
+
+    _, vectors = asyncio.run(_encode_texts([servers(restarting), dead_endpoint], policy, ["first"]))
+
+    np.testing.assert_array_equal(vectors, [fake_vector(b"first")])
+    assert restarting.calls == {"EncodeTexts": 2}
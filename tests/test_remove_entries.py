@@ -0,0 +1,81 @@
+import uuid
+
+import grpc
+from qdrant_client import QdrantClient
+
+import cloudberry_storage_pb2 as pb2
+from benchmarks.stand_ins import DeterministicTextEmbedder, RecordingContext, SerializedClient, fake_vector, \
+    synthetic_ticket
+from cloudberry_storage import CloudberryStorage
+from model_registry import ModelRegistry
+
+
+class LocalOnePeace:
+    def encode_images(self, contents: list[bytes]):
+        return [fake_vector(content) for content in contents]
+
+
+class CountingClient(SerializedClient):
+    def __init__(self, target):
+        super().__init__(target)
+        self.calls: list[str] = []
+
+    def __getattr__(self, attr: str):
+        self.calls.append(attr)
+        return super().__getattr__(attr)
+
+
+def make_storage(tickets: int) -> tuple[CloudberryStorage, CountingClient, str]:
+    qdrant_client = CountingClient(QdrantClient(":memory:"))
+    registry = ModelRegistry(text_embedder=DeterministicTextEmbedder(), one_peace_client=LocalOnePeace(),
+                             qdrant_client=qdrant_client)
+    storage = CloudberryStorage(registry)
+    bucket_uuid = str(uuid.uuid4())
+    storage.InitBucket(pb2.InitBucketRequest(bucket_uuid=bucket_uuid), RecordingContext())
+    storage.BatchPutEntries(iter([synthetic_ticket(i, bucket_uuid) for i in range(tickets)]), RecordingContext())
+    qdrant_client.calls.clear()
+    return storage, qdrant_client, bucket_uuid
+
+
+def stored_points(qdrant_client: CountingClient, bucket_uuid: str) -> dict[str, set[str]]:
+    records, _ = qdrant_client.scroll(bucket_uuid, limit=10_000, with_payload=True)
+    points: dict[str, set[str]] = {}
+    for record in records:
+        points.setdefault(record.payload["ticket_id"], set()).add(record.payload["type"])
+    return points
+
+
+def test_remove_entries_by_ticket_ids_in_one_call():
+    storage, qdrant_client, bucket_uuid = make_storage(tickets=20)
+    context = RecordingContext()
+
+    response = storage.RemoveEntries(pb2.RemoveEntriesRequest(
+        bucket_uuid=bucket_uuid, external_ticket_ids=[f"ticket-{i}" for i in range(15)], wait=True
+    ), context)
+
+    assert context.code is None and response.completed
+    assert qdrant_client.calls == ["batch_update_points"]
+    assert set(stored_points(qdrant_client, bucket_uuid)) == {f"ticket-{i}" for i in range(15, 20)}
+
+
+def test_remove_entries_by_payload_criteria():
+    storage, qdrant_client, bucket_uuid = make_storage(tickets=3)
+
+    storage.RemoveEntries(pb2.RemoveEntriesRequest(
+        bucket_uuid=bucket_uuid, external_ticket_ids=["ticket-0", "ticket-1"],
+        payload_matches=[pb2.PayloadMatch(key="type", values=["image"])], wait=True
+    ), RecordingContext())
+
+    points = stored_points(qdrant_client, bucket_uuid)
+    assert points["ticket-0"] == points["ticket-1"] == {"title", "description"}
+    assert points["ticket-2"] == {"title", "description", "image"}
+
+
+def test_remove_entries_without_criteria_is_rejected():
+    storage, qdrant_client, bucket_uuid = make_storage(tickets=1)
+    context = RecordingContext()
+
+    storage.RemoveEntries(pb2.RemoveEntriesRequest(bucket_uuid=bucket_uuid), context)
+
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+    assert qdrant_client.calls == []
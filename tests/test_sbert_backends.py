@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from embedders import sbert_embedder
+from embedders.sbert_embedder import SBERTEmbedder
+
+SENTENCES = [
+    "Не открывается личный кабинет после обновления",
+    "Printer on the third floor keeps jamming",
+    "Ошибка 500 при загрузке вложения больше 10 МБ",
+    "VPN disconnects every few minutes",
+    "Прошу выдать доступ к репозиторию",
+    "ок",
+]
+# Допустимое отклонение от эталонного fp32 torch: косинус между векторами одного и того же текста.
+MIN_COSINE = {"torch-int8": 0.98, "onnx": 0.999}
+
+
+class RecordingModel:
+    def __init__(self):
+        self.batches: list[list[str]] = []
+
+    def encode(self, texts, batch_size=32):
+        self.batches.append((list(texts), batch_size))
+        return np.array([[len(text), 0.0] for text in texts], dtype=np.float32)
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.sum(a * b, axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        SBERTEmbedder(backend="tensorrt")
+
+
+def test_encode_texts_hands_the_whole_batch_to_the_model(monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setitem(sbert_embedder.SBERT_BACKENDS, "fake", lambda model_name, threads: model)
+
+    vectors = SBERTEmbedder(batch_size=4, backend="fake").encode_texts(SENTENCES)
+
+    assert model.batches == [(SENTENCES, 4)]
+    assert vectors[:, 0].tolist() == [len(text) for text in SENTENCES]
+
+
+@pytest.mark.parametrize("backend", ["torch-int8", "onnx"])
+def test_backend_matches_reference_model(backend):
+    pytest.importorskip("sentence_transformers")
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+        pytest.importorskip("optimum")
+
+    reference = SBERTEmbedder(backend="torch").encode_texts(SENTENCES)
+    candidate = SBERTEmbedder(backend=backend, threads=1).encode_texts(SENTENCES)
+
+    assert candidate.shape == reference.shape
+    assert cosine(reference, candidate).min() >= MIN_COSINE[backend]
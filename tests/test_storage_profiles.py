@@ -0,0 +1,43 @@
+from qdrant_client import QdrantClient, models
+
+import cloudberry_storage_pb2 as pb2
+from storage_profiles import collection_params, search_params
+
+VECTORS = {
+    "one_peace_embedding": models.VectorParams(size=8, distance=models.Distance.COSINE),
+    "title_sbert_embedding": models.VectorParams(size=4, distance=models.Distance.COSINE),
+}
+
+
+def test_empty_profile_keeps_default_collection():
+    params = collection_params(pb2.StorageProfile(), VECTORS)
+    assert params["vectors_config"] == VECTORS
+    assert params["hnsw_config"] is None
+    assert params["quantization_config"] is None
+    assert params["on_disk_payload"] is None
+
+
+def test_compact_profile():
+    profile = pb2.StorageProfile(quantization=pb2.QUANTIZATION_SCALAR_INT8, on_disk_vectors=True,
+                                 on_disk_payload=True, hnsw_m=8)
+    params = collection_params(profile, VECTORS)
+    assert all(vector.on_disk for vector in params["vectors_config"].values())
+    assert VECTORS["one_peace_embedding"].on_disk is None
+    assert params["hnsw_config"] == models.HnswConfigDiff(m=8)
+    assert params["quantization_config"].scalar.type == models.ScalarType.INT8
+    assert params["on_disk_payload"] is True
+
+    binary = collection_params(pb2.StorageProfile(quantization=pb2.QUANTIZATION_BINARY), VECTORS)
+    assert isinstance(binary["quantization_config"], models.BinaryQuantization)
+
+    client = QdrantClient(":memory:")
+    client.create_collection("bucket", **params)
+    assert client.collection_exists("bucket")
+
+
+def test_search_params():
+    assert search_params(pb2.SearchParams()) is None
+    assert search_params(pb2.SearchParams(hnsw_ef=128)) == models.SearchParams(hnsw_ef=128)
+    params = search_params(pb2.SearchParams(oversampling=2.0))
+    assert params.hnsw_ef is None
+    assert params.quantization == models.QuantizationSearchParams(rescore=True, oversampling=2.0)
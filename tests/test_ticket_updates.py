@@ -0,0 +1,80 @@
+import pytest
+
+import cloudberry_storage_pb2 as pb2
+from ticket_updates import REMOVE_BATCH_SIZE, TicketUpdate, point_id, remove_operations, ticket_hashes, \
+    write_operations
+
+
+def _request(title: str, attachments: list[bytes]) -> pb2.PutEntryRequest:
+    return pb2.PutEntryRequest(
+        external_ticket_id="t1",
+        bucket_uuid="bucket",
+        ticket=pb2.TicketEntry(
+            title=pb2.TextEntry(content=title),
+            description=pb2.TextEntry(content="description"),
+            attachments=[pb2.ImageEntry(content=content) for content in attachments],
+        ),
+    )
+
+
+def test_new_ticket_embeds_everything():
+    update = TicketUpdate(_request("title", [b"a", b"b"]), {})
+    assert update.title and update.description
+    assert update.images == [0, 1]
+    assert update.orphans == []
+
+
+def test_only_changed_fields_are_reembedded_and_orphans_removed():
+    stored = ticket_hashes(_request("title", [b"a", b"b", b"c"]))
+    update = TicketUpdate(_request("new title", [b"a", b"changed"]), stored)
+    assert update.title
+    assert not update.description
+    assert update.images == [1]
+    assert update.orphans == [point_id("t1", "img_2")]
+
+
+def test_points_without_hash_are_reembedded():
+    stored = {pid: None for pid in ticket_hashes(_request("title", [b"a"]))}
+    update = TicketUpdate(_request("title", [b"a"]), stored)
+    assert update.title and update.description and update.images == [0]
+
+
+def test_pipeline_change_reembeds_only_its_points():
+    stored = ticket_hashes(_request("title", [b"a"]), text_pipeline="sbert:v1", image_pipeline="one-peace")
+    assert ticket_hashes(_request("title", [b"a"])) != stored
+
+    update = TicketUpdate(_request("title", [b"a"]), stored, text_pipeline="sbert:v2", image_pipeline="one-peace")
+    assert update.title and update.description and update.images == []
+
+    update = TicketUpdate(_request("title", [b"a"]), stored, text_pipeline="sbert:v1",
+                          image_pipeline="one-peace:ocr:eng+rus:sbert:v1")
+    assert not update.title and not update.description and update.images == [0]
+
+
+def test_write_operations():
+    assert write_operations([], []) == []
+    operations = write_operations([], ["id"])
+    assert len(operations) == 1
+    assert operations[0].delete.points == ["id"]
+
+
+def test_remove_operations_batch_ticket_ids():
+    ticket_ids = [f"t{i}" for i in range(REMOVE_BATCH_SIZE + 1)]
+    operations = remove_operations(ticket_ids + ["t0"], [pb2.PayloadMatch(key="type", values=["image"])])
+
+    assert len(operations) == 2
+    type_condition, ticket_condition = operations[1].delete.filter.must
+    assert type_condition.key == "type" and type_condition.match.any == ["image"]
+    assert ticket_condition.match.any == [f"t{REMOVE_BATCH_SIZE}"]
+    assert len(operations[0].delete.filter.must[1].match.any) == REMOVE_BATCH_SIZE
+
+
+def test_remove_operations_by_payload_only():
+    operations = remove_operations([], [pb2.PayloadMatch(key="type", values=["title", "description"])])
+    assert [condition.key for condition in operations[0].delete.filter.must] == ["type"]
+
+
+@pytest.mark.parametrize("matches", [[], [pb2.PayloadMatch(key="type")], [pb2.PayloadMatch(values=["image"])]])
+def test_remove_operations_reject_empty_criteria(matches):
+    with pytest.raises(ValueError):
+        remove_operations([], matches)
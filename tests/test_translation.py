@@ -0,0 +1,45 @@
+from translation import NoTranslator, QueryTranslator, TranslatorBackend, needs_translation
+
+
+class StaticTranslator(TranslatorBackend):
+    """Локальная замена внешнего переводчика: словарь готовых переводов."""
+
+    def __init__(self, translations: dict[str, str]):
+        self.translations = translations
+        self.calls = 0
+
+    def translate(self, text: str) -> str:
+        self.calls += 1
+        return self.translations.get(text, text)
+
+
+def test_english_queries_skip_the_backend():
+    backend = StaticTranslator({})
+    translator = QueryTranslator(backend)
+
+    assert translator.translate("  printer   is broken ") == "printer is broken"
+    assert backend.calls == 0
+
+
+def test_translations_are_cached_by_normalized_query():
+    backend = StaticTranslator({"не печатает принтер": "printer does not print"})
+    translator = QueryTranslator(backend)
+
+    assert translator.translate("не печатает принтер") == "printer does not print"
+    assert translator.translate("Не  печатает принтер") == "printer does not print"
+    assert backend.calls == 1
+
+
+def test_default_backend_passes_text_through():
+    translator = QueryTranslator()
+    assert isinstance(translator.backend, NoTranslator)
+    assert translator.translate("не печатает принтер") == "не печатает принтер"
+
+
+def test_language_check():
+    assert needs_translation("Ошибка 404")
+    assert needs_translation("printer не печатает")
+    assert not needs_translation("Error 404: page not found!")
+    # Только кириллица: латиница на других языках и транслит не переводятся.
+    assert not needs_translation("la impresora no funciona")
+    assert not needs_translation("ne pechataet printer")
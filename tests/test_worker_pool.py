@@ -0,0 +1,81 @@
+import os
+import time
+from io import BytesIO
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmarks.stand_ins import DeterministicTextEmbedder
+from worker_pool import EmbeddingWorkerPool, WorkerCrashedError, WorkerTimeoutError
+
+TEXTS = ["первый тикет", "second ticket", "", "третий " * 50]
+
+
+class CrashingEmbedder(DeterministicTextEmbedder):
+    def encode_texts(self, texts: list[str]) -> np.ndarray:
+        if "crash" in texts:
+            os._exit(1)
+        if "hang" in texts:
+            time.sleep(60)
+        return super().encode_texts(texts)
+
+
+def png(size: tuple[int, int]) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def pool():
+    pool = EmbeddingWorkerPool(2, CrashingEmbedder)
+    yield pool
+    pool.close()
+
+
+def test_texts_match_in_process_embedder(pool):
+    np.testing.assert_array_equal(pool.encode_texts(TEXTS), DeterministicTextEmbedder().encode_texts(TEXTS))
+
+
+def test_images_keep_order_and_report_broken_ones(pool):
+    small, large = png((100, 80)), png((1024, 768))
+
+    prepared = pool.prepare_images([small, b"not an image", large])
+
+    assert prepared[0] == small
+    assert isinstance(prepared[1], Exception)
+    assert Image.open(BytesIO(prepared[2])).size == (256, 256)
+
+
+def test_payload_larger_than_slot_goes_through_pipe():
+    pool = EmbeddingWorkerPool(1, DeterministicTextEmbedder, slot_bytes=1024)
+    try:
+        np.testing.assert_array_equal(pool.encode_texts(TEXTS), DeterministicTextEmbedder().encode_texts(TEXTS))
+    finally:
+        pool.close()
+
+
+def test_crashed_worker_is_restarted(pool):
+    with pytest.raises(WorkerCrashedError):
+        pool.encode_texts(["crash"])
+
+    assert pool.restarts == 1
+    # Оба воркера, включая перезапущенный, снова принимают запросы.
+    for _ in range(4):
+        assert pool.encode_texts(TEXTS).shape == (len(TEXTS), 384)
+
+
+def test_hung_worker_is_restarted_after_timeout():
+    pool = EmbeddingWorkerPool(1, CrashingEmbedder, timeout=1.0)
+    try:
+        started = time.perf_counter()
+        with pytest.raises(WorkerTimeoutError):
+            pool.encode_texts(["hang"])
+        assert time.perf_counter() - started < 10
+
+        assert pool.restarts == 1
+        # Запоздалый ответ зависшего воркера не достаётся следующему запросу.
+        np.testing.assert_array_equal(pool.encode_texts(TEXTS), DeterministicTextEmbedder().encode_texts(TEXTS))
+    finally:
+        pool.close()